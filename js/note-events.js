@@ -0,0 +1,110 @@
+// Reader for the binary note-event files written by python/note_events.py
+// (midi_exporter.py --events). Works in the browser and in Node.
+//
+// Layout (little-endian, every section 4-byte aligned):
+//   header 32 bytes | tracks 40 bytes each | slices 16 bytes each |
+//   events 12 bytes each (start f32, end f32, track u8, pitch u8,
+//   velocity u8, reserved u8), sorted by start time
+
+const NOTE_EVENTS_MAGIC = "HVNE";
+const NOTE_EVENTS_VERSION = 1;
+const TRACK_RECORD_BYTES = 40;
+const TRACK_NAME_BYTES = 32;
+const SLICE_RECORD_BYTES = 16;
+const EVENT_RECORD_BYTES = 12;
+
+function decodeNoteEvents(buffer) {
+  // Accept an ArrayBuffer, a typed array or a Node Buffer
+  const bytes = ArrayBuffer.isView(buffer)
+    ? new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength)
+    : new Uint8Array(buffer);
+  if (bytes.byteLength < 32) {
+    throw new Error("Note-event data is shorter than its header");
+  }
+
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const magic = String.fromCharCode(...bytes.subarray(0, 4));
+  if (magic !== NOTE_EVENTS_MAGIC) {
+    throw new Error("Not a note-event file (bad magic)");
+  }
+  const version = view.getUint16(4, true);
+  if (version !== NOTE_EVENTS_VERSION) {
+    throw new Error(`Unsupported note-event version ${version}`);
+  }
+
+  const headerSize = view.getUint16(6, true);
+  const bpm = view.getFloat32(8, true);
+  const duration = view.getFloat32(12, true);
+  const trackCount = view.getUint16(16, true);
+  const sliceCount = view.getUint32(20, true);
+  const eventCount = view.getUint32(24, true);
+
+  const slicesOffset = headerSize + trackCount * TRACK_RECORD_BYTES;
+  const eventsOffset = slicesOffset + sliceCount * SLICE_RECORD_BYTES;
+  if (eventsOffset + eventCount * EVENT_RECORD_BYTES > bytes.byteLength) {
+    throw new Error("Note-event data is truncated");
+  }
+
+  const utf8 = new TextDecoder();
+  const tracks = [];
+  for (let i = 0; i < trackCount; i++) {
+    const offset = headerSize + i * TRACK_RECORD_BYTES;
+    const name = bytes.subarray(offset, offset + TRACK_NAME_BYTES);
+    const end = name.indexOf(0);
+    tracks.push({
+      name: utf8.decode(end === -1 ? name : name.subarray(0, end)),
+      program: view.getUint8(offset + 32),
+      isDrum: view.getUint8(offset + 33) !== 0,
+      eventCount: view.getUint32(offset + 36, true),
+    });
+  }
+
+  const slices = [];
+  for (let i = 0; i < sliceCount; i++) {
+    const offset = slicesOffset + i * SLICE_RECORD_BYTES;
+    slices.push({
+      midi: view.getInt16(offset, true),
+      chord: [
+        view.getInt16(offset + 2, true),
+        view.getInt16(offset + 4, true),
+        view.getInt16(offset + 6, true),
+      ],
+      position: view.getFloat32(offset + 8, true),
+      brightness: view.getFloat32(offset + 12, true),
+    });
+  }
+
+  // Events are unpacked into one typed array per column
+  const events = {
+    start: new Float32Array(eventCount),
+    end: new Float32Array(eventCount),
+    track: new Uint8Array(eventCount),
+    pitch: new Uint8Array(eventCount),
+    velocity: new Uint8Array(eventCount),
+  };
+  for (let i = 0; i < eventCount; i++) {
+    const offset = eventsOffset + i * EVENT_RECORD_BYTES;
+    events.start[i] = view.getFloat32(offset, true);
+    events.end[i] = view.getFloat32(offset + 4, true);
+    events.track[i] = bytes[offset + 8];
+    events.pitch[i] = bytes[offset + 9];
+    events.velocity[i] = bytes[offset + 10];
+  }
+
+  return { version, bpm, duration, tracks, slices, events };
+}
+
+function fetchNoteEvents(url) {
+  return fetch(url)
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`Cannot load note events: ${response.status}`);
+      }
+      return response.arrayBuffer();
+    })
+    .then(decodeNoteEvents);
+}
+
+if (typeof module !== "undefined" && module.exports) {
+  module.exports = { decodeNoteEvents, fetchNoteEvents };
+}
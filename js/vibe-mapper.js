@@ -647,6 +647,9 @@ function exportMultiTrackMidi() {
         alert("MIDI export failed: " + data.error);
       } else {
         console.log("✅ MIDI exported successfully:", data);
+        if (data.eventsFile) {
+          loadArrangementEvents(data.eventsFile);
+        }
         alert(
           `🎼 Multi-track MIDI exported!\nTracks: ${tracks.join(", ")}\nFile: ${
             data.outputFile
@@ -660,6 +663,23 @@ function exportMultiTrackMidi() {
     });
 }
 
+// Generated arrangement from the exporter's binary note-event file
+let lastArrangement = null;
+
+function loadArrangementEvents(eventsFile) {
+  fetchNoteEvents(eventsFile)
+    .then((arrangement) => {
+      lastArrangement = arrangement;
+      console.log(
+        `🧾 Loaded ${arrangement.events.start.length} notes in ${arrangement.tracks.length} tracks:`,
+        arrangement.tracks.map((track) => track.name).join(", ")
+      );
+    })
+    .catch((error) => {
+      console.warn("Could not load note events:", error);
+    });
+}
+
 // Social Features - Real-time Collaboration
 let socket;
 let currentRoomId = null;
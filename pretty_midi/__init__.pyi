@@ -1,21 +1,32 @@
 # Type stubs for pretty_midi
 # Custom stubs created for Hyper Vibe Engine
 
-from typing import List, Union
+from typing import List, Optional, Union
 
 __version__: str = "0.2.10"
 
 class PrettyMIDI:
-    def __init__(self, initial_tempo: Union[float, int] = 120) -> None:
+    def __init__(
+        self,
+        midi_file: Optional[str] = None,
+        resolution: int = 220,
+        initial_tempo: Union[float, int] = 120,
+    ) -> None:
         """Create a PrettyMIDI object.
 
         Args:
+            midi_file: Path of a MIDI file to load
+            resolution: Ticks per quarter note of a new file
             initial_tempo: Initial tempo in BPM
         """
         ...
 
     instruments: List['Instrument']
 
+    def get_end_time(self) -> float:
+        """Time of the last event in seconds."""
+        ...
+
     def write(self, filename: str) -> None:
         """Write the MIDI data to a file.
 
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Album mode for the Hyper Vibe MIDI Exporter.
+
+Several images become the sections of one continuous arrangement. The
+images are decoded and analysed in parallel, their slice sequences are
+stitched together with interpolated transition slices, and the whole
+piece is generated in a single pass, so melodic state, groove position
+and harmony carry across section boundaries.
+
+Between two sections the transition slices glide from the last slice of
+one image to the first slice of the next. The roots move step by step,
+so the harmonic analysis modulates between the sections' keys. When the
+sections have different tempos, the slice durations ramp from one tempo
+to the next. The arrangement is generated on an even grid and then
+time-warped onto the actual slice durations.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from groove_bank import GrooveBank
+from image_preflight import DecodeBudget
+from mapping_curves import MappingCurve
+from midi_exporter import (
+    MAX_DURATION,
+    build_rolls,
+    decode_image_pixels,
+    notes_from_pixels,
+)
+from piano_roll import PianoRoll
+
+DEFAULT_TRANSITION_SLICES = 4
+
+
+def _extract_section(
+    image_path: str,
+    num_slices: int,
+    max_width: int,
+    pitch_curve: Optional[MappingCurve],
+    budget: Optional[DecodeBudget],
+    num_bands: int,
+    features: bool,
+) -> List[Dict[str, Any]]:
+    """Pool worker: decode one image and extract its note slices."""
+    pixels = decode_image_pixels(
+        image_path, max_width, budget, "RGB" if features else "L"
+    )
+    return notes_from_pixels(pixels, num_slices, pitch_curve, num_bands)
+
+
+def extract_sections(
+    image_paths: Sequence[str],
+    num_slices: int = 16,
+    max_width: int = 1000,
+    pitch_curve: Optional[MappingCurve] = None,
+    budget: Optional[DecodeBudget] = None,
+    num_bands: int = 0,
+    features: bool = False,
+    max_workers: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Extract the note slices of every image concurrently.
+
+    Returns:
+        One list of note dictionaries per image, in input order
+
+    Raises:
+        ValueError: If an image cannot be read or analysed (the message
+            names the image)
+    """
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = [
+            pool.submit(
+                _extract_section,
+                image_path,
+                num_slices,
+                max_width,
+                pitch_curve,
+                budget,
+                num_bands,
+                features,
+            )
+            for image_path in image_paths
+        ]
+        sections = []
+        for image_path, future in zip(image_paths, futures):
+            try:
+                sections.append(future.result())
+            except (OSError, ValueError) as e:
+                for pending in futures:
+                    pending.cancel()
+                raise ValueError(f"Cannot extract {image_path}: {e}") from e
+    return sections
+
+
+def _lerp(a: float, b: float, fraction: float) -> float:
+    return a + (b - a) * fraction
+
+
+def transition_slice(
+    before: Dict[str, Any], after: Dict[str, Any], fraction: float
+) -> Dict[str, Any]:
+    """
+    A slice part way (0-1) from one section's last slice to the next
+    section's first.
+
+    The root is interpolated and the chord rebuilt on it, as extraction
+    does. Band brightness and colour features are blended when both
+    slices have them.
+    """
+    midi_note = int(round(_lerp(before["midi"], after["midi"], fraction)))
+    note_data: Dict[str, Any] = {
+        "midi": midi_note,
+        "chord": [max(0, min(127, midi_note + step)) for step in (0, 4, 7)],
+        "position": 0.0,
+        "brightness": _lerp(
+            float(before["brightness"]), float(after["brightness"]), fraction
+        ),
+    }
+    bands_before, bands_after = before.get("bands"), after.get("bands")
+    if bands_before is not None and bands_after is not None:
+        note_data["bands"] = [
+            _lerp(a, b, fraction) for a, b in zip(bands_before, bands_after)
+        ]
+    features_before, features_after = before.get("features"), after.get("features")
+    if features_before is not None and features_after is not None:
+        note_data["features"] = {
+            name: _lerp(value, features_after[name], fraction)
+            for name, value in features_before.items()
+        }
+    return note_data
+
+
+def stitch_sections(
+    sections: Sequence[List[Dict[str, Any]]],
+    section_durations: Sequence[float],
+    transition_slices: int = DEFAULT_TRANSITION_SLICES,
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Join section slices into one sequence with transitions in between.
+
+    Args:
+        sections: Note slices per section
+        section_durations: Length of each section in seconds
+        transition_slices: Slices inserted between consecutive sections
+
+    Returns:
+        (notes, slice_durations): the stitched slices, with "position"
+        renumbered over the whole piece, and each slice's length in seconds
+
+    Raises:
+        ValueError: If the inputs are empty or inconsistent
+    """
+    if not sections:
+        raise ValueError("An album needs at least one section")
+    if len(section_durations) != len(sections):
+        raise ValueError(
+            f"Got {len(section_durations)} section durations for "
+            f"{len(sections)} sections"
+        )
+    if transition_slices < 0:
+        raise ValueError(
+            f"Transition slices cannot be negative, got {transition_slices}"
+        )
+    if any(not section for section in sections):
+        raise ValueError("Every section needs at least one slice")
+    if any(seconds <= 0 for seconds in section_durations):
+        raise ValueError("Section durations must be positive")
+
+    notes: List[Dict[str, Any]] = []
+    durations: List[float] = []
+    for index, (section, seconds) in enumerate(zip(sections, section_durations)):
+        step = seconds / len(section)
+        if index > 0:
+            previous_step = section_durations[index - 1] / len(sections[index - 1])
+            previous_end = notes[-1]
+            for k in range(1, transition_slices + 1):
+                fraction = k / (transition_slices + 1)
+                notes.append(transition_slice(previous_end, section[0], fraction))
+                # Tempo ramp: slice lengths glide between the two sections
+                durations.append(_lerp(previous_step, step, fraction))
+        notes.extend(dict(note_data) for note_data in section)
+        durations.extend([step] * len(section))
+
+    for index, note_data in enumerate(notes):
+        note_data["position"] = index / len(notes)
+    return notes, np.asarray(durations, dtype=np.float64)
+
+
+def warp_roll(roll: PianoRoll, grid_step: float, boundaries: np.ndarray) -> PianoRoll:
+    """
+    Map note times from an even slice grid onto real slice boundaries.
+
+    A time t on the grid lies at slice t / grid_step; it is mapped
+    linearly within that slice onto the real boundaries, so notes keep
+    their position inside their slice while slices stretch or shrink.
+    """
+    slots = np.arange(len(boundaries), dtype=np.float64)
+    return PianoRoll(
+        np.interp(roll.starts / grid_step, slots, boundaries),
+        np.interp(roll.ends / grid_step, slots, boundaries),
+        roll.pitches,
+        roll.velocities,
+        roll.name,
+        roll.program,
+        roll.is_drum,
+    )
+
+
+def build_album_rolls(
+    notes: List[Dict[str, Any]],
+    slice_durations: np.ndarray,
+    bpm: int,
+    tracks: List[str],
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> List[PianoRoll]:
+    """
+    Generate the stitched album in one pass and lay it onto the real
+    slice durations.
+
+    Raises:
+        ValueError: If the album is longer than MAX_DURATION seconds or the
+            settings are invalid
+    """
+    if len(slice_durations) != len(notes):
+        raise ValueError("Need one duration per slice")
+    boundaries = np.concatenate([[0.0], np.cumsum(slice_durations)])
+    total = float(boundaries[-1])
+    if total > MAX_DURATION:
+        raise ValueError(
+            f"Album is {total:.0f}s long, the limit is {MAX_DURATION} seconds"
+        )
+
+    # Generate on an even grid of whole seconds, then warp onto the slices
+    grid_duration = max(1, int(np.ceil(total)))
+    rolls = build_rolls(
+        notes, bpm, grid_duration, tracks, ai_mode, curves, seed, grooves
+    )
+    grid_step = grid_duration / len(notes)
+    return [warp_roll(roll, grid_step, boundaries).sorted() for roll in rolls]
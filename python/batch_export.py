@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Batch export for the Hyper Vibe MIDI Exporter.
+
+Image decoding and track generation run in two separate process pools.
+Decode workers fingerprint, decode and extract in one step, so pixel
+arrays never leave the worker that decoded them. The extracted note
+slices go to a generation worker through shared memory, so only small
+descriptors are pickled no matter how large the images are.
+
+Conversions are queued on a job_scheduler.PriorityScheduler: batch
+generation as bulk work, watched and single conversions as interactive
+work, so bulk jobs sharing a pool never delay interactive ones.
+"""
+
+import os
+import shutil
+import time
+from contextlib import ExitStack
+from multiprocessing import resource_tracker
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mapping_curves import PITCH_CURVE, MappingCurve
+from midi_exporter import (
+    DEFAULT_TRACKS,
+    GENERATOR_VERSION,
+    build_rolls,
+    decode_image_pixels,
+    notes_from_array,
+    notes_from_pixels,
+    notes_to_array,
+)
+from job_scheduler import BULK, INTERACTIVE, PriorityClass, PriorityScheduler
+from midi_index import roll_track_infos
+from note_reduction import reduce_roll
+from piano_roll import midi_from_rolls
+from result_cache import request_fingerprint
+from shared_arrays import (
+    SharedArrayRef,
+    SharedArrayRegistry,
+    publish_array,
+    with_shared_array,
+)
+from single_flight import SingleFlight
+from stem_export import write_stems
+
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "num_slices": 16,
+    "max_width": 1000,
+    "bpm": 60,
+    "duration": 8,
+    "tracks": DEFAULT_TRACKS,
+    "ai_mode": False,
+    "curves": None,
+    "budget": None,
+    "num_bands": 0,
+    "features": False,
+    "reduction": None,
+    "seed": None,
+    "grooves": None,
+    "stems": False,
+    "stems_zip": False,
+}
+
+
+def make_export_options(**overrides: Any) -> Dict[str, Any]:
+    """Export options with defaults filled in; unknown keys are rejected."""
+    unknown = set(overrides) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown export options: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_OPTIONS, **overrides}
+
+
+def batch_output_paths(image_paths: Sequence[str], output_dir: str) -> List[str]:
+    """One .mid path per image in output_dir, de-duplicating equal names."""
+    used: Dict[str, int] = {}
+    paths = []
+    for image_path in image_paths:
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        name = stem if count == 0 else f"{stem}_{count}"
+        paths.append(os.path.join(output_dir, f"{name}.mid"))
+    return paths
+
+
+def _pitch_curve(options: Dict[str, Any]) -> Optional[MappingCurve]:
+    """The user's pitch curve from the export options, if any."""
+    return (options.get("curves") or {}).get(PITCH_CURVE)
+
+
+def _extract_notes(image_path: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode an image and extract its note slices."""
+    pixels = decode_image_pixels(
+        image_path,
+        options["max_width"],
+        options["budget"],
+        "RGB" if options["features"] else "L",
+    )
+    return notes_from_pixels(
+        pixels, options["num_slices"], _pitch_curve(options), options["num_bands"]
+    )
+
+
+def _decode_job(
+    image_path: str, options: Dict[str, Any]
+) -> Tuple[SharedArrayRef, float]:
+    """Decode pool worker: decode and extract into a shared note block."""
+    started = time.perf_counter()
+    ref = publish_array(notes_to_array(_extract_notes(image_path, options)))
+    return ref, time.perf_counter() - started
+
+
+def _write_midi(
+    notes: List[Dict[str, Any]], output_path: str, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build the arrangement for note slices, write it and any stems."""
+    rolls = build_rolls(
+        notes,
+        options["bpm"],
+        options["duration"],
+        options["tracks"],
+        options["ai_mode"],
+        options["curves"],
+        options["seed"],
+        options["grooves"],
+    )
+    if options["reduction"] is not None:
+        rolls = [reduce_roll(roll, options["reduction"]) for roll in rolls]
+    midi_from_rolls(rolls, options["bpm"]).write(output_path)
+    stems = (
+        write_stems(rolls, output_path, options["bpm"], options["stems_zip"])
+        if options["stems"] or options["stems_zip"]
+        else []
+    )
+    return {
+        "output_path": output_path,
+        "stems": stems,
+        "file_size": os.path.getsize(output_path),
+        "tracks": [roll.name for roll in rolls],
+        "track_info": roll_track_infos(rolls),
+        "total_notes": sum(len(roll) for roll in rolls),
+    }
+
+
+def _generate_job(
+    notes_ref: SharedArrayRef, output_path: str, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Generation pool worker: build and write the MIDI for shared note slices."""
+    started = time.perf_counter()
+    notes = with_shared_array(notes_ref, notes_from_array)
+    result = _write_midi(notes, output_path, options)
+    result["generate_seconds"] = time.perf_counter() - started
+    return result
+
+
+def convert_image(
+    image_path: str, output_path: str, options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Convert one image in the current process (decode, extract, generate).
+
+    Unlike the CLI helpers this raises instead of exiting, so it can run
+    inside a long-lived worker pool.
+
+    Raises:
+        FileNotFoundError: If the image does not exist
+        ValueError: If the image or the options are invalid
+        OSError: If the image cannot be read or the MIDI cannot be written
+    """
+    options = make_export_options(**(options or {}))
+    started = time.perf_counter()
+    notes = _extract_notes(image_path, options)
+    result = _write_midi(notes, output_path, options)
+    result["convert_seconds"] = time.perf_counter() - started
+    return result
+
+
+def coalescing_key(image_path: str, options: Dict[str, Any]) -> Optional[str]:
+    """
+    Fingerprint under which identical conversions are shared, or None if
+    this one must run on its own.
+
+    Unseeded requests are not shared: like the result cache, coalescing
+    only applies where identical requests must give identical output, and
+    each unseeded export gets a fresh arrangement. Requests with stems are
+    not shared either, since their stems and bundle are named after the
+    output file, nor are images that cannot be read (the conversion
+    reports the error).
+    """
+    if options["seed"] is None or options["stems"] or options["stems_zip"]:
+        return None
+    try:
+        return request_fingerprint(image_path, options, GENERATOR_VERSION)
+    except OSError:
+        return None
+
+
+def _follower_result(leader: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+    """A follower's result: the leader's file copied to its own output."""
+    if os.path.abspath(leader["output_path"]) != os.path.abspath(output_path):
+        shutil.copyfile(leader["output_path"], output_path)
+    return dict(leader, output_path=output_path, coalesced=True)
+
+
+class CoalescingConverter:
+    """
+    convert_image through a priority scheduler, with single-flight
+    coalescing.
+
+    A request identical to one still running (same image content, options
+    and generator version; see coalescing_key) waits for that conversion
+    and receives a copy of its file instead of converting again. Errors
+    of the shared conversion are raised to every waiting request.
+    """
+
+    def __init__(self, scheduler: PriorityScheduler):
+        self.scheduler = scheduler
+        self.flights = SingleFlight()
+
+    def submit(
+        self,
+        image_path: str,
+        output_path: str,
+        options: Dict[str, Any],
+        job_class: str = INTERACTIVE,
+    ) -> "Future[Dict[str, Any]]":
+        """
+        Convert an image, or join an identical conversion in flight.
+
+        Args:
+            image_path: Image to convert
+            output_path: Path of the .mid file to write
+            options: Export options (see make_export_options)
+            job_class: Scheduler priority class of the conversion
+
+        Returns:
+            Future of the convert_image result; a shared result has
+            "coalesced" set
+        """
+        options = make_export_options(**options)
+        key = coalescing_key(image_path, options)
+
+        def start() -> "Future[Dict[str, Any]]":
+            return self.scheduler.submit(
+                job_class, convert_image, image_path, output_path, options
+            )
+
+        if key is None:
+            future: "Future[Dict[str, Any]]" = start()
+            return future
+        leader, is_leader = self.flights.submit(key, start)
+        if is_leader:
+            return leader
+
+        follower: "Future[Dict[str, Any]]" = Future()
+
+        def land(done: Future) -> None:
+            if done.cancelled():
+                follower.cancel()
+                return
+            if not follower.set_running_or_notify_cancel():
+                return  # The follower was cancelled while waiting
+            error = done.exception()
+            if error is not None:
+                follower.set_exception(error)
+                return
+            try:
+                follower.set_result(_follower_result(done.result(), output_path))
+            except OSError as e:
+                follower.set_exception(e)
+
+        leader.add_done_callback(land)
+        return follower
+
+
+def export_batch(
+    image_paths: Sequence[str],
+    output_dir: str,
+    options: Optional[Dict[str, Any]] = None,
+    decode_workers: Optional[int] = None,
+    generate_workers: Optional[int] = None,
+    scheduler: Optional[PriorityScheduler] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Convert many images to MIDI files using separate decode/generate pools.
+
+    Decode workers fingerprint the images, then decode them and extract
+    the note slices into shared memory; only the shared note array
+    descriptor is sent on to a generation worker. Every block is freed as
+    soon as its stage finishes, and on any failure. With a seed, duplicate
+    images (same content; see coalescing_key) are converted once and the
+    file is copied to the duplicates' outputs.
+
+    Generation jobs are queued as BULK work on a priority scheduler. Pass
+    the scheduler of a resident pool to run the batch behind its
+    interactive exports; otherwise a private generation pool is used.
+
+    Args:
+        image_paths: Images to convert
+        output_dir: Directory for the generated .mid files
+        options: Export options (see make_export_options)
+        decode_workers: Processes decoding images (default: CPU count)
+        generate_workers: Processes generating MIDI (default: CPU count;
+            unused with a shared scheduler)
+        scheduler: Shared scheduler running the generation jobs
+
+    Returns:
+        One result dict per image, in input order, with "ok" and either
+        the output details or an "error" message
+    """
+    options = make_export_options(**(options or {}))
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Start the resource tracker before the pools exist so workers share it
+    # and blocks created by decode workers are tracked by a single owner
+    resource_tracker.ensure_running()
+    output_paths = batch_output_paths(image_paths, output_dir)
+
+    results: List[Dict[str, Any]] = [
+        {"image_path": path, "output_path": output_path, "ok": False}
+        for path, output_path in zip(image_paths, output_paths)
+    ]
+
+    # Index of the first identical request, for each duplicate
+    leader_of: Dict[int, int] = {}
+    followers = set()
+
+    with ExitStack() as stack:
+        registry = stack.enter_context(SharedArrayRegistry())
+        decode_pool = stack.enter_context(ProcessPoolExecutor(decode_workers))
+        if scheduler is None:
+            workers = generate_workers or os.cpu_count() or 1
+            generate_pool = stack.enter_context(ProcessPoolExecutor(workers))
+            # Nothing else runs on a private pool, so bulk may use all of it
+            scheduler = PriorityScheduler(
+                generate_pool, workers, {BULK: PriorityClass(0, workers)}
+            )
+        # Fingerprints are hashed in parallel; each image is decoded as
+        # soon as it is known not to duplicate an earlier one
+        key_futures = [
+            decode_pool.submit(coalescing_key, path, options) for path in image_paths
+        ]
+        first_with_key: Dict[str, int] = {}
+        decode_futures: Dict[Future, int] = {}
+        for index, (path, key_future) in enumerate(zip(image_paths, key_futures)):
+            key = key_future.result()
+            if key is not None:
+                leader_of[index] = first_with_key.setdefault(key, index)
+                if leader_of[index] != index:
+                    followers.add(index)
+                    continue
+            decode_futures[decode_pool.submit(_decode_job, path, options)] = index
+        generate_futures: Dict[Future, Tuple[int, SharedArrayRef]] = {}
+
+        for future in as_completed(decode_futures):
+            index = decode_futures[future]
+            try:
+                notes_ref, decode_seconds = future.result()
+            except Exception as e:
+                results[index]["error"] = f"decode failed: {e}"
+                continue
+
+            registry.adopt(notes_ref)
+            results[index]["decode_seconds"] = decode_seconds
+            generate_future = scheduler.submit(
+                BULK, _generate_job, notes_ref, output_paths[index], options
+            )
+            generate_futures[generate_future] = (index, notes_ref)
+
+        for future in as_completed(generate_futures):
+            index, notes_ref = generate_futures[future]
+            registry.release(notes_ref)
+            try:
+                results[index].update(future.result(), ok=True)
+            except Exception as e:
+                results[index]["error"] = f"generation failed: {e}"
+
+    for index in sorted(followers):
+        leader = results[leader_of[index]]
+        if not leader["ok"]:
+            results[index]["error"] = leader["error"]
+            continue
+        try:
+            results[index].update(
+                _follower_result(leader, output_paths[index]),
+                image_path=image_paths[index],
+            )
+        except OSError as e:
+            results[index]["error"] = f"copy failed: {e}"
+
+    return results
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Streaming note events for live playback.
+
+Instead of a finished file, iter_note_events yields timestamped notes as
+the arrangement is generated, a few slices at a time (see
+iter_track_chunks), so a player can start as soon as the first step is
+computed. Time to first note depends on the step size, not on the total
+duration. Events come out in start-time order across all tracks.
+
+The CLI's --stream mode writes the events to stdout as JSON lines: a
+"header" line describing the tracks, one "note" line per note and a
+final "end" line.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO
+
+import numpy as np
+
+from groove_bank import GrooveBank
+from mapping_curves import MappingCurve
+from midi_exporter import (
+    DEFAULT_TRACKS,
+    MAX_CHUNKED_DURATION,
+    iter_track_chunks,
+)
+from note_reduction import NoteReduction, reduce_roll
+
+# Slices generated per step; one keeps the time to first note minimal
+DEFAULT_STREAM_STEPS = 1
+
+
+class NoteEvent(NamedTuple):
+    """One generated note, with times in seconds from the start."""
+
+    track: int
+    pitch: int
+    velocity: int
+    start: float
+    end: float
+
+
+class TrackHeader(NamedTuple):
+    """Instrument settings of a streamed track."""
+
+    name: str
+    program: int
+    is_drum: bool
+
+
+def iter_note_events(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    tracks: Optional[List[str]] = None,
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    reduction: Optional[NoteReduction] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+    step_slices: int = DEFAULT_STREAM_STEPS,
+    on_tracks: Optional[Callable[[List[TrackHeader]], None]] = None,
+) -> Iterator[NoteEvent]:
+    """
+    Generate the arrangement incrementally and yield its notes.
+
+    Args:
+        notes: List of note dictionaries from extract_notes_from_image
+        duration: Total duration in seconds
+        tracks: Tracks to generate (default: DEFAULT_TRACKS)
+        ai_mode: Use the AI-enhanced generators
+        curves: Optional brightness mapping curves overriding the defaults
+        reduction: Optional note merging / density limit, applied per step
+        seed: Random seed for reproducible output
+        grooves: Optional groove bank for the percussion track
+        step_slices: Slices generated before their notes are yielded
+        on_tracks: Called once with the list of TrackHeader before the
+            first event
+
+    Yields:
+        NoteEvent per note, sorted by start time (then track, pitch)
+
+    Raises:
+        ValueError: If the settings are invalid
+    """
+    if tracks is None:
+        tracks = DEFAULT_TRACKS
+    if not notes:
+        raise ValueError("No notes provided")
+    if not (1 <= duration <= MAX_CHUNKED_DURATION):
+        raise ValueError(
+            f"Duration must be between 1-{MAX_CHUNKED_DURATION} seconds, got {duration}"
+        )
+    if not tracks:
+        raise ValueError("No tracks were requested")
+    if step_slices < 1:
+        raise ValueError(f"Step size must be at least 1 slice, got {step_slices}")
+
+    announced = False
+    for _, _, rolls in iter_track_chunks(
+        notes, duration, tracks, ai_mode, curves, step_slices, seed, grooves
+    ):
+        if reduction is not None:
+            rolls = [reduce_roll(roll, reduction) for roll in rolls]
+        if not announced:
+            if on_tracks is not None:
+                on_tracks(
+                    [
+                        TrackHeader(roll.name, roll.program, roll.is_drum)
+                        for roll in rolls
+                    ]
+                )
+            announced = True
+
+        starts = np.concatenate([roll.starts for roll in rolls])
+        ends = np.concatenate([roll.ends for roll in rolls])
+        pitches = np.concatenate([roll.pitches for roll in rolls])
+        velocities = np.concatenate([roll.velocities for roll in rolls])
+        track_ids = np.repeat(np.arange(len(rolls)), [len(roll) for roll in rolls])
+        order = np.lexsort((pitches, track_ids, starts))
+        for i in order.tolist():
+            yield NoteEvent(
+                int(track_ids[i]),
+                int(pitches[i]),
+                int(velocities[i]),
+                float(starts[i]),
+                float(ends[i]),
+            )
+
+
+def stream_json_lines(
+    notes: List[Dict[str, Any]],
+    output: TextIO,
+    bpm: int,
+    duration: float,
+    tracks: Optional[List[str]] = None,
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    reduction: Optional[NoteReduction] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+    step_slices: int = DEFAULT_STREAM_STEPS,
+) -> int:
+    """
+    Write the note events as JSON lines, flushing after every line.
+
+    Returns:
+        Number of note events written
+
+    Raises:
+        ValueError: If the settings are invalid
+    """
+
+    def write_line(record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    def write_header(headers: List[TrackHeader]) -> None:
+        write_line(
+            {
+                "type": "header",
+                "bpm": bpm,
+                "duration": duration,
+                "tracks": [header._asdict() for header in headers],
+            }
+        )
+
+    count = 0
+    for event in iter_note_events(
+        notes,
+        duration,
+        tracks,
+        ai_mode,
+        curves,
+        reduction,
+        seed,
+        grooves,
+        step_slices,
+        on_tracks=write_header,
+    ):
+        write_line({"type": "note", **event._asdict()})
+        count += 1
+    write_line({"type": "end", "notes": count})
+    return count
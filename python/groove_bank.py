@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Drum groove banks for the Hyper Vibe percussion generators.
+
+A groove is a small step matrix (drum voice x subdivision) covering one
+bar. A bank holds several grooves ordered by brightness band: each bar of
+the track picks its groove from the bar's mean brightness, and the whole
+track is then expanded to hit arrays with array operations, so the Python
+work is independent of the number of steps.
+
+Patterns are written one string per voice, one character per subdivision:
+
+    .  rest        x  hit        o  ghost note        X  accent
+
+Spaces and "|" are ignored, so "x... x... x... x..." is four quarter-note
+hits in a bar of 4 steps x 4 subdivisions. Custom banks are loaded from
+JSON files with the same layout as the GrooveBank arguments, e.g.
+
+    {
+      "thresholds": [128],
+      "voices": {"kick": {"pitch": 36, "curve": "kick_velocity"},
+                 "hat": {"pitch": 42, "velocity": 60, "length": 0.05}},
+      "grooves": {"sparse": {"kick": "x... .... x... ...."},
+                  "busy": {"kick": "x... .... x... ....",
+                           "hat": "x.x. x.x. x.x. x.x."}}
+    }
+"""
+
+import json
+import random
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mapping_curves import (
+    AI_VELOCITY_CURVE,
+    CURVE_RANGES,
+    KICK_VELOCITY_CURVE,
+    SNARE_VELOCITY_CURVE,
+    MappingCurve,
+    resolve_curves,
+)
+from random_source import resolve_rng
+
+# Velocity multiplier per pattern character
+ACCENTS: Dict[str, float] = {".": 0.0, "o": 0.6, "x": 1.0, "X": 1.2}
+
+# General MIDI hi-hat pitches (closed, pedal, open)
+HI_HAT_PITCHES = (42, 44, 46)
+
+HitColumns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class DrumVoice(NamedTuple):
+    """One row of a groove: which drum, how loud and how long."""
+
+    pitch: int
+    curve: Optional[str] = None  # Velocity from this brightness curve...
+    velocity: int = 100  # ...or this fixed velocity
+    length: float = 0.1  # Seconds
+
+
+def parse_pattern(text: str, cells: int) -> np.ndarray:
+    """
+    Parse a pattern string into per-subdivision accents.
+
+    Raises:
+        ValueError: On unknown characters or the wrong number of cells
+    """
+    symbols = [char for char in text if char not in " |"]
+    unknown = sorted(set(symbols) - set(ACCENTS))
+    if unknown:
+        raise ValueError(
+            f"Unknown pattern characters {unknown} in {text!r}. "
+            f"Use: {' '.join(ACCENTS)}"
+        )
+    if len(symbols) != cells:
+        raise ValueError(f"Pattern {text!r} has {len(symbols)} cells, expected {cells}")
+    return np.array([ACCENTS[char] for char in symbols], dtype=np.float64)
+
+
+class GrooveBank:
+    """Grooves selected per bar by brightness band, precompiled to hit tables."""
+
+    def __init__(
+        self,
+        voices: Dict[str, DrumVoice],
+        grooves: Dict[str, Dict[str, str]],
+        thresholds: Sequence[float],
+        steps_per_bar: int = 4,
+        subdivisions: int = 4,
+        humanize_timing: float = 0.0,
+        humanize_velocity: int = 0,
+        name: str = "custom",
+    ):
+        """
+        Args:
+            voices: Drum voices by name
+            grooves: Grooves from darkest to brightest band, each a mapping
+                of voice name to pattern string (missing voices are silent)
+            thresholds: Ascending mean-brightness band edges, one fewer than
+                grooves; a bar at or below thresholds[0] uses the first groove
+            steps_per_bar: Slices per bar
+            subdivisions: Pattern cells per slice
+            humanize_timing: Random timing offset, as a fraction of one
+                subdivision
+            humanize_velocity: Random velocity offset (+/-)
+            name: Bank name for display
+
+        Raises:
+            ValueError: If the bank is inconsistent
+        """
+        if not voices or not grooves:
+            raise ValueError("A groove bank needs at least one voice and one groove")
+        if steps_per_bar < 1 or subdivisions < 1:
+            raise ValueError(
+                f"Bars need at least one step and subdivision, got "
+                f"{steps_per_bar} x {subdivisions}"
+            )
+        if len(thresholds) != len(grooves) - 1:
+            raise ValueError(
+                f"{len(grooves)} grooves need {len(grooves) - 1} thresholds, "
+                f"got {len(thresholds)}"
+            )
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError(f"Thresholds must be ascending, got {list(thresholds)}")
+        if not 0.0 <= humanize_timing <= 1.0 or humanize_velocity < 0:
+            raise ValueError(
+                "Humanize timing must be 0-1 subdivisions and velocity non-negative"
+            )
+        for voice_name, voice in voices.items():
+            if not 0 <= voice.pitch <= 127:
+                raise ValueError(f"Voice {voice_name} has invalid pitch {voice.pitch}")
+            if voice.curve is not None and voice.curve not in CURVE_RANGES:
+                raise ValueError(
+                    f"Voice {voice_name} uses unknown curve '{voice.curve}'. "
+                    f"Expected one of: {', '.join(CURVE_RANGES)}"
+                )
+
+        self.name = name
+        self.voices = list(voices.values())
+        self.groove_names = list(grooves)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.steps_per_bar = steps_per_bar
+        self.subdivisions = subdivisions
+        self.humanize_timing = humanize_timing
+        self.humanize_velocity = humanize_velocity
+
+        # Accent matrix per groove: (grooves, voices, cells)
+        voice_index = {voice_name: i for i, voice_name in enumerate(voices)}
+        cells = steps_per_bar * subdivisions
+        self.patterns = np.zeros((len(grooves), len(voices), cells))
+        for groove, rows in enumerate(grooves.values()):
+            for voice_name, text in rows.items():
+                if voice_name not in voice_index:
+                    raise ValueError(f"Pattern for unknown voice '{voice_name}'")
+                self.patterns[groove, voice_index[voice_name]] = parse_pattern(
+                    text, cells
+                )
+
+        # Hit table per (groove, step in bar): voice, subdivision and accent
+        # of every non-rest cell, so expansion never looks at the rests
+        self._hits: Dict[Tuple[int, int], Tuple[np.ndarray, ...]] = {}
+        for groove in range(len(grooves)):
+            for position in range(steps_per_bar):
+                block = self.patterns[
+                    groove, :, position * subdivisions : (position + 1) * subdivisions
+                ]
+                voice_ids, subs = np.nonzero(block)
+                if len(voice_ids):
+                    self._hits[(groove, position)] = (
+                        voice_ids,
+                        subs,
+                        block[voice_ids, subs],
+                    )
+
+    def __len__(self) -> int:
+        return len(self.groove_names)
+
+    def __repr__(self) -> str:
+        return f"GrooveBank({self.name!r}, grooves={self.groove_names})"
+
+    def select(self, brightness: np.ndarray, step_offset: int = 0) -> np.ndarray:
+        """
+        Pick a groove for every bar from its mean brightness.
+
+        Bars are aligned to absolute step positions, so a chunk starting at
+        `step_offset` keeps the bar grid of the whole piece.
+
+        Returns:
+            Groove index per step
+        """
+        steps = step_offset + np.arange(len(brightness))
+        bars = steps // self.steps_per_bar
+        bars -= bars[0]
+        means = np.bincount(bars, weights=brightness) / np.bincount(bars)
+        per_bar = np.searchsorted(self.thresholds, means, side="left")
+        grooves: np.ndarray = per_bar[bars]
+        return grooves
+
+    def expand(
+        self,
+        brightness: np.ndarray,
+        step_duration: float,
+        curves: Optional[Dict[str, MappingCurve]] = None,
+        step_offset: int = 0,
+        rng: Optional[random.Random] = None,
+    ) -> HitColumns:
+        """
+        Expand the selected grooves into hits for every step.
+
+        Args:
+            brightness: Slice brightness values (0-255)
+            step_duration: Seconds per slice
+            curves: Optional mapping curves for the voice velocities
+            step_offset: Absolute position of the first slice (for chunks)
+            rng: Random generator seeding the humanization (default:
+                random_source.DEFAULT_RNG)
+
+        Returns:
+            (starts, ends, pitches, velocities) sorted by start time
+        """
+        brightness = np.asarray(brightness, dtype=np.float64)
+        if len(brightness) == 0:
+            return _empty_hits()
+
+        grooves = self.select(brightness, step_offset)
+        positions = (step_offset + np.arange(len(brightness))) % self.steps_per_bar
+
+        curves = resolve_curves(curves)
+        base = np.array(
+            [
+                (
+                    curves[voice.curve](brightness)
+                    if voice.curve is not None
+                    else np.full(len(brightness), voice.velocity)
+                )
+                for voice in self.voices
+            ],
+            dtype=np.float64,
+        )
+        pitches = np.array([voice.pitch for voice in self.voices])
+        lengths = np.array([voice.length for voice in self.voices])
+
+        # One gather per (groove, position) pair that has hits
+        key = grooves * self.steps_per_bar + positions
+        parts = []
+        for (groove, position), (voice_ids, subs, accents) in self._hits.items():
+            steps = np.flatnonzero(key == groove * self.steps_per_bar + position)
+            if len(steps):
+                parts.append(
+                    (
+                        np.repeat(steps, len(voice_ids)),
+                        np.tile(voice_ids, len(steps)),
+                        np.tile(subs, len(steps)),
+                        np.tile(accents, len(steps)),
+                    )
+                )
+        if not parts:
+            return _empty_hits()
+
+        steps, voice_ids, subs, accents = (np.concatenate(col) for col in zip(*parts))
+        starts = (steps + subs / self.subdivisions) * step_duration
+        velocities = base[voice_ids, steps] * accents
+
+        if self.humanize_timing or self.humanize_velocity:
+            jitter = np.random.default_rng(resolve_rng(rng).getrandbits(64))
+            starts += (
+                jitter.uniform(-1.0, 1.0, len(starts))
+                * self.humanize_timing
+                * step_duration
+                / self.subdivisions
+            )
+            starts = np.maximum(starts, 0.0)
+            velocities += jitter.integers(
+                -self.humanize_velocity, self.humanize_velocity + 1, len(starts)
+            )
+
+        order = np.argsort(starts, kind="stable")
+        voice_ids = voice_ids[order]
+        return (
+            starts[order],
+            starts[order] + lengths[voice_ids],
+            pitches[voice_ids],
+            np.clip(np.rint(velocities[order]), 1, 127).astype(np.int16),
+        )
+
+
+def subdivided_hits(
+    step_indices: np.ndarray,
+    hits_per_step: np.ndarray,
+    step_duration: float,
+    voice: DrumVoice,
+) -> HitColumns:
+    """
+    Evenly spaced hits of one fixed-velocity voice in the given steps.
+
+    Returns:
+        (starts, ends, pitches, velocities) sorted by start time
+    """
+    step_indices = np.asarray(step_indices)
+    counts = np.asarray(hits_per_step, dtype=np.int64)
+    steps = np.repeat(step_indices, counts)
+    hit = np.arange(len(steps)) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = (steps + hit / np.repeat(counts, counts)) * step_duration
+    return (
+        starts,
+        starts + voice.length,
+        np.full(len(starts), voice.pitch),
+        np.full(len(starts), voice.velocity, dtype=np.int16),
+    )
+
+
+def _empty_hits() -> HitColumns:
+    return (np.zeros(0), np.zeros(0), np.zeros(0, np.int64), np.zeros(0, np.int16))
+
+
+def groove_bank_from_dict(data: Dict[str, Any], name: str = "custom") -> GrooveBank:
+    """
+    Build a bank from its JSON form.
+
+    Raises:
+        ValueError: If required keys are missing or values are invalid
+    """
+    try:
+        voices = {
+            voice_name: DrumVoice(**spec) for voice_name, spec in data["voices"].items()
+        }
+        humanize = data.get("humanize", {})
+        return GrooveBank(
+            voices,
+            data["grooves"],
+            data.get("thresholds", []),
+            data.get("steps_per_bar", 4),
+            data.get("subdivisions", 4),
+            humanize.get("timing", 0.0),
+            humanize.get("velocity", 0),
+            data.get("name", name),
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid groove bank: {e}") from e
+
+
+def load_groove_bank(path: str) -> GrooveBank:
+    """
+    Load a custom groove bank from a JSON file.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid groove bank
+    """
+    with open(path, encoding="utf-8") as bank_file:
+        try:
+            data = json.load(bank_file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Groove bank {path} is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Groove bank {path} must be a JSON object")
+    return groove_bank_from_dict(data, name=path)
+
+
+# Standard percussion: kick on the downbeat, snare on beat 3, hi-hats
+# joining in (and then doubling up) as bars get brighter
+STANDARD_GROOVES = GrooveBank(
+    voices={
+        "kick": DrumVoice(36, curve=KICK_VELOCITY_CURVE),
+        "snare": DrumVoice(38, curve=SNARE_VELOCITY_CURVE),
+        "hat": DrumVoice(42, velocity=60, length=0.05),
+        "open_hat": DrumVoice(46, velocity=60, length=0.05),
+    },
+    grooves={
+        "sparse": {
+            "kick": "x... .... .... ....",
+            "snare": ".... .... x... ....",
+        },
+        "steady": {
+            "kick": "x... .... .... ....",
+            "snare": ".... .... x... ....",
+            "hat": "x... x... x... ....",
+            "open_hat": ".... .... .... x...",
+        },
+        "driving": {
+            "kick": "x... .... .... ....",
+            "snare": ".... .... x... ....",
+            "hat": "x.o. x.o. x.o. ..o.",
+            "open_hat": ".... .... .... x...",
+        },
+    },
+    thresholds=[128, 200],
+    name="standard",
+)
+
+# AI percussion: quarter, eighth and sixteenth-note figures per slice,
+# lightly humanized
+AI_GROOVES = GrooveBank(
+    voices={
+        "kick": DrumVoice(36, curve=AI_VELOCITY_CURVE),
+        "snare": DrumVoice(38, curve=AI_VELOCITY_CURVE),
+        "hat": DrumVoice(42, curve=AI_VELOCITY_CURVE),
+        "open_hat": DrumVoice(46, curve=AI_VELOCITY_CURVE),
+    },
+    grooves={
+        "quarters": {"kick": "x... x... x... x..."},
+        "eighths": {
+            "kick": "x... x... x... x...",
+            "snare": "..x. ..x. ..x. ..x.",
+        },
+        "sixteenths": {
+            "kick": "x... x... x... x...",
+            "snare": "..x. ..x. ..x. ..x.",
+            "hat": ".x.. .x.. .x.. .x..",
+            "open_hat": "...x ...x ...x ...x",
+        },
+    },
+    thresholds=[128, 200],
+    humanize_timing=0.1,
+    humanize_velocity=4,
+    name="ai",
+)
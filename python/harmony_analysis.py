@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Harmonic analysis shared by the Hyper Vibe track generators.
+
+One pass over the note slices produces a chord progression array with a
+root, chord quality, voicings and a bass tone per step. The melody,
+harmony and bass generators (standard and AI) all read from it instead
+of re-deriving chord tones from each note, so the parts stay consistent.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from mapping_curves import CHORD_PATTERN_CURVE, MappingCurve, resolve_curves
+
+# Interval patterns used by the AI harmony, indexed by chord quality
+CHORD_QUALITIES: List[str] = ["major", "minor", "dominant", "diminished", "seventh"]
+AI_CHORD_PATTERNS: List[List[int]] = [
+    [0, 2, 4],  # Major triad
+    [0, 3, 5],  # Minor triad
+    [0, 4, 7],  # Dominant 7th
+    [0, 3, 6],  # Diminished
+    [0, 2, 4, 6],  # 7th chord
+]
+MAX_VOICING = max(len(pattern) for pattern in AI_CHORD_PATTERNS)
+
+# Pitch ranges of the derived parts
+VOICING_RANGE = (36, 84)
+BASS_RANGE = (24, 48)
+
+PROGRESSION_DTYPE = np.dtype(
+    [
+        ("root", "<i2"),  # Slice pitch
+        ("quality", "<i1"),  # Index into CHORD_QUALITIES
+        ("triad", "<i2", (3,)),  # Root position triad (root, +4, +7)
+        ("voicing", "<i2", (MAX_VOICING,)),  # Quality voicing, -1 padded
+        ("bass", "<i2"),  # Root an octave down, in the bass range
+    ]
+)
+
+_PATTERN_TABLE = np.full((len(AI_CHORD_PATTERNS), MAX_VOICING), -1, dtype=np.int16)
+for _index, _pattern in enumerate(AI_CHORD_PATTERNS):
+    _PATTERN_TABLE[_index, : len(_pattern)] = _pattern
+
+
+def analyze_harmony(
+    notes: List[Dict[str, Any]], curves: Optional[Dict[str, MappingCurve]] = None
+) -> np.ndarray:
+    """
+    Derive the chord progression for a list of note slices.
+
+    Args:
+        notes: Note dictionaries from notes_from_pixels
+        curves: Optional mapping curves (the chord_pattern curve picks the
+            quality from slice brightness)
+
+    Returns:
+        PROGRESSION_DTYPE array with one entry per slice
+    """
+    progression = np.zeros(len(notes), dtype=PROGRESSION_DTYPE)
+    if not notes:
+        return progression
+
+    roots = np.array([note_data["midi"] for note_data in notes], dtype=np.int16)
+    brightness = np.array([note_data["brightness"] for note_data in notes], float)
+    qualities = np.minimum(
+        resolve_curves(curves)[CHORD_PATTERN_CURVE](brightness),
+        len(AI_CHORD_PATTERNS) - 1,
+    )
+
+    intervals = _PATTERN_TABLE[qualities]
+    voicing = np.clip(roots[:, None] + intervals, *VOICING_RANGE)
+
+    progression["root"] = roots
+    progression["quality"] = qualities
+    progression["triad"] = [note_data["chord"][:3] for note_data in notes]
+    progression["voicing"] = np.where(intervals >= 0, voicing, -1)
+    progression["bass"] = np.clip(roots - 12, *BASS_RANGE)
+    return progression
+
+
+def voicing_pitches(step: np.void) -> List[int]:
+    """The sounding pitches of one progression step's voicing."""
+    return [int(pitch) for pitch in step["voicing"] if pitch >= 0]
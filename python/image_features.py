@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Per-slice colour and texture features for the Hyper Vibe MIDI Exporter.
+
+All features are computed in one vectorized pass over the decoded RGB
+array: every per-pixel quantity is summed down the columns as soon as it
+is computed, and the column sums are then reduced to slices with a
+cumulative sum. Nothing is re-scanned per feature.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+HISTOGRAM_BINS = 4
+
+FEATURE_NAMES: List[str] = [
+    "red",  # Mean channel values, 0-255
+    "green",
+    "blue",
+    "hue",  # Chroma-weighted circular mean, degrees
+    "saturation",  # Mean HSV saturation, 0-1
+    "value",  # Mean HSV value, 0-255
+    "brightness",  # Mean luma over the whole slice, 0-255
+    "contrast",  # Luma standard deviation, 0-127.5
+    "edge_energy",  # Mean |dx| + |dy| of luma, 0-510
+]
+# Fraction of the slice's pixels in each luma histogram bin
+FEATURE_NAMES += [f"hist_{i}" for i in range(HISTOGRAM_BINS)]
+
+# Hue sector upper bounds (degrees) → General MIDI program
+_HUE_PROGRAMS = [
+    (30, 56),  # Red: Trumpet
+    (90, 11),  # Orange/yellow: Vibraphone
+    (150, 24),  # Green: Nylon guitar
+    (210, 73),  # Cyan: Flute
+    (270, 52),  # Blue: Choir
+    (330, 81),  # Magenta: Saw lead
+    (360, 56),  # Red again
+]
+
+
+def rgb_to_luma(rgb: np.ndarray) -> np.ndarray:
+    """Grayscale with the same fixed-point ITU-R 601 weights as PIL's "L"."""
+    channels = rgb.astype(np.uint32)
+    luma = (
+        channels[..., 0] * 19595
+        + channels[..., 1] * 38470
+        + channels[..., 2] * 7471
+        + 0x8000
+    ) >> 16
+    return luma.astype(np.uint8)
+
+
+def slice_ranges(width: int, num_slices: int) -> np.ndarray:
+    """Column [start, end) of every slice; each slice covers at least one column."""
+    starts = (np.arange(num_slices) * width) // num_slices
+    ends = np.maximum(starts + 1, (np.arange(1, num_slices + 1) * width) // num_slices)
+    return np.stack([starts, np.minimum(ends, width)], axis=1)
+
+
+def slice_features(rgb: np.ndarray, num_slices: int) -> np.ndarray:
+    """
+    Feature matrix with one row per vertical slice.
+
+    Args:
+        rgb: (height, width, 3) uint8 array
+        num_slices: Number of vertical slices
+
+    Returns:
+        float array of shape (num_slices, len(FEATURE_NAMES))
+    """
+    if rgb.ndim != 3 or rgb.shape[2] != 3:
+        raise ValueError(f"Expected an RGB array, got shape {rgb.shape}")
+
+    height, width = rgb.shape[:2]
+    red, green, blue = (rgb[..., c].astype(np.float32) for c in range(3))
+    luma = rgb_to_luma(rgb)
+    gray = luma.astype(np.float32)
+
+    # Per-column sums of every per-pixel quantity
+    high = np.maximum(np.maximum(red, green), blue)
+    chroma = high - np.minimum(np.minimum(red, green), blue)
+    saturation = np.divide(chroma, high, out=np.zeros_like(high), where=high > 0)
+    edges = np.zeros_like(gray)
+    edges[:, :-1] += np.abs(np.diff(gray, axis=1))
+    edges[:-1, :] += np.abs(np.diff(gray, axis=0))
+
+    column_sums = [
+        red.sum(axis=0, dtype=np.float64),
+        green.sum(axis=0, dtype=np.float64),
+        blue.sum(axis=0, dtype=np.float64),
+        # Hue as a chroma-weighted vector on the colour hexagon
+        (2 * red - green - blue).sum(axis=0, dtype=np.float64),
+        (np.sqrt(3) * (green - blue)).sum(axis=0, dtype=np.float64),
+        saturation.sum(axis=0, dtype=np.float64),
+        high.sum(axis=0, dtype=np.float64),
+        gray.sum(axis=0, dtype=np.float64),
+        np.square(gray).sum(axis=0, dtype=np.float64),
+        edges.sum(axis=0, dtype=np.float64),
+    ]
+    bins = (luma.astype(np.intp) * HISTOGRAM_BINS) >> 8
+    columns = np.broadcast_to(np.arange(width), (height, width))
+    histogram = np.bincount(
+        (bins * width + columns).ravel(), minlength=HISTOGRAM_BINS * width
+    ).reshape(HISTOGRAM_BINS, width)
+
+    # Reduce columns to slices through a running total
+    totals = np.vstack(column_sums + list(histogram.astype(np.float64)))
+    running = np.concatenate([np.zeros((len(totals), 1)), totals.cumsum(axis=1)], 1)
+    ranges = slice_ranges(width, num_slices)
+    sums = running[:, ranges[:, 1]] - running[:, ranges[:, 0]]
+    counts = height * (ranges[:, 1] - ranges[:, 0]).astype(np.float64)
+    means = sums / counts
+
+    hue = np.degrees(np.arctan2(sums[4], sums[3])) % 360
+    contrast = np.sqrt(np.maximum(0.0, means[8] - np.square(means[7])))
+    return np.column_stack(
+        [means[0], means[1], means[2], hue, means[5], means[6], means[7]]
+        + [contrast, means[9]]
+        + list(means[10:])
+    )
+
+
+def feature_dicts(features: np.ndarray) -> List[Dict[str, float]]:
+    """One {feature name: value} dict per slice."""
+    return [dict(zip(FEATURE_NAMES, row.tolist())) for row in features]
+
+
+def dominant_hue(hues: np.ndarray, saturations: np.ndarray) -> float:
+    """Saturation-weighted circular mean of hues in degrees."""
+    angles = np.radians(hues)
+    x = float(np.sum(saturations * np.cos(angles)))
+    y = float(np.sum(saturations * np.sin(angles)))
+    return float(np.degrees(np.arctan2(y, x)) % 360)
+
+
+def program_for_hue(hue: float, saturation: float) -> int:
+    """General MIDI program for a colour; greyish images stay on piano."""
+    if saturation < 0.15:
+        return 0
+    for upper, program in _HUE_PROGRAMS:
+        if hue < upper:
+            return program
+    return _HUE_PROGRAMS[-1][1]
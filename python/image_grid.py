@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Summed-area tables for 2D grid sonification.
+
+An image is turned into an integral image once; the mean brightness of
+any rectangular region can then be read with four lookups, so a grid of
+num_bands x num_slices cells (rows → register, columns → time) costs one
+pass over the pixels whatever the grid resolution.
+"""
+
+import numpy as np
+
+
+def integral_image(pixels: np.ndarray) -> np.ndarray:
+    """
+    Build a zero-padded summed-area table.
+
+    Args:
+        pixels: (height, width) grayscale or (height, width, channels) array
+
+    Returns:
+        int64 array of shape (height + 1, width + 1[, channels]) where
+        table[y, x] is the sum of pixels[:y, :x]
+    """
+    if pixels.ndim not in (2, 3):
+        raise ValueError(f"Expected a 2D or 3D pixel array, got {pixels.ndim}D")
+
+    height, width = pixels.shape[:2]
+    table = np.zeros((height + 1, width + 1) + pixels.shape[2:], dtype=np.int64)
+    np.cumsum(pixels, axis=0, dtype=np.int64, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+
+def grid_edges(length: int, cells: int) -> np.ndarray:
+    """
+    Split `length` pixels into `cells` contiguous, non-empty ranges.
+
+    Returns:
+        cells + 1 increasing integer edges from 0 to length
+    """
+    if not 1 <= cells <= length:
+        raise ValueError(f"Cannot split {length} pixels into {cells} cells")
+    return np.round(np.linspace(0, length, cells + 1)).astype(np.intp)
+
+
+def region_means(
+    table: np.ndarray, row_edges: np.ndarray, col_edges: np.ndarray
+) -> np.ndarray:
+    """
+    Mean of every grid cell from a summed-area table.
+
+    Args:
+        table: Output of integral_image
+        row_edges: Increasing row boundaries (len = rows + 1)
+        col_edges: Increasing column boundaries (len = columns + 1)
+
+    Returns:
+        float array of shape (rows, columns[, channels])
+    """
+    top, bottom = row_edges[:-1, None], row_edges[1:, None]
+    left, right = col_edges[None, :-1], col_edges[None, 1:]
+
+    sums = table[bottom, right] - table[top, right] - table[bottom, left]
+    sums = sums + table[top, left]
+    areas = (bottom - top) * (right - left)
+    if sums.ndim == 3:
+        areas = areas[..., None]
+    means: np.ndarray = sums / areas
+    return means
+
+
+def grid_means(pixels: np.ndarray, num_slices: int, num_bands: int) -> np.ndarray:
+    """
+    Mean brightness of a num_bands x num_slices grid over the image.
+
+    Row 0 is the top band of the image and column 0 the leftmost slice.
+    """
+    height, width = pixels.shape[:2]
+    return region_means(
+        integral_image(pixels),
+        grid_edges(height, num_bands),
+        grid_edges(width, num_slices),
+    )
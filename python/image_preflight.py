@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Header-only image preflight for the Hyper Vibe MIDI Exporter.
+
+Before an image is decoded, its header (size, mode, format) is
+read and the decode cost is estimated against a DecodeBudget. The plan
+picks the cheapest safe strategy:
+
+    full    - decode normally (small enough for the budget)
+    draft   - JPEG DCT scaling: decode directly at 1/2, 1/4 or 1/8 size
+    reduce  - JPEG 2000 resolution levels: decode a lower resolution
+    tiled   - uncompressed rows (BMP, PPM, raw TIFF) are streamed from
+              disk and subsampled without decoding the whole image
+    reject  - too large or a decompression bomb
+"""
+
+import math
+import warnings
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFile  # type: ignore
+
+from image_features import rgb_to_luma
+
+MB = 1024 * 1024
+
+# Bytes per pixel of the decoded image by mode
+_MODE_BYTES = {"1": 1, "L": 1, "P": 1, "LA": 2, "I;16": 2, "RGB": 3, "YCbCr": 3}
+
+# Raw row layouts that can be streamed: rawmode -> (bytes per pixel, R, G, B)
+_RAW_LAYOUTS = {
+    "L": (1, 0, 0, 0),
+    "RGB": (3, 0, 1, 2),
+    "BGR": (3, 2, 1, 0),
+    "RGBA": (4, 0, 1, 2),
+    "RGBX": (4, 0, 1, 2),
+    "BGRA": (4, 2, 1, 0),
+    "BGRX": (4, 2, 1, 0),
+}
+
+
+class DecodeBudget(NamedTuple):
+    """Limits used to choose a decode strategy."""
+
+    max_pixels: int = 24_000_000  # Above this, prefer a reduced decode
+    max_memory_bytes: int = 256 * MB  # Largest full decode allowed
+    reject_pixels: int = 250_000_000  # Never touch images larger than this
+
+
+DEFAULT_BUDGET = DecodeBudget()
+
+
+class PreflightPlan(NamedTuple):
+    """Header facts and the chosen decode strategy for one image."""
+
+    strategy: str
+    width: int
+    height: int
+    mode: str
+    format: str
+    estimated_bytes: int
+    scale: int  # Linear downscale the strategy applies while decoding
+    reason: str
+
+
+def estimate_decode_bytes(width: int, height: int, mode: str) -> int:
+    """Peak memory of a full decode plus the grayscale copy."""
+    return width * height * (_MODE_BYTES.get(mode, 4) + 1)
+
+
+def _raw_row_layout(
+    img: ImageFile.ImageFile,
+) -> Optional[List[Tuple[Tuple[int, ...], int, str, int, int]]]:
+    """
+    Row layout of an uncompressed image as (box, offset, rawmode, stride,
+    orientation) per tile, or None if rows cannot be read directly.
+    """
+    width = img.size[0]
+    layout = []
+    for tile in img.tile:
+        decoder, box, offset, args = tile[0], tile[1], tile[2], tile[3]
+        if decoder != "raw" or box is None or box[0] != 0 or box[2] != width:
+            return None
+        if args is None:
+            return None
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode = args[0]
+        stride = args[1] if len(args) > 1 else 0
+        orientation = args[2] if len(args) > 2 else 1
+        if rawmode not in _RAW_LAYOUTS:
+            return None
+        if not stride:
+            stride = width * _RAW_LAYOUTS[rawmode][0]
+        layout.append((tuple(box), offset, rawmode, stride, orientation))
+    return layout or None
+
+
+def preflight_image(
+    image_path: str, max_width: int = 1000, budget: DecodeBudget = DEFAULT_BUDGET
+) -> PreflightPlan:
+    """
+    Read only the image header and choose a decode strategy.
+
+    Args:
+        image_path: Path to the input image file
+        max_width: Width the image will be reduced to for analysis
+        budget: Pixel and memory limits
+
+    Returns:
+        The decode plan; strategy "reject" explains why in `reason`
+
+    Raises:
+        OSError: If the file is not a readable image
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            img = Image.open(image_path)
+    except Image.DecompressionBombError as e:
+        return PreflightPlan("reject", 0, 0, "", "", 0, 1, str(e))
+
+    with img:
+        width, height = img.size
+        mode = img.mode
+        fmt = img.format or ""
+        raw_layout = _raw_row_layout(img)
+
+    pixels = width * height
+    estimated = estimate_decode_bytes(width, height, mode)
+    scale = max(1, math.ceil(width / max_width))
+
+    def plan(strategy: str, plan_scale: int, reason: str) -> PreflightPlan:
+        return PreflightPlan(
+            strategy, width, height, mode, fmt, estimated, plan_scale, reason
+        )
+
+    if pixels > budget.reject_pixels:
+        return plan(
+            "reject",
+            1,
+            f"{pixels / 1e6:.0f} MP exceeds the {budget.reject_pixels / 1e6:.0f} MP limit",
+        )
+
+    if pixels <= budget.max_pixels and estimated <= budget.max_memory_bytes:
+        return plan("full", 1, "within budget")
+
+    if scale > 1 and fmt == "JPEG":
+        return plan("draft", min(8, 1 << int(math.log2(scale))), "JPEG draft decode")
+
+    if scale > 1 and fmt == "JPEG2000":
+        return plan("reduce", 1 << int(math.log2(scale)), "JPEG 2000 resolution level")
+
+    if raw_layout is not None:
+        return plan("tiled", scale, "uncompressed rows streamed from disk")
+
+    if estimated <= budget.max_memory_bytes:
+        return plan("full", 1, "over pixel budget but within memory budget")
+
+    return plan(
+        "reject",
+        1,
+        f"full decode needs ~{estimated / MB:.0f} MB "
+        f"(budget {budget.max_memory_bytes / MB:.0f} MB) and {fmt or 'this format'} "
+        "has no reduced decode",
+    )
+
+
+def _read_raw_rows(
+    image_path: str, plan: PreflightPlan, step: int, mode: str = "L"
+) -> np.ndarray:
+    """Stream every `step`-th row and column of an uncompressed image."""
+    with Image.open(image_path) as img:
+        layout = _raw_row_layout(img)
+    if layout is None:
+        raise ValueError("Image rows are not stored uncompressed")
+
+    rows = []
+    with open(image_path, "rb") as handle:
+        for y in range(0, plan.height, step):
+            for box, offset, rawmode, stride, orientation in layout:
+                if box[1] <= y < box[3]:
+                    break
+            else:
+                raise ValueError(f"Row {y} is not covered by the image tiles")
+
+            row_in_tile = y - box[1]
+            if orientation < 0:  # Bottom-up rows (BMP)
+                row_in_tile = box[3] - box[1] - 1 - row_in_tile
+            handle.seek(offset + row_in_tile * stride)
+
+            bpp, r, g, b = _RAW_LAYOUTS[rawmode]
+            data = np.frombuffer(handle.read(plan.width * bpp), dtype=np.uint8)
+            pixels = data.reshape(plan.width, bpp)[::step]
+            if bpp == 1:
+                gray = pixels[:, 0]
+                rows.append(gray if mode == "L" else np.repeat(pixels, 3, axis=1))
+            elif mode == "L":
+                rows.append(rgb_to_luma(pixels[:, [r, g, b]]))
+            else:
+                rows.append(pixels[:, [r, g, b]])
+
+    return np.stack(rows)
+
+
+def decode_pixels(
+    image_path: str, plan: PreflightPlan, max_width: int, mode: str = "L"
+) -> np.ndarray:
+    """
+    Decode an image to an array no wider than max_width using the plan.
+
+    Args:
+        image_path: Path to the input image file
+        plan: Result of preflight_image
+        max_width: Maximum width of the returned array
+        mode: "L" for a 2D grayscale array or "RGB" for (height, width, 3)
+
+    Raises:
+        ValueError: If the plan rejects the image
+    """
+    if mode not in ("L", "RGB"):
+        raise ValueError(f"Unsupported decode mode: {mode}")
+
+    if plan.strategy == "reject":
+        raise ValueError(f"Image rejected by preflight: {plan.reason}")
+
+    if plan.strategy == "tiled":
+        return _read_raw_rows(image_path, plan, plan.scale, mode)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        img = Image.open(image_path)
+
+    with img:
+        if plan.strategy == "draft":
+            img.draft(
+                mode,
+                (
+                    math.ceil(plan.width / plan.scale),
+                    math.ceil(plan.height / plan.scale),
+                ),
+            )
+        elif plan.strategy == "reduce":
+            # The JPEG 2000 plugin exposes resolution levels as `reduce`
+            setattr(img, "reduce", int(math.log2(plan.scale)))
+
+        img.load()
+        width, height = img.size
+        if width > max_width:
+            new_height = int(max_width * height / width)
+            print(f"Resizing large image: {width}x{height} → {max_width}x{new_height}")
+            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)  # type: ignore
+            print("Resize completed. Processing optimized for performance.")
+
+        return np.array(img.convert(mode))
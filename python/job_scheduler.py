@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Priority-aware scheduling of export jobs.
+
+Interactive exports (a user waiting in the web UI) and bulk jobs (batch
+re-renders) share one worker pool. The scheduler keeps its own queue per
+priority class and only hands a job to the pool when a worker is free,
+so the pool never holds a backlog that an interactive export would have
+to wait behind.
+
+Each class has a priority and a concurrency limit. By default bulk jobs
+may use every worker but one, which stays free for interactive exports.
+Waiting jobs age: every `aging_seconds` in the queue raise a job's
+priority by one level, so a long-waiting bulk job eventually outranks
+fresh interactive work and bulk never starves.
+"""
+
+import threading
+import time
+from collections import deque
+from functools import partial
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+DEFAULT_AGING_SECONDS = 5.0
+
+
+class PriorityClass(NamedTuple):
+    """Settings of one kind of job."""
+
+    priority: float  # Higher runs first
+    max_running: int  # Workers the class may occupy at once
+
+
+def default_classes(workers: int) -> Dict[str, PriorityClass]:
+    """Interactive exports first; bulk jobs leave one worker free."""
+    return {
+        INTERACTIVE: PriorityClass(10, workers),
+        BULK: PriorityClass(0, max(1, workers - 1)),
+    }
+
+
+class _Job(NamedTuple):
+    future: Future
+    fn: Callable[..., Any]
+    args: tuple
+    queued_at: float
+
+
+class PriorityScheduler:
+    """Dispatch jobs of several priority classes onto a worker pool."""
+
+    def __init__(
+        self,
+        pool: Executor,
+        workers: int,
+        classes: Optional[Dict[str, PriorityClass]] = None,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            pool: Executor running the jobs
+            workers: Jobs handed to the pool at once, normally its size
+            classes: Priority classes by name (default: default_classes)
+            aging_seconds: Queue time that raises a job's priority by one
+            clock: Time source (for tests)
+
+        Raises:
+            ValueError: If a limit or the aging time is not positive
+        """
+        self.classes = classes if classes is not None else default_classes(workers)
+        if workers < 1 or any(c.max_running < 1 for c in self.classes.values()):
+            raise ValueError("Worker counts and class limits must be at least 1")
+        if aging_seconds <= 0:
+            raise ValueError(f"Aging time must be positive, got {aging_seconds}")
+        self.pool = pool
+        self.workers = workers
+        self.aging_seconds = aging_seconds
+        self._clock = clock
+        self._lock = threading.Condition()
+        self._queues: Dict[str, Deque[_Job]] = {name: deque() for name in self.classes}
+        self._running: Dict[str, int] = {name: 0 for name in self.classes}
+        self.completed: Dict[str, int] = {name: 0 for name in self.classes}
+
+    def submit(self, job_class: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Queue fn(*args) in a priority class.
+
+        Returns:
+            Future of the job; cancelling it while queued drops the job
+
+        Raises:
+            ValueError: If the class is unknown
+        """
+        if job_class not in self.classes:
+            raise ValueError(
+                f"Unknown priority class {job_class!r} "
+                f"(expected one of {', '.join(self.classes)})"
+            )
+        future: Future = Future()
+        with self._lock:
+            self._queues[job_class].append(_Job(future, fn, args, self._clock()))
+            self._dispatch()
+        return future
+
+    def effective_priority(self, job_class: str, queued_at: float) -> float:
+        """A queued job's class priority plus its aging bonus."""
+        waited = self._clock() - queued_at
+        return self.classes[job_class].priority + waited / self.aging_seconds
+
+    def _next_class(self) -> Optional[str]:
+        """Class whose oldest job should run next, if any may run."""
+        best: Optional[str] = None
+        best_key = (0.0, 0.0)
+        for name, queue in self._queues.items():
+            while queue and queue[0].future.cancelled():
+                queue.popleft()
+            if not queue or self._running[name] >= self.classes[name].max_running:
+                continue
+            head = queue[0]
+            # Highest priority first, then longest waiting
+            key = (self.effective_priority(name, head.queued_at), -head.queued_at)
+            if best is None or key > best_key:
+                best, best_key = name, key
+        return best
+
+    def _dispatch(self) -> None:
+        """Hand queued jobs to free workers; called with the lock held."""
+        while sum(self._running.values()) < self.workers:
+            name = self._next_class()
+            if name is None:
+                return
+            job = self._queues[name].popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            self._running[name] += 1
+            try:
+                inner = self.pool.submit(job.fn, *job.args)
+            except Exception as e:  # E.g. the pool was shut down
+                self._running[name] -= 1
+                job.future.set_exception(e)
+                continue
+            inner.add_done_callback(partial(self._finish, name, job.future))
+
+    def _finish(self, name: str, outer: Future, done: Future) -> None:
+        """Pass a pool result on and start the next job."""
+        try:
+            outer.set_result(done.result())
+        except BaseException as e:  # Including a pool-side cancellation
+            outer.set_exception(e)
+        with self._lock:
+            self._running[name] -= 1
+            self.completed[name] += 1
+            self._dispatch()
+            self._lock.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Queued, running and completed jobs per class."""
+        with self._lock:
+            return {
+                name: {
+                    "queued": sum(
+                        not job.future.cancelled() for job in self._queues[name]
+                    ),
+                    "running": self._running[name],
+                    "completed": self.completed[name],
+                }
+                for name in self.classes
+            }
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no job is queued or running.
+
+        Returns:
+            False if the timeout passed first
+        """
+
+        def idle() -> bool:
+            return not any(self._running.values()) and not any(
+                not job.future.cancelled()
+                for queue in self._queues.values()
+                for job in queue
+            )
+
+        with self._lock:
+            return self._lock.wait_for(idle, timeout)
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the Hyper Vibe MIDI Exporter.
+
+Replays a synthetic mix of images and export options against the
+exporter at a fixed concurrency, optionally with Poisson arrivals at a
+target rate, and reports throughput, latency percentiles, CPU time and
+peak RSS per mode:
+
+    cli        one `midi_exporter.py` process per request, as server.js runs it
+    resident   a warm process pool calling batch_export.convert_image, as
+               the watch-folder mode runs it
+    scheduled  the same warm pool behind a job_scheduler.PriorityScheduler
+
+Latency is measured from a request's arrival to its completion, so queueing
+behind busy workers is included. A share of the requests is marked
+interactive and the rest bulk; their latency is also reported on its own,
+so the interactive latency of the resident mode (first come, first served)
+can be compared with the scheduled one.
+
+Command line:
+    python load_test.py --mode resident scheduled --requests 40 --concurrency 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image  # type: ignore
+
+from batch_export import convert_image, make_export_options
+from job_scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+try:
+    import resource
+
+    HAVE_RUSAGE = True
+except ImportError:  # Windows: peak RSS is not reported
+    HAVE_RUSAGE = False
+
+MODES = ("cli", "resident", "scheduled")
+DEFAULT_INTERACTIVE_SHARE = 0.25
+EXPORTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "midi_exporter.py")
+
+# Export option sets the synthetic traffic cycles through
+PARAMETER_MIX: List[Dict[str, Any]] = [
+    {},
+    {"ai_mode": True},
+    {"tracks": ["melody", "bass"], "bpm": 120},
+    {"duration": 16, "seed": 7},
+]
+
+
+class LoadReport(NamedTuple):
+    """Results of one load-test run."""
+
+    mode: str
+    requests: int
+    failures: int
+    wall_seconds: float
+    throughput: float  # Completed requests per second
+    p50: float  # Latency percentiles in seconds
+    p95: float
+    p99: float
+    cpu_seconds: Optional[float]
+    peak_rss_mb: Optional[float]
+    interactive_p50: float = float("nan")  # Latency of interactive requests
+    interactive_p95: float = float("nan")
+
+
+class _Request(NamedTuple):
+    image_path: str
+    output_path: str
+    options: Dict[str, Any]
+    job_class: str
+
+
+# (succeeded, cpu_seconds, peak_rss_bytes) of one request
+_Outcome = Tuple[bool, Optional[float], Optional[int]]
+
+
+def _rss_bytes(max_rss: int) -> int:
+    """ru_maxrss in bytes (reported in KB on Linux, bytes on macOS)."""
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def synthesize_images(
+    directory: str, count: int, seed: int = 0, max_width: int = 640
+) -> List[str]:
+    """
+    Write a varied set of color test images (gradients, noise and
+    stripes) at random sizes.
+
+    Returns:
+        Paths of the written PNG files
+    """
+    rng = np.random.default_rng(seed)
+    paths = []
+    for index in range(count):
+        width = int(rng.integers(64, max_width + 1))
+        height = int(rng.integers(32, max(33, width // 2)))
+        kind = index % 3
+        pixels: np.ndarray
+        if kind == 0:
+            ramp = np.linspace(0, 255, width)[None, :, None]
+            pixels = np.broadcast_to(
+                ramp * rng.uniform(0.3, 1.0, 3), (height, width, 3)
+            )
+        elif kind == 1:
+            pixels = rng.integers(0, 256, (height, width, 3))
+        else:
+            stripes = (np.arange(width) // int(rng.integers(4, 32))) % 2
+            pixels = np.broadcast_to(stripes[None, :, None] * 255.0, (height, width, 3))
+        path = os.path.join(directory, f"load_{index:03d}.png")
+        Image.fromarray(np.asarray(pixels, dtype=np.uint8), "RGB").save(path)
+        paths.append(path)
+    return paths
+
+
+def cli_arguments(options: Dict[str, Any]) -> List[str]:
+    """Command-line flags of midi_exporter.py for a set of export options."""
+    flags = {"bpm": "-b", "duration": "-d", "num_slices": "-s", "seed": "--seed"}
+    arguments = []
+    for key, value in options.items():
+        if key in flags:
+            if value is not None:
+                arguments += [flags[key], str(value)]
+        elif key == "tracks":
+            arguments += ["-t", *value]
+        elif key == "ai_mode":
+            arguments += ["--ai-mode"] if value else []
+        else:
+            raise ValueError(f"Option {key!r} has no command-line flag")
+    return arguments
+
+
+def arrival_offsets(requests: int, rate: Optional[float], seed: int = 0) -> np.ndarray:
+    """
+    Arrival times in seconds from the start of a run.
+
+    With a rate, inter-arrival gaps are exponential (Poisson traffic);
+    without one, every request arrives at once and concurrency alone
+    limits the load.
+    """
+    if rate is None:
+        return np.zeros(requests)
+    if rate <= 0:
+        raise ValueError(f"Arrival rate must be positive, got {rate}")
+    gaps = np.random.default_rng(seed).exponential(1.0 / rate, requests)
+    offsets: np.ndarray = np.cumsum(gaps) - gaps[0]
+    return offsets
+
+
+def job_classes(requests: int, interactive_share: float) -> List[str]:
+    """
+    Priority class of each request, with the interactive ones spread
+    evenly through the run.
+
+    Raises:
+        ValueError: If the share is outside [0, 1]
+    """
+    if not (0 <= interactive_share <= 1):
+        raise ValueError(
+            f"Interactive share must be between 0-1, got {interactive_share}"
+        )
+    counts = np.floor(np.arange(requests + 1) * interactive_share)
+    return [INTERACTIVE if step else BULK for step in np.diff(counts).tolist()]
+
+
+def summarize(
+    mode: str,
+    latencies: Sequence[float],
+    failures: int,
+    wall_seconds: float,
+    cpu_seconds: Optional[float],
+    peak_rss_bytes: Optional[int],
+    interactive_latencies: Sequence[float] = (),
+) -> LoadReport:
+    """Build a report from per-request latencies of successful requests."""
+    if latencies:
+        p50, p95, p99 = (float(p) for p in np.percentile(latencies, [50, 95, 99]))
+    else:
+        p50 = p95 = p99 = float("nan")
+    if interactive_latencies:
+        ui_p50, ui_p95 = (
+            float(p) for p in np.percentile(interactive_latencies, [50, 95])
+        )
+    else:
+        ui_p50 = ui_p95 = float("nan")
+    return LoadReport(
+        mode,
+        len(latencies) + failures,
+        failures,
+        wall_seconds,
+        len(latencies) / wall_seconds if wall_seconds > 0 else 0.0,
+        p50,
+        p95,
+        p99,
+        cpu_seconds,
+        peak_rss_bytes / (1024 * 1024) if peak_rss_bytes is not None else None,
+        ui_p50,
+        ui_p95,
+    )
+
+
+def _run_cli_request(request: _Request, extra_args: Sequence[str]) -> _Outcome:
+    """Spawn the exporter for one request and collect its rusage."""
+    command = [
+        sys.executable,
+        EXPORTER,
+        request.image_path,
+        "-o",
+        request.output_path,
+        *cli_arguments(request.options),
+        *extra_args,
+    ]
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    if not hasattr(os, "wait4"):
+        return process.wait() == 0, None, None
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return (
+        process.returncode == 0,
+        usage.ru_utime + usage.ru_stime,
+        _rss_bytes(usage.ru_maxrss),
+    )
+
+
+def _silence_worker() -> None:
+    """Pool initializer: drop the exporter's progress output."""
+    sys.stdout = open(os.devnull, "w")
+
+
+def _run_resident_request(request: _Request) -> _Outcome:
+    """Convert one request in a pool worker and report the worker's usage."""
+    cpu_started = time.process_time()
+    try:
+        convert_image(
+            request.image_path,
+            request.output_path,
+            make_export_options(**request.options),
+        )
+        succeeded = True
+    except (OSError, ValueError):
+        succeeded = False
+    cpu_seconds = time.process_time() - cpu_started
+    if not HAVE_RUSAGE:
+        return succeeded, cpu_seconds, None
+    return (
+        succeeded,
+        cpu_seconds,
+        _rss_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+    )
+
+
+def run_load(
+    mode: str,
+    image_paths: Sequence[str],
+    output_dir: str,
+    requests: int,
+    concurrency: int,
+    rate: Optional[float] = None,
+    parameter_mix: Sequence[Dict[str, Any]] = PARAMETER_MIX,
+    seed: int = 0,
+    cli_args: Sequence[str] = (),
+    interactive_share: float = DEFAULT_INTERACTIVE_SHARE,
+) -> LoadReport:
+    """
+    Replay synthetic traffic against one exporter mode.
+
+    Args:
+        mode: "cli", "resident" or "scheduled"
+        image_paths: Images the requests cycle through
+        output_dir: Directory for the generated files
+        requests: Number of requests to send
+        concurrency: Exporter processes running at once
+        rate: Mean arrival rate in requests per second (default: all at once)
+        parameter_mix: Export option sets the requests cycle through
+        seed: Seed for arrival times
+        cli_args: Extra midi_exporter.py flags for the cli mode, e.g.
+            ["--cache", DIR]
+        interactive_share: Fraction of the requests marked interactive;
+            the scheduled mode runs them ahead of the bulk ones
+
+    Returns:
+        The load report
+
+    Raises:
+        ValueError: If the mode, counts or rate are invalid
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    if requests < 1 or concurrency < 1 or not image_paths or not parameter_mix:
+        raise ValueError("Need at least one request, worker, image and parameter set")
+
+    os.makedirs(output_dir, exist_ok=True)
+    planned = [
+        _Request(
+            image_paths[index % len(image_paths)],
+            os.path.join(output_dir, f"{mode}_{index:05d}.mid"),
+            dict(parameter_mix[index % len(parameter_mix)]),
+            job_class,
+        )
+        for index, job_class in enumerate(job_classes(requests, interactive_share))
+    ]
+    offsets = arrival_offsets(requests, rate, seed)
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    interactive_latencies: List[float] = []
+    failures = 0
+    cpu_total: Optional[float] = 0.0
+    peak_rss: Optional[int] = None
+
+    def finish(request: _Request, arrived: float, future: "Future[_Outcome]") -> None:
+        nonlocal failures, cpu_total, peak_rss
+        latency = time.perf_counter() - arrived
+        try:
+            succeeded, cpu_seconds, rss = future.result()
+        except Exception:
+            succeeded, cpu_seconds, rss = False, None, None
+        with lock:
+            if succeeded:
+                latencies.append(latency)
+                if request.job_class == INTERACTIVE:
+                    interactive_latencies.append(latency)
+            else:
+                failures += 1
+            if cpu_seconds is None or cpu_total is None:
+                cpu_total = None
+            else:
+                cpu_total += cpu_seconds
+            if rss is not None:
+                peak_rss = max(rss, peak_rss or 0)
+
+    pool = (
+        ThreadPoolExecutor(concurrency)
+        if mode == "cli"
+        else ProcessPoolExecutor(concurrency, initializer=_silence_worker)
+    )
+    scheduler = PriorityScheduler(pool, concurrency) if mode == "scheduled" else None
+    with pool:
+        if mode != "cli":
+            # Warm the workers up so process start-up is not measured
+            list(pool.map(time.sleep, [0.0] * concurrency))
+        started = time.perf_counter()
+        for request, offset in zip(planned, offsets):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            arrived = started + offset
+            if mode == "cli":
+                future = pool.submit(_run_cli_request, request, cli_args)
+            elif scheduler is not None:
+                future = scheduler.submit(
+                    request.job_class, _run_resident_request, request
+                )
+            else:
+                future = pool.submit(_run_resident_request, request)
+            future.add_done_callback(partial(finish, request, arrived))
+        if scheduler is not None:
+            # Queued jobs reach the pool only as workers free up
+            scheduler.join()
+    wall_seconds = time.perf_counter() - started
+
+    return summarize(
+        mode,
+        latencies,
+        failures,
+        wall_seconds,
+        cpu_total,
+        peak_rss,
+        interactive_latencies,
+    )
+
+
+def format_report(report: LoadReport) -> str:
+    """One human-readable line per report."""
+    cpu = f"{report.cpu_seconds:.2f}s" if report.cpu_seconds is not None else "n/a"
+    rss = f"{report.peak_rss_mb:.0f}MB" if report.peak_rss_mb is not None else "n/a"
+    return (
+        f"{report.mode:>8}: {report.requests} requests, {report.failures} failed, "
+        f"{report.throughput:.2f} req/s, p50 {report.p50 * 1000:.0f}ms, "
+        f"p95 {report.p95 * 1000:.0f}ms, p99 {report.p99 * 1000:.0f}ms, "
+        f"CPU {cpu}, peak RSS {rss}, "
+        f"interactive p95 {report.interactive_p95 * 1000:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay concurrent export traffic against the exporter"
+    )
+    parser.add_argument(
+        "--mode", nargs="+", choices=MODES, default=list(MODES), help="Modes to test"
+    )
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Mean arrival rate in requests/s (default: send everything at once)",
+    )
+    parser.add_argument(
+        "--images", type=int, default=8, help="Number of synthetic images"
+    )
+    parser.add_argument(
+        "--image",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Use this image instead of synthetic ones (repeatable)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--interactive-share",
+        type=float,
+        default=DEFAULT_INTERACTIVE_SHARE,
+        help=(
+            "Fraction of requests marked interactive "
+            f"(default: {DEFAULT_INTERACTIVE_SHARE})"
+        ),
+    )
+    parser.add_argument(
+        "--cli-arg",
+        action="append",
+        default=[],
+        metavar="ARG",
+        help="Extra midi_exporter.py argument for the cli mode (repeatable)",
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write the reports as JSON")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="hyper_vibe_load_")
+    try:
+        images = args.image or synthesize_images(work_dir, args.images, args.seed)
+        reports = []
+        for load_mode in args.mode:
+            print(f"🚦 Running {args.requests} {load_mode} requests...")
+            report = run_load(
+                load_mode,
+                images,
+                os.path.join(work_dir, load_mode),
+                args.requests,
+                args.concurrency,
+                args.rate,
+                seed=args.seed,
+                cli_args=args.cli_arg,
+                interactive_share=args.interactive_share,
+            )
+            print(format_report(report))
+            reports.append(report._asdict())
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as report_file:
+                json.dump(reports, report_file, indent=1)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
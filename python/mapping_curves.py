@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Brightness mapping curves for the Hyper Vibe MIDI Exporter.
+
+Every brightness -> music mapping (pitch, drum velocities, chord pattern,
+and the colour/texture feature mappings, rescaled to 0-255) is compiled once into a 256-entry lookup table, so a whole brightness
+array is mapped with a single indexing operation.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Names of the mappings used by the exporter
+PITCH_CURVE = "pitch"
+KICK_VELOCITY_CURVE = "kick_velocity"
+SNARE_VELOCITY_CURVE = "snare_velocity"
+AI_VELOCITY_CURVE = "ai_velocity"
+CHORD_PATTERN_CURVE = "chord_pattern"
+CONTRAST_VELOCITY_CURVE = "contrast_velocity"
+EDGE_DENSITY_CURVE = "edge_density"
+
+# Output range of each mapping (used by the linear/exp/gamma curve kinds)
+CURVE_RANGES: Dict[str, Tuple[int, int]] = {
+    PITCH_CURVE: (48, 84),  # C3 to C6
+    KICK_VELOCITY_CURVE: (80, 120),
+    SNARE_VELOCITY_CURVE: (70, 100),
+    AI_VELOCITY_CURVE: (60, 110),
+    CHORD_PATTERN_CURVE: (0, 4),  # Index into the AI chord patterns
+    CONTRAST_VELOCITY_CURVE: (70, 120),  # Melody velocity from slice contrast
+    EDGE_DENSITY_CURVE: (1, 4),  # Hi-hat hits per step from edge energy
+}
+
+# Hard limits of the mapped values; MIDI pitches and velocities are 0-127.
+# Mappings not listed keep the lookup table's 0-255.
+CURVE_LIMITS: Dict[str, Tuple[int, int]] = {
+    PITCH_CURVE: (0, 127),
+    KICK_VELOCITY_CURVE: (0, 127),
+    SNARE_VELOCITY_CURVE: (0, 127),
+    AI_VELOCITY_CURVE: (0, 127),
+    CONTRAST_VELOCITY_CURVE: (0, 127),
+}
+
+CURVE_KINDS = ("linear", "exp", "gamma", "piecewise", "table")
+
+# Brightness values covered by every lookup table
+_INPUTS = np.arange(256, dtype=np.float64)
+
+
+class MappingCurve:
+    """A brightness mapping precompiled into a 256-entry lookup table."""
+
+    def __init__(
+        self,
+        table: Union[Sequence[float], np.ndarray],
+        name: str = "custom",
+        limits: Tuple[int, int] = (0, 255),
+    ):
+        """
+        Args:
+            table: 256 output values, one per brightness level
+            name: Description shown in repr
+            limits: (low, high) the values are clipped to
+
+        Raises:
+            ValueError: If the table or limits are invalid
+        """
+        low, high = limits
+        if not (0 <= low <= high <= 255):
+            raise ValueError(f"Curve limits must lie within 0-255, got {limits}")
+        values = np.asarray(table, dtype=np.float64)
+        if values.shape != (256,):
+            raise ValueError(
+                f"Mapping table must have 256 entries, got shape {values.shape}"
+            )
+        if not np.all(np.isfinite(values)):
+            raise ValueError("Mapping table contains non-finite values")
+
+        self.name = name
+        self.table = np.clip(np.trunc(values), low, high).astype(np.uint8)
+
+    def limited(self, low: int, high: int) -> "MappingCurve":
+        """A copy with its values clipped to [low, high]."""
+        return MappingCurve(self.table, self.name, (low, high))
+
+    def apply(
+        self, brightness: Union[float, Sequence[float], np.ndarray]
+    ) -> np.ndarray:
+        """Map brightness values (0-255) through the lookup table."""
+        indices = np.clip(np.rint(np.asarray(brightness, dtype=np.float64)), 0, 255)
+        return self.table[indices.astype(np.intp)]
+
+    __call__ = apply
+
+    def __repr__(self) -> str:
+        return (
+            f"MappingCurve({self.name!r}, "
+            f"min={int(self.table.min())}, max={int(self.table.max())})"
+        )
+
+
+def _scale(shape: np.ndarray, out_min: float, out_max: float) -> np.ndarray:
+    """Scale a normalized 0-1 curve shape to the output range."""
+    return out_min + (out_max - out_min) * shape
+
+
+def linear_curve(out_min: float, out_max: float) -> MappingCurve:
+    """Straight-line mapping, equivalent to np.interp over [0, 255]."""
+    return MappingCurve(_scale(_INPUTS / 255.0, out_min, out_max), "linear")
+
+
+def exponential_curve(out_min: float, out_max: float, k: float) -> MappingCurve:
+    """
+    Exponential mapping; positive k favors bright values, negative k dark ones.
+    """
+    t = _INPUTS / 255.0
+    if abs(k) < 1e-9:
+        return MappingCurve(_scale(t, out_min, out_max), f"exp:{k:g}")
+    shape = np.expm1(k * t) / np.expm1(k)
+    return MappingCurve(_scale(shape, out_min, out_max), f"exp:{k:g}")
+
+
+def gamma_curve(out_min: float, out_max: float, gamma: float) -> MappingCurve:
+    """Power-law mapping (gamma > 1 darkens, gamma < 1 brightens)."""
+    if gamma <= 0:
+        raise ValueError(f"Gamma must be positive, got {gamma}")
+    shape = (_INPUTS / 255.0) ** gamma
+    return MappingCurve(_scale(shape, out_min, out_max), f"gamma:{gamma:g}")
+
+
+def piecewise_curve(points: Sequence[Tuple[float, float]]) -> MappingCurve:
+    """
+    Piecewise-linear mapping through (brightness, value) control points.
+    """
+    if len(points) < 2:
+        raise ValueError("Piecewise curve needs at least 2 control points")
+
+    ordered = sorted(points)
+    xs = [p[0] for p in ordered]
+    ys = [p[1] for p in ordered]
+    if len(set(xs)) != len(xs):
+        raise ValueError("Piecewise control points must have distinct brightness")
+    if xs[0] < 0 or xs[-1] > 255:
+        raise ValueError("Piecewise control points must lie within 0-255")
+
+    return MappingCurve(np.interp(_INPUTS, xs, ys), "piecewise")
+
+
+def table_curve(values: Sequence[float]) -> MappingCurve:
+    """
+    User-supplied table; tables shorter than 256 entries are resampled.
+    """
+    if len(values) < 2:
+        raise ValueError("Mapping table needs at least 2 values")
+    source = np.linspace(0, 255, len(values))
+    return MappingCurve(np.interp(_INPUTS, source, values), "table")
+
+
+def load_table_file(path: str) -> List[float]:
+    """Read a mapping table of comma or whitespace separated numbers."""
+    with open(path, "r", encoding="utf-8") as handle:
+        text = handle.read().replace(",", " ")
+    try:
+        return [float(token) for token in text.split()]
+    except ValueError as e:
+        raise ValueError(f"Invalid mapping table file {path}: {e}") from e
+
+
+def parse_curve_spec(spec: str, out_min: float, out_max: float) -> MappingCurve:
+    """
+    Build a curve from a command line spec.
+
+    Supported specs:
+        linear
+        exp:K                  e.g. exp:3
+        gamma:G                e.g. gamma:2.2
+        piecewise:X:Y,X:Y,...  e.g. piecewise:0:48,128:72,255:84
+        table:PATH             file with up to 256 values
+
+    Args:
+        spec: Curve specification string
+        out_min: Output value for brightness 0 (linear/exp/gamma only)
+        out_max: Output value for brightness 255 (linear/exp/gamma only)
+
+    Raises:
+        ValueError: If the spec cannot be parsed
+    """
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+
+    try:
+        if kind == "linear":
+            return linear_curve(out_min, out_max)
+        if kind == "exp":
+            return exponential_curve(out_min, out_max, float(arg))
+        if kind == "gamma":
+            return gamma_curve(out_min, out_max, float(arg))
+        if kind == "piecewise":
+            points = []
+            for pair in arg.split(","):
+                x, y = pair.split(":")
+                points.append((float(x), float(y)))
+            return piecewise_curve(points)
+        if kind == "table":
+            return table_curve(load_table_file(arg))
+    except ValueError as e:
+        raise ValueError(f"Invalid curve spec '{spec}': {e}") from e
+
+    raise ValueError(
+        f"Unknown curve kind '{kind}'. Expected one of: {', '.join(CURVE_KINDS)}"
+    )
+
+
+def parse_curve_assignment(assignment: str) -> Tuple[str, MappingCurve]:
+    """Parse a NAME=SPEC command line assignment, e.g. pitch=gamma:2.2."""
+    name, sep, spec = assignment.partition("=")
+    name = name.strip()
+    if not sep or name not in CURVE_RANGES:
+        raise ValueError(
+            f"Invalid curve assignment '{assignment}'. "
+            f"Use NAME=SPEC with NAME in: {', '.join(CURVE_RANGES)}"
+        )
+    out_min, out_max = CURVE_RANGES[name]
+    low, high = CURVE_LIMITS.get(name, (0, 255))
+    return name, parse_curve_spec(spec, out_min, out_max).limited(low, high)
+
+
+def default_curves() -> Dict[str, MappingCurve]:
+    """The exporter's built-in linear mappings."""
+    return {name: linear_curve(lo, hi) for name, (lo, hi) in CURVE_RANGES.items()}
+
+
+_DEFAULT_CURVES = default_curves()
+
+
+def resolve_curves(
+    curves: Optional[Dict[str, MappingCurve]] = None,
+) -> Dict[str, MappingCurve]:
+    """Merge user-supplied curves over the defaults."""
+    if not curves:
+        return _DEFAULT_CURVES
+    return {**_DEFAULT_CURVES, **curves}
@@ -6,116 +6,283 @@ percussion, and bass.
 """
 
 import argparse
+import json
+import math
 import sys
 import os
 import random
-from typing import List, Dict, Any, Union
+import sqlite3
+import time
+from functools import partial
+from typing import List, Dict, Any, Union, Optional, Iterator, Tuple
 from PIL import Image  # type: ignore
 import pretty_midi  # type: ignore
 import numpy as np
 
+from image_preflight import (
+    MB,
+    DEFAULT_BUDGET,
+    DecodeBudget,
+    decode_pixels,
+    preflight_image,
+)
+from image_features import (
+    FEATURE_NAMES,
+    dominant_hue,
+    feature_dicts,
+    program_for_hue,
+    rgb_to_luma,
+    slice_features,
+)
+from groove_bank import (
+    AI_GROOVES,
+    HI_HAT_PITCHES,
+    STANDARD_GROOVES,
+    DrumVoice,
+    GrooveBank,
+    load_groove_bank,
+    subdivided_hits,
+)
+from harmony_analysis import analyze_harmony
+from image_grid import grid_means
+from note_events import write_note_events
+from note_reduction import NoteReduction, reduce_roll
+from piano_roll import (
+    PianoRoll,
+    midi_from_rolls,
+    render_piano_roll_png,
+    rolls_from_midi,
+    write_rolls_smf,
+)
+from perceptual_hash import (
+    DEFAULT_MAX_DISTANCE,
+    MAX_DISTANCE,
+    ExtractionCache,
+    extraction_cache_path,
+    image_signature,
+)
+from preview_synth import render_preview_wav
+from random_source import DEFAULT_RNG, resolve_rng
+from result_cache import (
+    DEFAULT_MAX_BYTES,
+    ResultCache,
+    options_fingerprint,
+    request_fingerprint,
+)
+from sequential_kernels import KERNEL_BACKENDS, melody_walk, set_backend
+from smf_writer import DRUM_CHANNEL, StreamingMidiWriter
+from stem_export import stem_bundle_path, write_stems
+from task_graph import TaskGraph
+from tempo_map import TempoMap, brightness_tempo_map, slice_tempo_map
+from midi_index import MidiIndex, TrackInfo, roll_track_infos, track_infos
+from mapping_curves import (
+    AI_VELOCITY_CURVE,
+    CONTRAST_VELOCITY_CURVE,
+    EDGE_DENSITY_CURVE,
+    PITCH_CURVE,
+    MappingCurve,
+    parse_curve_assignment,
+    resolve_curves,
+)
+
 # Constants
 DEFAULT_OUTPUT_FILE = "output.mid"
-
-
-def extract_notes_from_image(
-    image_path: str, num_slices: int = 16, max_width: int = 1000
-) -> List[Dict[str, Any]]:
+DEFAULT_TRACKS: List[str] = ["melody", "harmony", "percussion", "bass"]
+TRACK_TYPES: List[str] = DEFAULT_TRACKS + ["grid"]
+DEFAULT_GRID_BANDS = 4
+MAX_DURATION = 300
+MAX_CHUNKED_DURATION = 4 * 60 * 60
+DEFAULT_CHUNK_STEPS = 64
+
+# Coarse first pass of --progressive: tiny decode, few slices
+PREVIEW_MAX_WIDTH = 96
+PREVIEW_SLICES = 8
+
+# Bump whenever the same request starts producing different output, so
+# stale result-cache entries are no longer served
+GENERATOR_VERSION = 2
+
+# Hi-hat used for the edge-density subdivisions of busy slices
+BUSY_HAT = DrumVoice(42, velocity=60, length=0.05)
+
+
+def decode_image_pixels(
+    image_path: str,
+    max_width: int = 1000,
+    budget: Optional[DecodeBudget] = None,
+    mode: str = "L",
+) -> np.ndarray:
     """
-    Extract MIDI notes from image brightness with enhanced error handling.
+    Load an image and decode it to a grayscale (or RGB) pixel array.
+
+    The header is checked first (see image_preflight) so oversized images
+    are rejected or decoded at reduced size instead of in full.
 
     Args:
         image_path: Path to the input image file
-        num_slices: Number of vertical slices to analyze (default: 16)
         max_width: Maximum width to resize large images for performance
+        budget: Pixel/memory limits for decoding (default: DEFAULT_BUDGET)
+        mode: "L" for brightness only, "RGB" to keep colour for features
 
     Returns:
-        List of note dictionaries with MIDI data
+        uint8 array of brightness values (height x width), or
+        (height x width x 3) in RGB mode
 
     Raises:
         FileNotFoundError: If image file doesn't exist
         ValueError: If image cannot be processed
         OSError: If image format is unsupported
     """
-    try:
-        # Validate input file
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-
-        if not os.path.isfile(image_path):
-            raise ValueError(f"Path is not a file: {image_path}")
-
-        # Check file extension
-        valid_extensions = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".gif"}
-        file_ext = os.path.splitext(image_path)[1].lower()
-        if file_ext not in valid_extensions:
-            print(
-                f"Warning: Unsupported file extension {file_ext}. "
-                "Attempting to load anyway..."
-            )
+    # Validate input file
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image file not found: {image_path}")
+
+    if not os.path.isfile(image_path):
+        raise ValueError(f"Path is not a file: {image_path}")
+
+    # Check file extension
+    valid_extensions = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".gif"}
+    file_ext = os.path.splitext(image_path)[1].lower()
+    if file_ext not in valid_extensions:
+        print(
+            f"Warning: Unsupported file extension {file_ext}. "
+            "Attempting to load anyway..."
+        )
 
-        # Load and process image
-        print(f"Loading image: {image_path}")
-        img = Image.open(image_path)
+    # Read the header and choose how to decode
+    print(f"Loading image: {image_path}")
+    plan = preflight_image(image_path, max_width, budget or DEFAULT_BUDGET)
+    print(f"Original dimensions: {plan.width}x{plan.height}")
+    if plan.strategy != "full":
+        print(
+            f"🛫 Preflight: {plan.format} {plan.mode}, "
+            f"~{plan.estimated_bytes / MB:.0f} MB to decode → "
+            f"{plan.strategy} ({plan.reason})"
+        )
 
-        # Get original dimensions
-        orig_width, orig_height = img.size
-        print(f"Original dimensions: {orig_width}x{orig_height}")
+    # Decode, reduced to max_width for performance
+    pixels = decode_pixels(image_path, plan, max_width, mode)
 
-        # Performance optimization: resize large images
-        if orig_width > max_width:
-            aspect_ratio = orig_height / orig_width
-            new_width = max_width
-            new_height = int(new_width * aspect_ratio)
+    # Validate image size
+    height, width = pixels.shape[:2]
+    if width < 10 or height < 10:
+        raise ValueError(f"Image too small: {width}x{height}. Minimum size: 10x10")
+
+    return pixels
 
-            print(
-                f"Resizing large image: {orig_width}x{orig_height} → "
-                f"{new_width}x{new_height}"
-            )
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)  # type: ignore
-            print("Resize completed. Processing optimized for performance.")
 
-        # Convert to grayscale for brightness analysis
-        img_gray = img.convert("L")
+def notes_from_pixels(
+    pixels: np.ndarray,
+    num_slices: int = 16,
+    pitch_curve: Optional[MappingCurve] = None,
+    num_bands: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Turn a grayscale pixel array into note slices.
 
-        # Get final dimensions
-        width, height = img_gray.size
+    An RGB array additionally yields a "features" dict per note (colour,
+    contrast, edge energy and histogram; see image_features), computed in
+    the same pass as the brightness.
 
-        # Validate image size
-        if width < 10 or height < 10:
-            raise ValueError(f"Image too small: {width}x{height}. Minimum size: 10x10")
+    Args:
+        pixels: 2D brightness or (height, width, 3) RGB array from
+            decode_image_pixels
+        num_slices: Number of vertical slices to analyze (default: 16)
+        pitch_curve: Brightness to MIDI pitch mapping (default: linear C3-C6)
+        num_bands: Horizontal bands per slice for the grid track; when set,
+            each note gets a "bands" list of mean brightness, top to bottom
 
-        # Convert to numpy array for efficient processing
-        pixels = np.array(img_gray)
+    Returns:
+        List of note dictionaries with MIDI data
 
-        notes = []
-        for i in range(num_slices):
-            # Calculate column position
-            x = int(np.interp(i, [0, num_slices - 1], [0, width - 1]))
+    Raises:
+        ValueError: If no notes can be extracted
+    """
+    features = None
+    if pixels.ndim == 3:
+        features = feature_dicts(slice_features(pixels, num_slices))
+        pixels = rgb_to_luma(pixels)
 
-            # Extract column and calculate average brightness
-            column = pixels[:, x]
-            avg_brightness = np.mean(column)
-            # Convert brightness to MIDI note (C3 to C6 range)
-            midi_note = int(np.interp(avg_brightness, [0, 255], [48, 84]))
+    width = pixels.shape[1]
 
-            # Create chord (root, major third, perfect fifth)
-            chord = [midi_note, midi_note + 4, midi_note + 7]
+    if pitch_curve is None:
+        pitch_curve = resolve_curves()[PITCH_CURVE]
 
-            # Ensure notes are within valid MIDI range
-            chord = [max(0, min(127, note)) for note in chord]
+    # Sample one column per slice and average its brightness
+    columns = np.linspace(0, width - 1, num_slices).astype(int)
+    slice_brightness = pixels[:, columns].mean(axis=0)
 
-            notes.append(
-                {
-                    "midi": midi_note,
-                    "chord": chord,
-                    "position": i / num_slices,
-                    "brightness": avg_brightness,
-                }
-            )
+    # Convert brightness to MIDI notes (C3 to C6 range by default)
+    midi_notes = pitch_curve(slice_brightness)
+
+    # Region means for the rows x columns grid from one summed-area table
+    band_brightness = (
+        grid_means(pixels, num_slices, num_bands) if num_bands > 0 else None
+    )
+
+    notes = []
+    for i in range(num_slices):
+        avg_brightness = slice_brightness[i]
+        midi_note = int(midi_notes[i])
+
+        # Create chord (root, major third, perfect fifth)
+        chord = [midi_note, midi_note + 4, midi_note + 7]
+
+        # Ensure notes are within valid MIDI range
+        chord = [max(0, min(127, note)) for note in chord]
 
-        if len(notes) == 0:
-            raise ValueError("No notes could be extracted from the image")
+        note_data = {
+            "midi": midi_note,
+            "chord": chord,
+            "position": i / num_slices,
+            "brightness": avg_brightness,
+        }
+        if band_brightness is not None:
+            note_data["bands"] = band_brightness[:, i].tolist()
+        if features is not None:
+            note_data["features"] = features[i]
+        notes.append(note_data)
+
+    if len(notes) == 0:
+        raise ValueError("No notes could be extracted from the image")
+
+    return notes
+
+
+def extract_notes_from_image(
+    image_path: str,
+    num_slices: int = 16,
+    max_width: int = 1000,
+    pitch_curve: Optional[MappingCurve] = None,
+    budget: Optional[DecodeBudget] = None,
+    num_bands: int = 0,
+    features: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Extract MIDI notes from image brightness with enhanced error handling.
+
+    Args:
+        image_path: Path to the input image file
+        num_slices: Number of vertical slices to analyze (default: 16)
+        max_width: Maximum width to resize large images for performance
+        pitch_curve: Brightness to MIDI pitch mapping (default: linear C3-C6)
+        budget: Pixel/memory limits for decoding (default: DEFAULT_BUDGET)
+        num_bands: Horizontal bands per slice for the grid track (0 = none)
+        features: Decode in colour and attach per-slice colour/texture features
+
+    Returns:
+        List of note dictionaries with MIDI data
+
+    Raises:
+        FileNotFoundError: If image file doesn't exist
+        ValueError: If image cannot be processed
+        OSError: If image format is unsupported
+    """
+    try:
+        pixels = decode_image_pixels(
+            image_path, max_width, budget, "RGB" if features else "L"
+        )
+        notes = notes_from_pixels(pixels, num_slices, pitch_curve, num_bands)
 
         print(f"Successfully extracted {len(notes)} note slices")
         return notes
@@ -134,312 +301,907 @@ def extract_notes_from_image(
         sys.exit(1)
 
 
-def generate_melody_track(
-    notes: List[Dict[str, Any]], duration: float
-) -> pretty_midi.Instrument:
-    """Generate a melodic lead track from the image notes."""
-    instrument = pretty_midi.Instrument(program=0, name="Melody")  # Piano
+def extract_preview_notes(
+    image_path: str,
+    num_slices: int = 16,
+    pitch_curve: Optional[MappingCurve] = None,
+    budget: Optional[DecodeBudget] = None,
+    num_bands: int = 0,
+    features: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Extract a coarse set of notes for a quick progressive preview.
 
-    step_duration = duration / len(notes)
+    The image is decoded PREVIEW_MAX_WIDTH pixels wide (wider only for
+    panoramas that would end up under 10 pixels tall) and the
+    pixel budget is dropped to zero, so large JPEGs are decoded with DCT
+    scaling and uncompressed images stream only the rows they need. At
+    most PREVIEW_SLICES slices are analysed.
+
+    Args:
+        image_path: Path to the input image file
+        num_slices: Slices of the full render (the preview uses fewer)
+        pitch_curve: Brightness to MIDI pitch mapping (default: linear C3-C6)
+        budget: Pixel/memory limits for decoding (default: DEFAULT_BUDGET)
+        num_bands: Horizontal bands per slice for the grid track (0 = none)
+        features: Decode in colour and attach per-slice colour/texture features
+
+    Returns:
+        List of note dictionaries with MIDI data
+    """
+    preview_budget = (budget or DEFAULT_BUDGET)._replace(max_pixels=0)
+    preview_width = PREVIEW_MAX_WIDTH
+    try:
+        plan = preflight_image(image_path, preview_width, preview_budget)
+        if plan.height:
+            # Keep wide panoramas at least 10 pixels tall after resizing
+            preview_width = max(preview_width, math.ceil(10 * plan.width / plan.height))
+    except OSError:
+        pass  # Reported by extract_notes_from_image
+    return extract_notes_from_image(
+        image_path,
+        min(num_slices, PREVIEW_SLICES),
+        min(preview_width, 1000),
+        pitch_curve,
+        preview_budget,
+        num_bands,
+        features,
+    )
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
 
-        # Create melody by picking the highest note from chord occasionally
-        if random.random() < 0.7:  # 70% chance to play melody note
-            melody_note = max(note_data["chord"]) + random.choice(
-                [0, 7, 12]
-            )  # Add octave variations
-            melody_note = max(48, min(96, melody_note))  # Keep in range
+def preview_output_path(output_path: str) -> str:
+    """Path of the progressive preview: "song.mid" gives "song_preview.mid"."""
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_preview{ext or '.mid'}"
 
-            velocity = 90 + random.randint(-10, 10)
-            note = pretty_midi.Note(
-                velocity=velocity, pitch=melody_note, start=start_time, end=end_time
+
+# Fixed-width record layout used to hand note slices between processes
+NOTE_SLICE_DTYPE = np.dtype(
+    [
+        ("midi", "<i2"),
+        ("chord", "<i2", (3,)),
+        ("position", "<f8"),
+        ("brightness", "<f8"),
+    ]
+)
+
+
+def notes_to_array(notes: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Pack note slices into a NOTE_SLICE_DTYPE structured array.
+
+    Grid band values and slice features, if present, are kept in extra
+    "bands" and "features" fields.
+    """
+    fields = list(NOTE_SLICE_DTYPE.descr)
+    num_bands = len(notes[0].get("bands", [])) if notes else 0
+    has_features = bool(notes) and "features" in notes[0]
+    if num_bands:
+        fields.append(("bands", "<f8", (num_bands,)))
+    if has_features:
+        fields.append(("features", "<f8", (len(FEATURE_NAMES),)))
+    dtype = np.dtype(fields)
+
+    array = np.zeros(len(notes), dtype=dtype)
+    array["midi"] = [note_data["midi"] for note_data in notes]
+    array["chord"] = [note_data["chord"][:3] for note_data in notes]
+    array["position"] = [note_data["position"] for note_data in notes]
+    array["brightness"] = [note_data["brightness"] for note_data in notes]
+    if num_bands:
+        array["bands"] = [note_data["bands"] for note_data in notes]
+    if has_features:
+        array["features"] = [
+            [note_data["features"][name] for name in FEATURE_NAMES]
+            for note_data in notes
+        ]
+    return array
+
+
+def notes_from_array(array: np.ndarray) -> List[Dict[str, Any]]:
+    """Unpack a NOTE_SLICE_DTYPE array back into note dictionaries."""
+    has_bands = "bands" in (array.dtype.names or ())
+    has_features = "features" in (array.dtype.names or ())
+    notes = []
+    for record in array:
+        note_data = {
+            "midi": int(record["midi"]),
+            "chord": [int(n) for n in record["chord"]],
+            "position": float(record["position"]),
+            "brightness": np.float64(record["brightness"]),
+        }
+        if has_bands:
+            note_data["bands"] = record["bands"].tolist()
+        if has_features:
+            note_data["features"] = dict(
+                zip(FEATURE_NAMES, record["features"].tolist())
             )
-            instrument.notes.append(note)
+        notes.append(note_data)
+    return notes
 
-    return instrument
 
+def _brightness_array(notes: List[Dict[str, Any]]) -> np.ndarray:
+    """Collect slice brightness values into an array for curve lookups."""
+    return np.array([note_data["brightness"] for note_data in notes], dtype=float)
 
-def generate_harmony_track(
-    notes: List[Dict[str, Any]], duration: float
+
+def track_rngs(tracks: List[str], seed: Optional[int] = None) -> List[random.Random]:
+    """
+    An independent random generator per track.
+
+    Tracks generated concurrently must not share one generator, or the
+    result would depend on thread scheduling. Each generator is derived
+    from `seed` and the track's name and position; without a seed one is
+    drawn from the default generator. Pass a seed for reproducible output.
+    """
+    if seed is None:
+        seed = DEFAULT_RNG.getrandbits(64)
+    return [
+        random.Random(f"{seed}:{index}:{track_type}")
+        for index, track_type in enumerate(tracks)
+    ]
+
+
+def _feature_columns(notes: List[Dict[str, Any]]) -> Optional[Dict[str, np.ndarray]]:
+    """Slice features as one array per feature, or None if not extracted."""
+    if not notes or "features" not in notes[0]:
+        return None
+    return {
+        name: np.array([note_data["features"][name] for note_data in notes])
+        for name in FEATURE_NAMES
+    }
+
+
+def generate_melody_track(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
 ) -> pretty_midi.Instrument:
-    """Generate a harmony track with sustained chords."""
-    instrument = pretty_midi.Instrument(program=48, name="Harmony")  # Strings
+    """
+    Generate a melodic lead track from the image notes.
 
-    step_duration = duration / len(notes)
+    With slice features, the image's dominant hue picks the instrument and
+    each slice's contrast sets the note velocity.
+    """
+    return melody_roll(notes, duration, curves, progression, rng).to_instrument()
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
 
-        # Play full chord with some variation
-        chord_notes = note_data["chord"][:]
-        if random.random() < 0.5:  # 50% chance to add 7th
-            chord_notes.append(chord_notes[0] + 10)  # Add minor 7th
+def melody_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """The melody as arrays (see generate_melody_track)."""
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes, curves)
+    program = 0  # Piano
+    base_velocities = np.full(len(notes), 90)
+
+    features = _feature_columns(notes)
+    if features is not None:
+        saturation = features["saturation"]
+        program = program_for_hue(
+            dominant_hue(features["hue"], saturation), float(saturation.mean())
+        )
+        contrast = np.clip(features["contrast"] * 2, 0, 255)
+        base_velocities = resolve_curves(curves)[CONTRAST_VELOCITY_CURVE](contrast)
+
+    count = len(notes)
+    step_duration = duration / count
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # Pick the highest note of the chord 70% of the time...
+    sounding = draws.random(count) < 0.7
+    # ...with octave variations, kept in range
+    octaves = np.array([0, 7, 12])[draws.integers(0, 3, count)]
+    pitches = np.clip(progression["triad"].max(axis=1) + octaves, 48, 96)
+    velocities = np.clip(
+        base_velocities.astype(np.int64)
+        + draws.integers(-10, 10, count, endpoint=True),
+        1,
+        127,
+    )
+
+    positions = np.flatnonzero(sounding)
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        pitches[sounding],
+        velocities[sounding],
+        "Melody",
+        program,
+    )
 
-        for midi_note in chord_notes:
-            if 0 <= midi_note <= 127:
-                velocity = 60 + random.randint(-5, 5)
-                note = pretty_midi.Note(
-                    velocity=velocity, pitch=midi_note, start=start_time, end=end_time
-                )
-                instrument.notes.append(note)
 
-    return instrument
+def generate_harmony_track(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> pretty_midi.Instrument:
+    """Generate a harmony track with sustained chords."""
+    return harmony_roll(notes, duration, progression, rng).to_instrument()
+
+
+def harmony_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """The sustained chords as arrays (see generate_harmony_track)."""
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes)
+
+    count = len(notes)
+    step_duration = duration / count
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # Play the full chord, adding a minor 7th half of the time
+    triads = progression["triad"].astype(np.int64)
+    chords = np.column_stack((triads, triads[:, 0] + 10))
+    sevenths = draws.random(count) < 0.5
+    sounding = np.column_stack((np.ones(triads.shape, dtype=bool), sevenths))
+    sounding &= (chords >= 0) & (chords <= 127)
+    velocities = 60 + draws.integers(-5, 5, chords.shape, endpoint=True)
+
+    # Row-major order keeps the notes of each step together
+    positions = np.nonzero(sounding)[0]
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        chords[sounding],
+        velocities[sounding],
+        "Harmony",
+        48,  # Strings
+    )
 
 
 def generate_percussion_track(
-    notes: List[Dict[str, Any]], duration: float
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
 ) -> pretty_midi.Instrument:
-    """Generate a percussion track with rhythmic patterns."""
-    instrument = pretty_midi.Instrument(program=0, name="Percussion", is_drum=True)
+    """
+    Generate a percussion track from a groove bank.
 
-    step_duration = duration / len(notes)
+    Each bar plays the groove of its brightness band (STANDARD_GROOVES
+    unless `grooves` is given). Pass the same `state` dict to consecutive
+    calls to continue the beat position across chunks of a longer piece.
+    With slice features, edge energy replaces the hi-hats of busy steps
+    with faster subdivisions.
+    """
+    return percussion_roll(notes, duration, curves, state, rng, grooves).to_instrument()
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
 
-        # Create rhythmic pattern based on note brightness
-        brightness = note_data["brightness"]
+def percussion_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> PianoRoll:
+    """The percussion track as arrays (see generate_percussion_track)."""
+    if grooves is None:
+        grooves = STANDARD_GROOVES
 
-        # Bass drum on beat
-        if i % 4 == 0:
-            note = pretty_midi.Note(
-                velocity=int(np.interp(brightness, [0, 255], [80, 120])),
-                pitch=36,  # Bass drum
-                start=start_time,
-                end=start_time + 0.1,
-            )
-            instrument.notes.append(note)
-
-        # Snare on 2nd and 4th beats
-        if i % 4 == 2:
-            note = pretty_midi.Note(
-                velocity=int(np.interp(brightness, [0, 255], [70, 100])),
-                pitch=38,  # Snare
-                start=start_time,
-                end=start_time + 0.1,
-            )
-            instrument.notes.append(note)
+    step_duration = duration / len(notes)
+    step_offset = state.get("step", 0) if state is not None else 0
 
-        # Hi-hats based on brightness
-        if brightness > 128:
-            hat_pitch = 42 if random.random() < 0.7 else 46
-            note = pretty_midi.Note(
-                velocity=60, pitch=hat_pitch, start=start_time, end=start_time + 0.05
-            )
-            instrument.notes.append(note)
+    starts, ends, pitches, velocities = grooves.expand(
+        _brightness_array(notes), step_duration, curves, step_offset, resolve_rng(rng)
+    )
+
+    # Hi-hat subdivisions where the image is busy
+    features = _feature_columns(notes)
+    if features is not None:
+        curves = resolve_curves(curves)
+        hat_hits = curves[EDGE_DENSITY_CURVE](np.clip(features["edge_energy"], 0, 255))
+        busy = hat_hits > 1
+        hit_steps = np.minimum(
+            (starts / step_duration + 1e-9).astype(np.int64), len(notes) - 1
+        )
+        keep = ~(busy[hit_steps] & np.isin(pitches, HI_HAT_PITCHES))
+        fills = subdivided_hits(
+            np.flatnonzero(busy), hat_hits[busy], step_duration, BUSY_HAT
+        )
+        starts, ends, pitches, velocities = (
+            np.concatenate((column[keep], fill))
+            for column, fill in zip((starts, ends, pitches, velocities), fills)
+        )
 
-    return instrument
+    if state is not None:
+        state["step"] = step_offset + len(notes)
+
+    roll = PianoRoll(starts, ends, pitches, velocities, "Percussion", 0, True)
+    return roll.sorted()
 
 
 def generate_bass_track(
-    notes: List[Dict[str, Any]], duration: float
+    notes: List[Dict[str, Any]],
+    duration: float,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
 ) -> pretty_midi.Instrument:
     """Generate a bass track with walking bass lines."""
-    instrument = pretty_midi.Instrument(program=32, name="Bass")  # Electric Bass
+    return bass_roll(notes, duration, progression, rng).to_instrument()
 
-    step_duration = duration / len(notes)
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
+def bass_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """The bass line as arrays (see generate_bass_track)."""
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes)
+
+    count = len(notes)
+    step_duration = duration / count
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # Bass tone: the root an octave down, kept in the bass range
+    velocities = 80 + draws.integers(-10, 10, count, endpoint=True)
+
+    positions = np.arange(count)
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        progression["bass"],
+        velocities,
+        "Bass",
+        32,  # Electric Bass
+    )
 
-        # Create bass note (octave below root)
-        bass_note = note_data["midi"] - 12  # One octave down
-        bass_note = max(24, min(48, bass_note))  # Keep in bass range
 
-        velocity = 80 + random.randint(-10, 10)
-        note = pretty_midi.Note(
-            velocity=velocity, pitch=bass_note, start=start_time, end=end_time
-        )
-        instrument.notes.append(note)
+def generate_grid_track(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+) -> pretty_midi.Instrument:
+    """
+    Generate a multi-voice track from the image's horizontal bands.
+
+    Each band is a voice: the top band of the image plays in the highest
+    register and the bottom band in the lowest. A voice sounds in a slice
+    when its band is brighter than the slice average, with the band
+    brightness setting the velocity.
+    """
+    return grid_roll(notes, duration, curves, progression).to_instrument()
+
+
+def grid_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+) -> PianoRoll:
+    """The band voices as arrays (see generate_grid_track)."""
+    if not notes or "bands" not in notes[0]:
+        raise ValueError("Grid track needs band data (extract with num_bands > 0)")
+
+    if progression is None:
+        progression = analyze_harmony(notes, curves)
 
-    return instrument
+    step_duration = duration / len(notes)
+    bands = np.array([note_data["bands"] for note_data in notes], dtype=float)
+    num_bands = bands.shape[1]
+
+    # Register centre for each band, top band highest
+    centres = np.linspace(84, 36, num_bands) if num_bands > 1 else np.array([60.0])
+    velocities = resolve_curves(curves)[AI_VELOCITY_CURVE](bands)
+    active = bands >= bands.mean(axis=1, keepdims=True)
+
+    # One row per sounding (slice, band): the chord tone closest to the
+    # band's register centre
+    positions, voices = np.nonzero(active)
+    pitch_classes = progression["triad"][positions].astype(np.int64) % 12
+    centre = centres[voices][:, np.newaxis]
+    candidates = pitch_classes + 12 * np.round((centre - pitch_classes) / 12)
+    closest = np.argmin(np.abs(candidates - centre), axis=1)
+    pitches = candidates[np.arange(len(positions)), closest].astype(np.int64)
+
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        np.clip(pitches, 0, 127),
+        velocities[positions, voices],
+        "Grid",
+        46,  # Harp
+    )
 
 
 def generate_ai_enhanced_track(
-    notes: List[Dict[str, Any]], duration: float, track_type: str
+    notes: List[Dict[str, Any]],
+    duration: float,
+    track_type: str,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
 ) -> pretty_midi.Instrument:
     """Generate AI-enhanced tracks with intelligent music generation."""
+    return ai_enhanced_roll(
+        notes, duration, track_type, curves, state, progression, rng, grooves
+    ).to_instrument()
+
+
+def ai_enhanced_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    track_type: str,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> PianoRoll:
+    """One AI-enhanced track as arrays (see generate_ai_enhanced_track)."""
+    if progression is None:
+        progression = analyze_harmony(notes, curves)
+
     if track_type == "melody":
-        return generate_ai_melody(notes, duration)
+        return ai_melody_roll(notes, duration, state, progression, rng)
     elif track_type == "harmony":
-        return generate_ai_harmony(notes, duration)
+        return ai_harmony_roll(notes, duration, curves, progression, rng)
     elif track_type == "percussion":
-        return generate_ai_percussion(notes, duration)
+        return ai_percussion_roll(notes, duration, curves, state, rng, grooves)
     elif track_type == "bass":
-        return generate_ai_bass(notes, duration)
+        return ai_bass_roll(notes, duration, state, progression, rng)
+    elif track_type == "grid":
+        return grid_roll(notes, duration, curves, progression)
     else:
         # Fallback to regular generation
-        return generate_melody_track(notes, duration)
+        return melody_roll(notes, duration, curves, progression, rng)
 
 
 def generate_ai_melody(
-    notes: List[Dict[str, Any]], duration: float
+    notes: List[Dict[str, Any]],
+    duration: float,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
 ) -> pretty_midi.Instrument:
-    """Generate intelligent melody with AI-like patterns."""
-    instrument = pretty_midi.Instrument(program=0, name="AI Melody")  # Piano
-
-    step_duration = duration / len(notes)
-    melody_sequence: List[int] = []
-
-    # AI-like melody generation using Markov chain principles
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
-
-        # Intelligent note selection based on previous notes
-        if melody_sequence and random.random() < 0.7:
-            # Continue melodic pattern
-            last_note = melody_sequence[-1]
-            # Create tension and release
-            interval_options = [2, 4, 5, 7, -2, -4, -5]  # Scale degrees
-            interval = random.choice(interval_options)
-            new_note = last_note + interval
-        else:
-            # Start new melodic idea
-            new_note = note_data["midi"] + random.choice([-12, -7, 0, 7, 12])
+    """
+    Generate intelligent melody with AI-like patterns.
 
-        # Ensure note is in playable range
-        new_note = max(48, min(96, new_note))
-        melody_sequence.append(new_note)
+    Pass the same `state` dict to consecutive calls to continue the melodic
+    line across chunks of a longer piece.
+    """
+    return ai_melody_roll(notes, duration, state, progression, rng).to_instrument()
 
-        # Add some rests for musicality
-        if random.random() < 0.2:  # 20% chance of rest
-            continue
 
-        velocity = 85 + random.randint(-10, 15)
-        note = pretty_midi.Note(
-            velocity=velocity, pitch=new_note, start=start_time, end=end_time
-        )
-        instrument.notes.append(note)
+def ai_melody_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """
+    The AI melody as arrays (see generate_ai_melody).
 
-    return instrument
+    The melodic walk runs on the active sequential_kernels backend, so
+    the seeded output is the same with or without numba.
+    """
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes)
+
+    count = len(notes)
+    step_duration = duration / count
+    # All random decisions are drawn up front; only the walk is sequential
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # AI-like melody generation using Markov chain principles: mostly
+    # continue the melodic pattern, creating tension and release...
+    continues = draws.random(count) < 0.7
+    intervals = np.array([2, 4, 5, 7, -2, -4, -5])  # Scale degrees
+    steps = intervals[draws.integers(0, len(intervals), count)]
+    # ...otherwise start a new melodic idea around the chord root
+    leaps = np.array([-12, -7, 0, 7, 12])
+    fresh = (
+        progression["root"].astype(np.int64)
+        + leaps[draws.integers(0, len(leaps), count)]
+    )
+    # Add some rests for musicality (20% chance of rest)
+    sounding = draws.random(count) >= 0.2
+    velocities = 85 + draws.integers(-10, 15, count, endpoint=True)
+
+    # Ensure notes are in playable range
+    last_note = state.get("last_note") if state is not None else None
+    pitches = melody_walk(continues, steps, fresh, last_note, 48, 96)
+    if state is not None and count:
+        state["last_note"] = int(pitches[-1])
+
+    positions = np.flatnonzero(sounding)
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        pitches[sounding],
+        velocities[sounding],
+        "AI Melody",
+        0,  # Piano
+    )
 
 
 def generate_ai_harmony(
-    notes: List[Dict[str, Any]], duration: float
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
 ) -> pretty_midi.Instrument:
-    """Generate intelligent harmony with AI chord progressions."""
-    instrument = pretty_midi.Instrument(program=48, name="AI Harmony")  # Strings
+    """
+    Generate intelligent harmony with AI chord progressions.
 
-    step_duration = duration / len(notes)
+    The chord quality of every slice (picked from its brightness by the
+    chord_pattern curve) comes from the shared harmonic analysis.
+    """
+    return ai_harmony_roll(notes, duration, curves, progression, rng).to_instrument()
 
-    # AI chord progression patterns
-    chord_patterns = [
-        [0, 2, 4],  # Major triad
-        [0, 3, 5],  # Minor triad
-        [0, 4, 7],  # Dominant 7th
-        [0, 3, 6],  # Diminished
-        [0, 2, 4, 6],  # 7th chord
-    ]
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
+def ai_harmony_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """The AI harmony as arrays (see generate_ai_harmony)."""
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes, curves)
 
-        # Select chord pattern based on image brightness
-        brightness = note_data["brightness"]
-        pattern_index = int(
-            np.interp(brightness, [0, 255], [0, len(chord_patterns) - 1])
-        )
-        chord_pattern = chord_patterns[pattern_index]
+    step_duration = duration / len(notes)
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # Unused voicing slots are padded with -1
+    voicings = progression["voicing"].astype(np.int64)
+    sounding = voicings >= 0
+    velocities = 65 + draws.integers(-5, 10, voicings.shape, endpoint=True)
+
+    positions = np.nonzero(sounding)[0]
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        voicings[sounding],
+        velocities[sounding],
+        "AI Harmony",
+        48,  # Strings
+    )
 
-        # Apply pattern to root note
-        root_note = note_data["midi"]
 
-        for interval in chord_pattern:
-            chord_note = root_note + interval
-            chord_note = max(36, min(84, chord_note))  # Keep in range
+def generate_ai_percussion(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> pretty_midi.Instrument:
+    """
+    Generate intelligent percussion with AI rhythmic patterns.
 
-            velocity = 65 + random.randint(-5, 10)
-            note = pretty_midi.Note(
-                velocity=velocity, pitch=chord_note, start=start_time, end=end_time
-            )
-            instrument.notes.append(note)
+    Brighter bars play denser figures from AI_GROOVES (or `grooves`), with
+    light timing and velocity humanization.
+    """
+    return ai_percussion_roll(
+        notes, duration, curves, state, rng, grooves
+    ).to_instrument()
 
-    return instrument
 
+def ai_percussion_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    rng: Optional[random.Random] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> PianoRoll:
+    """The AI percussion as arrays (see generate_ai_percussion)."""
+    if grooves is None:
+        grooves = AI_GROOVES
+
+    step_offset = state.get("step", 0) if state is not None else 0
+    columns = grooves.expand(
+        _brightness_array(notes),
+        duration / len(notes),
+        curves,
+        step_offset,
+        resolve_rng(rng),
+    )
+    if state is not None:
+        state["step"] = step_offset + len(notes)
 
-def generate_ai_percussion(
-    notes: List[Dict[str, Any]], duration: float
+    return PianoRoll(*columns, "AI Percussion", 0, True)
+
+
+def generate_ai_bass(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
 ) -> pretty_midi.Instrument:
-    """Generate intelligent percussion with AI rhythmic patterns."""
-    instrument = pretty_midi.Instrument(program=0, name="AI Percussion", is_drum=True)
+    """
+    Generate intelligent bass lines with AI walking patterns.
 
-    step_duration = duration / len(notes)
+    Pass the same `state` dict to consecutive calls to continue the walking
+    pattern position across chunks of a longer piece.
+    """
+    return ai_bass_roll(notes, duration, state, progression, rng).to_instrument()
 
-    # AI rhythmic patterns based on image analysis
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        brightness = note_data["brightness"]
-
-        # Dynamic rhythm generation based on brightness
-        if brightness > 200:  # Bright = complex rhythm
-            pattern = [0, 0.25, 0.5, 0.75]  # 16th notes
-        elif brightness > 128:  # Medium = standard rhythm
-            pattern = [0, 0.5]  # 8th notes
-        else:  # Dark = simple rhythm
-            pattern = [0]  # Quarter notes
-
-        for beat_offset in pattern:
-            beat_time = start_time + (beat_offset * step_duration)
-
-            # Select drum based on position and brightness
-            if beat_offset == 0:  # Downbeat
-                drum_pitch = 36  # Bass drum
-            elif beat_offset == 0.5:  # Backbeat
-                drum_pitch = 38  # Snare
-            else:  # Off-beats
-                drum_pitch = random.choice([42, 46])  # Hi-hats
-
-            velocity = int(np.interp(brightness, [0, 255], [60, 110]))
-            note = pretty_midi.Note(
-                velocity=velocity,
-                pitch=drum_pitch,
-                start=beat_time,
-                end=beat_time + 0.1,
-            )
-            instrument.notes.append(note)
 
-    return instrument
+def ai_bass_roll(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    state: Optional[Dict[str, Any]] = None,
+    progression: Optional[np.ndarray] = None,
+    rng: Optional[random.Random] = None,
+) -> PianoRoll:
+    """The AI bass line as arrays (see generate_ai_bass)."""
+    rng = resolve_rng(rng)
+    if progression is None:
+        progression = analyze_harmony(notes)
+
+    count = len(notes)
+    step_duration = duration / count
+    step_offset = state.get("step", 0) if state is not None else 0
+    draws = np.random.default_rng(rng.getrandbits(64))
+
+    # AI bass line generation, an octave below the root
+    roots = progression["root"].astype(np.int64) - 12
+
+    # Create walking bass pattern: root on downbeat, fifth on backbeat,
+    # chromatic approach or other notes in between. The pattern depends
+    # only on the absolute step, so it needs no sequential kernel.
+    beats = (step_offset + np.arange(count)) % 4
+    approach = np.array([2, 4, 9, 11])[draws.integers(0, 4, count)]
+    pitches = np.where(
+        beats == 0, roots, np.where(beats == 2, roots + 7, roots + approach)
+    )
+    pitches = np.clip(pitches, 24, 48)  # Keep in bass range
+    velocities = 80 + draws.integers(-10, 10, count, endpoint=True)
+
+    if state is not None:
+        state["step"] = step_offset + count
+
+    positions = np.arange(count)
+    return PianoRoll(
+        positions * step_duration,
+        (positions + 1) * step_duration,
+        pitches,
+        velocities,
+        "AI Bass",
+        32,  # Electric Bass
+    )
 
 
-def generate_ai_bass(
-    notes: List[Dict[str, Any]], duration: float
-) -> pretty_midi.Instrument:
-    """Generate intelligent bass lines with AI walking patterns."""
-    instrument = pretty_midi.Instrument(program=32, name="AI Bass")  # Electric Bass
+def _validate_export_settings(
+    notes: List[Dict[str, Any]], bpm: int, duration: float, max_duration: float
+) -> None:
+    """Raise ValueError for empty notes or out-of-range tempo/duration."""
+    if not notes:
+        raise ValueError("No notes provided")
 
-    step_duration = duration / len(notes)
+    if not (20 <= bpm <= 200):
+        raise ValueError(f"BPM must be between 20-200, got {bpm}")
+
+    if not (1 <= duration <= max_duration):
+        raise ValueError(
+            f"Duration must be between 1-{max_duration} seconds, got {duration}"
+        )
+
+
+def _apply_reduction(
+    rolls: List[PianoRoll], reduction: Optional[NoteReduction]
+) -> List[PianoRoll]:
+    """Merge repeated notes / limit density if requested."""
+    if reduction is None:
+        return rolls
+    reduced = [reduce_roll(roll, reduction) for roll in rolls]
+    removed = sum(len(roll) for roll in rolls) - sum(len(roll) for roll in reduced)
+    print(f"🧹 Note reduction removed {removed} redundant notes")
+    return reduced
+
+
+def _apply_tempo_map(
+    rolls: List[PianoRoll], tempo_map: Optional[TempoMap], bpm: int
+) -> List[PianoRoll]:
+    """Move notes generated at `bpm` to real time under a tempo map, if given."""
+    if tempo_map is None:
+        return rolls
+    return [roll.retime(tempo_map, bpm) for roll in rolls]
 
-    for i, note_data in enumerate(notes):
-        start_time = i * step_duration
-        end_time = (i + 1) * step_duration
 
-        # AI bass line generation
-        root_note = note_data["midi"] - 12  # Octave below
+def _export_stems(
+    rolls: List[PianoRoll],
+    output_path: str,
+    bpm: int,
+    stems: bool,
+    stems_zip: bool,
+    tempo_map: Optional[TempoMap] = None,
+) -> List[str]:
+    """Write per-track stems next to the combined file if requested."""
+    if not (stems or stems_zip):
+        return []
+    print(f"🎚️ Writing {len(rolls)} stems...")
+    paths = write_stems(rolls, output_path, bpm, bundle=stems_zip, tempo_map=tempo_map)
+    for path in paths:
+        print(f"   Stem: {path}")
+    if stems_zip:
+        print(f"📦 Stem bundle: {stem_bundle_path(output_path)}")
+    return paths
+
+
+def _write_midi(
+    rolls: List[PianoRoll],
+    output_path: str,
+    bpm: int,
+    tempo_map: Optional[TempoMap] = None,
+) -> None:
+    """Write the arrangement, with the tempo map as its tempo track if given."""
+    if tempo_map is None:
+        midi_from_rolls(rolls, bpm).write(output_path)
+    else:
+        write_rolls_smf(rolls, output_path, bpm, tempo_map)
+
+
+_AI_MESSAGES = {
+    "melody": "🎵 Generating AI melody...",
+    "harmony": "🎶 Generating AI harmony...",
+    "bass": "🎸 Generating AI bass...",
+    "percussion": "🥁 Generating AI percussion...",
+    "grid": "🔲 Generating grid voices...",
+}
+
+_TRACK_MESSAGES = {
+    "melody": "🎵 Generating melody track...",
+    "harmony": "🎶 Generating harmony track...",
+    "percussion": "🥁 Generating percussion track...",
+    "bass": "🎸 Generating bass track...",
+    "grid": "🔲 Generating grid track...",
+}
+
+
+def _generate_track(
+    track_type: str,
+    notes: List[Dict[str, Any]],
+    duration: float,
+    ai_mode: bool,
+    curves: Optional[Dict[str, MappingCurve]],
+    state: Optional[Dict[str, Any]],
+    progression: np.ndarray,
+    rng: random.Random,
+    grooves: Optional[GrooveBank] = None,
+) -> PianoRoll:
+    """Generate one track from the shared harmonic analysis."""
+    if ai_mode:
+        return ai_enhanced_roll(
+            notes, duration, track_type, curves, state, progression, rng, grooves
+        )
+    if track_type == "harmony":
+        return harmony_roll(notes, duration, progression, rng)
+    if track_type == "percussion":
+        return percussion_roll(notes, duration, curves, state, rng, grooves)
+    if track_type == "bass":
+        return bass_roll(notes, duration, progression, rng)
+    if track_type == "grid":
+        return grid_roll(notes, duration, curves, progression)
+    return melody_roll(notes, duration, curves, progression, rng)
+
+
+def generate_tracks(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    tracks: List[str],
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    rngs: Optional[List[random.Random]] = None,
+    states: Optional[List[Dict[str, Any]]] = None,
+    max_workers: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> List[PianoRoll]:
+    """
+    Generate several tracks as a task graph.
 
-        # Create walking bass pattern
-        if i % 4 == 0:  # Root on downbeat
-            bass_note = root_note
-        elif i % 4 == 2:  # Fifth on backbeat
-            bass_note = root_note + 7
-        else:  # Chromatic approach or other notes
-            bass_note = root_note + random.choice([2, 4, 9, 11])
+    The harmonic analysis runs once; every track depends only on it, so
+    the tracks are then generated concurrently.
 
-        bass_note = max(24, min(48, bass_note))  # Keep in bass range
+    Args:
+        notes: List of note dictionaries from extract_notes_from_image
+        duration: Total duration in seconds
+        tracks: Track types to generate, in output order
+        ai_mode: Use the AI-enhanced generators
+        curves: Optional brightness mapping curves overriding the defaults
+        rngs: One random generator per track (default: track_rngs(tracks))
+        states: One state dict per track to continue across chunks
+        max_workers: Threads generating tracks (default: one per track)
+        grooves: Optional groove bank replacing the built-in percussion
+            grooves
 
-        velocity = 80 + random.randint(-10, 10)
-        note = pretty_midi.Note(
-            velocity=velocity, pitch=bass_note, start=start_time, end=end_time
+    Returns:
+        One PianoRoll per entry in `tracks`
+    """
+    if rngs is None:
+        rngs = track_rngs(tracks)
+
+    graph = TaskGraph()
+    graph.add("harmony", lambda: analyze_harmony(notes, curves))
+    for index, track_type in enumerate(tracks):
+        graph.add(
+            f"{index}:{track_type}",
+            partial(
+                _generate_track,
+                track_type,
+                notes,
+                duration,
+                ai_mode,
+                curves,
+                states[index] if states is not None else None,
+                rng=rngs[index],
+                grooves=grooves,
+            ),
+            ["harmony"],
         )
-        instrument.notes.append(note)
 
-    return instrument
+    results = graph.run(max_workers)
+    return [results[f"{index}:{track_type}"] for index, track_type in enumerate(tracks)]
+
+
+def build_multi_track_rolls(
+    notes: List[Dict[str, Any]],
+    bpm: int = 60,
+    duration: int = 8,
+    tracks: Union[List[str], None] = None,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> List[PianoRoll]:
+    """
+    Generate the multi-track arrangement in memory without writing it.
+
+    Raises:
+        ValueError: If the settings are invalid or no tracks were generated
+    """
+    if tracks is None:
+        tracks = DEFAULT_TRACKS
+
+    _validate_export_settings(notes, bpm, duration, MAX_DURATION)
+
+    # Tracks are always laid out in the same order, whatever the request
+    selected = [track_type for track_type in TRACK_TYPES if track_type in tracks]
+    for track_type in selected:
+        print(_TRACK_MESSAGES[track_type])
+
+    rolls = generate_tracks(
+        notes,
+        duration,
+        selected,
+        False,
+        curves,
+        track_rngs(selected, seed),
+        grooves=grooves,
+    )
+
+    if len(rolls) == 0:
+        raise ValueError("No tracks were generated")
+
+    return rolls
 
 
 def create_multi_track_midi_from_notes(
@@ -448,7 +1210,14 @@ def create_multi_track_midi_from_notes(
     bpm: int = 60,
     duration: int = 8,
     tracks: Union[List[str], None] = None,
-) -> None:
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    reduction: Optional[NoteReduction] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+    stems: bool = False,
+    stems_zip: bool = False,
+    tempo_map: Optional[TempoMap] = None,
+) -> pretty_midi.PrettyMIDI:
     """
     Create a multi-track MIDI file from the extracted notes.
 
@@ -459,20 +1228,25 @@ def create_multi_track_midi_from_notes(
         duration: Total duration in seconds
         tracks: List of tracks to include ['melody', 'harmony',
             'percussion', 'bass']
+        curves: Optional brightness mapping curves overriding the defaults
+        reduction: Optional note merging / density limit applied before saving
+        seed: Random seed for reproducible output
+        grooves: Optional groove bank for the percussion track
+        stems: Also write one MIDI file per track next to output_path
+        stems_zip: Also bundle the combined file and stems into a zip
+        tempo_map: Optional tempo map (e.g. brightness_tempo_map) the notes
+            are moved onto and written with, instead of the fixed bpm
+
+    Returns:
+        The generated PrettyMIDI object (already written to output_path),
+        with note times in real seconds
     """
     if tracks is None:
-        tracks = ["melody", "harmony", "percussion", "bass"]
+        tracks = DEFAULT_TRACKS
 
     try:
         # Validate inputs
-        if not notes:
-            raise ValueError("No notes provided")
-
-        if not (20 <= bpm <= 200):
-            raise ValueError(f"BPM must be between 20-200, got {bpm}")
-
-        if not (1 <= duration <= 300):
-            raise ValueError(f"Duration must be between 1-300 seconds, got {duration}")
+        _validate_export_settings(notes, bpm, duration, MAX_DURATION)
 
         # Validate output path
         output_dir = os.path.dirname(output_path)
@@ -482,49 +1256,30 @@ def create_multi_track_midi_from_notes(
         print(f"🎼 Creating multi-track MIDI with {len(tracks)} tracks...")
         print(f"Settings: BPM={bpm}, Duration={duration}s, Tracks={tracks}")
 
-        # Create MIDI object
-        midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
-
-        # Generate each track
-        if "melody" in tracks:
-            print("🎵 Generating melody track...")
-            melody_track = generate_melody_track(notes, duration)
-            midi.instruments.append(melody_track)
-
-        if "harmony" in tracks:
-            print("🎶 Generating harmony track...")
-            harmony_track = generate_harmony_track(notes, duration)
-            midi.instruments.append(harmony_track)
-
-        if "percussion" in tracks:
-            print("🥁 Generating percussion track...")
-            percussion_track = generate_percussion_track(notes, duration)
-            midi.instruments.append(percussion_track)
-
-        if "bass" in tracks:
-            print("🎸 Generating bass track...")
-            bass_track = generate_bass_track(notes, duration)
-            midi.instruments.append(bass_track)
-
-        if len(midi.instruments) == 0:
-            raise ValueError("No tracks were generated")
+        rolls = build_multi_track_rolls(
+            notes, bpm, duration, tracks, curves, seed, grooves
+        )
+        rolls = _apply_reduction(rolls, reduction)
+        rolls = _apply_tempo_map(rolls, tempo_map, bpm)
 
         # Write MIDI file
         print(f"💾 Saving to: {output_path}")
-        midi.write(output_path)
+        _write_midi(rolls, output_path, bpm, tempo_map)
 
         # Verify file was created
         if not os.path.exists(output_path):
             raise OSError(f"Failed to create MIDI file: {output_path}")
 
         file_size = os.path.getsize(output_path)
-        total_notes = sum(len(inst.notes) for inst in midi.instruments)
+        total_notes = sum(len(roll) for roll in rolls)
 
         print(f"✅ Multi-track MIDI saved successfully: {output_path}")
         print(f"   File size: {file_size} bytes")
-        print(f"   Total tracks: {len(midi.instruments)}")
+        print(f"   Total tracks: {len(rolls)}")
         print(f"   Total notes: {total_notes}")
-        print(f"   Tracks: {', '.join([inst.name for inst in midi.instruments])}")
+        print(f"   Tracks: {', '.join([roll.name for roll in rolls])}")
+        _export_stems(rolls, output_path, bpm, stems, stems_zip, tempo_map)
+        return midi_from_rolls(rolls, bpm)
 
     except ValueError as e:
         print(f"❌ Error: Invalid parameters: {e}")
@@ -542,40 +1297,39 @@ def create_midi_from_notes(
     output_path: str = DEFAULT_OUTPUT_FILE,
     bpm: int = 60,
     duration: int = 8,
-) -> None:
+) -> pretty_midi.PrettyMIDI:
     """
     Create a MIDI file from the extracted notes with enhanced features.
     (Legacy single-track function for backward compatibility)
     """
     tracks = ["melody"]  # Default to melody-only for backward compatibility
-    create_multi_track_midi_from_notes(notes, output_path, bpm, duration, tracks)
+    return create_multi_track_midi_from_notes(notes, output_path, bpm, duration, tracks)
 
 
-def _add_ai_track(
-    midi: pretty_midi.PrettyMIDI,
-    track_type: str,
+def build_ai_multi_track_rolls(
     notes: List[Dict[str, Any]],
     duration: int,
-) -> bool:
-    """Helper function to add a single AI track to the MIDI object."""
-    track_generators = {
-        "melody": (generate_ai_melody, "🎵 Generating AI melody..."),
-        "harmony": (generate_ai_harmony, "🎶 Generating AI harmony..."),
-        "bass": (generate_ai_bass, "🎸 Generating AI bass..."),
-        "percussion": (generate_ai_percussion, "🥁 Generating AI percussion..."),
-    }
-    
-    if track_type not in track_generators:
-        return False
-    
-    generator_func, print_msg = track_generators[track_type]
-    print(print_msg)
-    track = generator_func(notes, duration)
-    
-    if track and track.notes:
-        midi.instruments.append(track)
-        return True
-    return False
+    tracks: List[str],
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> List[PianoRoll]:
+    """Generate the AI-enhanced arrangement in memory without writing it."""
+    # Generate AI tracks based on selected tracks
+    selected = [track_type for track_type in tracks if track_type in _AI_MESSAGES]
+    for track_type in selected:
+        print(_AI_MESSAGES[track_type])
+
+    rolls = generate_tracks(
+        notes,
+        duration,
+        selected,
+        True,
+        curves,
+        track_rngs(selected, seed),
+        grooves=grooves,
+    )
+    return [roll for roll in rolls if len(roll)]
 
 
 def create_ai_multi_track_midi(
@@ -584,7 +1338,14 @@ def create_ai_multi_track_midi(
     bpm: int,
     duration: int,
     tracks: List[str],
-) -> None:
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    reduction: Optional[NoteReduction] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+    stems: bool = False,
+    stems_zip: bool = False,
+    tempo_map: Optional[TempoMap] = None,
+) -> pretty_midi.PrettyMIDI:
     """
     Create AI-enhanced multi-track MIDI file with intelligent music generation.
 
@@ -594,28 +1355,249 @@ def create_ai_multi_track_midi(
         bpm: Tempo in beats per minute
         duration: Total duration in seconds
         tracks: List of track types to include
+        curves: Optional brightness mapping curves overriding the defaults
+        reduction: Optional note merging / density limit applied before saving
+        seed: Random seed for reproducible output
+        grooves: Optional groove bank for the percussion track
+        stems: Also write one MIDI file per track next to output_path
+        stems_zip: Also bundle the combined file and stems into a zip
+        tempo_map: Optional tempo map the notes are moved onto and written
+            with, instead of the fixed bpm
+
+    Returns:
+        The generated PrettyMIDI object (already written to output_path),
+        with note times in real seconds
     """
     print("🎼 Creating AI-enhanced multi-track MIDI...")
 
-    # Create PrettyMIDI object
-    midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
-    track_count = 0
-
-    # Generate AI tracks based on selected tracks
-    for track_type in tracks:
-        if _add_ai_track(midi, track_type, notes, duration):
-            track_count += 1
+    rolls = build_ai_multi_track_rolls(notes, duration, tracks, curves, seed, grooves)
+    rolls = _apply_reduction(rolls, reduction)
+    rolls = _apply_tempo_map(rolls, tempo_map, bpm)
 
     # Save the MIDI file
-    midi.write(output_path)
-    print(f"✅ AI-enhanced MIDI saved to {output_path} with {track_count} tracks")
+    _write_midi(rolls, output_path, bpm, tempo_map)
+    print(f"✅ AI-enhanced MIDI saved to {output_path} with {len(rolls)} tracks")
+    _export_stems(rolls, output_path, bpm, stems, stems_zip, tempo_map)
+    return midi_from_rolls(rolls, bpm)
+
+
+def build_rolls(
+    notes: List[Dict[str, Any]],
+    bpm: int,
+    duration: int,
+    tracks: List[str],
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> List[PianoRoll]:
+    """Generate the standard or AI-enhanced arrangement as rolls."""
+    if ai_mode:
+        return build_ai_multi_track_rolls(
+            notes, duration, tracks, curves, seed, grooves
+        )
+    return build_multi_track_rolls(notes, bpm, duration, tracks, curves, seed, grooves)
+
+
+def build_midi(
+    notes: List[Dict[str, Any]],
+    bpm: int,
+    duration: int,
+    tracks: List[str],
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> pretty_midi.PrettyMIDI:
+    """Generate the standard or AI-enhanced arrangement in memory."""
+    return midi_from_rolls(
+        build_rolls(notes, bpm, duration, tracks, ai_mode, curves, seed, grooves),
+        bpm,
+    )
+
+
+def iter_track_chunks(
+    notes: List[Dict[str, Any]],
+    duration: float,
+    tracks: List[str],
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    chunk_steps: int = DEFAULT_CHUNK_STEPS,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+) -> Iterator[Tuple[float, float, List[PianoRoll]]]:
+    """
+    Generate the arrangement in windows of `chunk_steps` slices.
+
+    Melody state, beat position and each track's random generator carry
+    across window boundaries, so the concatenated chunks form one
+    continuous piece.
+
+    Yields:
+        (window_start, window_end, rolls) with note times in absolute
+        seconds; one PianoRoll per requested track, in `tracks` order
+    """
+    step_duration = duration / len(notes)
+    states: List[Dict[str, Any]] = [{} for _ in tracks]
+    rngs = track_rngs(tracks, seed)
+
+    for chunk_start in range(0, len(notes), chunk_steps):
+        window = notes[chunk_start : chunk_start + chunk_steps]
+        window_start = chunk_start * step_duration
+        window_duration = len(window) * step_duration
+
+        rolls = generate_tracks(
+            window,
+            window_duration,
+            tracks,
+            ai_mode,
+            curves,
+            rngs,
+            states,
+            grooves=grooves,
+        )
+
+        yield window_start, window_start + window_duration, [
+            roll.shift(window_start) for roll in rolls
+        ]
+
+
+def create_chunked_multi_track_midi(
+    notes: List[Dict[str, Any]],
+    output_path: str = DEFAULT_OUTPUT_FILE,
+    bpm: int = 60,
+    duration: int = 8,
+    tracks: Union[List[str], None] = None,
+    ai_mode: bool = False,
+    curves: Optional[Dict[str, MappingCurve]] = None,
+    chunk_steps: int = DEFAULT_CHUNK_STEPS,
+    reduction: Optional[NoteReduction] = None,
+    seed: Optional[int] = None,
+    grooves: Optional[GrooveBank] = None,
+    tempo_map: Optional[TempoMap] = None,
+) -> Dict[str, Any]:
+    """
+    Create a long multi-track MIDI file with bounded memory.
+
+    The arrangement is generated in windows of `chunk_steps` slices and each
+    window is streamed to disk before the next one is generated, so memory
+    stays flat for renders of up to MAX_CHUNKED_DURATION seconds.
+
+    Args:
+        notes: List of note dictionaries from extract_notes_from_image
+        output_path: Path to save the MIDI file
+        bpm: Beats per minute for the tempo
+        duration: Total duration in seconds
+        tracks: List of tracks to include
+        ai_mode: Use the AI-enhanced generators
+        curves: Optional brightness mapping curves overriding the defaults
+        chunk_steps: Number of slices generated per window
+        reduction: Optional note merging / density limit applied per window
+        seed: Random seed for reproducible output
+        grooves: Optional groove bank for the percussion track
+        tempo_map: Optional tempo map each window is moved onto and the
+            file is written with, instead of the fixed bpm
+
+    Returns:
+        Summary with the output path, file size, track names, per-track
+        TrackInfo, note and chunk counts
+    """
+    if tracks is None:
+        tracks = DEFAULT_TRACKS
+
+    writer: Optional[StreamingMidiWriter] = None
+    try:
+        _validate_export_settings(notes, bpm, duration, MAX_CHUNKED_DURATION)
+
+        if chunk_steps < 1:
+            raise ValueError(f"Chunk size must be at least 1 slice, got {chunk_steps}")
+
+        if not tracks:
+            raise ValueError("No tracks were requested")
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        print(f"🎼 Rendering {len(tracks)} tracks in chunks of {chunk_steps} slices...")
+        print(f"Settings: BPM={bpm}, Duration={duration}s, Tracks={tracks}")
+
+        chunk_count = 0
+        for _, window_end, rolls in iter_track_chunks(
+            notes, duration, tracks, ai_mode, curves, chunk_steps, seed, grooves
+        ):
+            if reduction is not None:
+                rolls = [reduce_roll(roll, reduction) for roll in rolls]
+            if tempo_map is not None:
+                rolls = [roll.retime(tempo_map, bpm) for roll in rolls]
+                window_end = float(tempo_map.to_seconds(window_end, bpm))
+            if writer is None:
+                writer = StreamingMidiWriter(
+                    output_path,
+                    bpm,
+                    [(roll.name, roll.program, roll.is_drum) for roll in rolls],
+                    tempo_map=tempo_map,
+                )
+            for index, roll in enumerate(rolls):
+                writer.add_notes(index, *roll.columns())
+            writer.flush(window_end)
+            chunk_count += 1
+
+        assert writer is not None
+        writer.close()
+
+        file_size = os.path.getsize(output_path)
+        track_names = [spool.name for spool in writer.tracks]
+        print(f"✅ Chunked MIDI saved successfully: {output_path}")
+        print(f"   File size: {file_size} bytes")
+        print(f"   Chunks: {chunk_count}")
+        print(f"   Total notes: {writer.note_count}")
+        print(f"   Tracks: {', '.join(track_names)}")
+
+        return {
+            "output_path": output_path,
+            "file_size": file_size,
+            "tracks": track_names,
+            "total_notes": writer.note_count,
+            "track_info": [
+                TrackInfo(
+                    spool.name,
+                    spool.program,
+                    spool.channel == DRUM_CHANNEL,
+                    spool.note_count,
+                )
+                for spool in writer.tracks
+            ],
+            "chunks": chunk_count,
+        }
+
+    except ValueError as e:
+        print(f"❌ Error: Invalid parameters: {e}")
+        sys.exit(1)
+    except OSError as e:
+        print(f"❌ Error: Cannot write MIDI file: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Unexpected error during MIDI creation: {e}")
+        sys.exit(1)
+    finally:
+        if writer is not None:
+            writer.discard()
 
 
 if __name__ == "__main__":
+    from album import DEFAULT_TRANSITION_SLICES
+    from event_stream import DEFAULT_STREAM_STEPS
+    from watch_folder import (
+        DEFAULT_POLL_INTERVAL,
+        DEFAULT_SETTLE_SECONDS,
+        FolderWatcher,
+    )
+
     parser = argparse.ArgumentParser(
         description="Convert images to multi-track MIDI files for DAW production"
     )
-    parser.add_argument("image_path", help="Path to the input image")
+    parser.add_argument("image_path", nargs="?", help="Path to the input image")
     parser.add_argument(
         "-o",
         "--output",
@@ -632,13 +1614,80 @@ if __name__ == "__main__":
         default=8,
         help="Total duration in seconds (default: 8)",
     )
+    parser.add_argument(
+        "--tempo-spread",
+        type=float,
+        default=0.0,
+        metavar="FRACTION",
+        help=(
+            "Write a tempo map driven by brightness: white slices play up "
+            "to FRACTION faster than --bpm, black ones slower; the total "
+            "duration is kept (default: 0, a fixed tempo)"
+        ),
+    )
     parser.add_argument(
         "-t",
         "--tracks",
         nargs="+",
-        choices=["melody", "harmony", "percussion", "bass"],
-        default=["melody", "harmony", "percussion", "bass"],
-        help="Tracks to include (default: all tracks)",
+        choices=TRACK_TYPES,
+        default=DEFAULT_TRACKS,
+        help="Tracks to include (default: melody harmony percussion bass)",
+    )
+    parser.add_argument(
+        "-s",
+        "--slices",
+        type=int,
+        default=16,
+        help="Number of image slices (steps) to analyze (default: 16)",
+    )
+    parser.add_argument(
+        "--bands",
+        type=int,
+        default=0,
+        help=(
+            "Horizontal image bands for the grid track, top band highest "
+            f"(default: {DEFAULT_GRID_BANDS} when the grid track is selected)"
+        ),
+    )
+    parser.add_argument(
+        "--features",
+        action="store_true",
+        help=(
+            "Extract colour, contrast and edge features per slice: hue picks "
+            "the melody instrument, contrast its velocity, edges the hi-hat density"
+        ),
+    )
+    parser.add_argument(
+        "--merge-notes",
+        action="store_true",
+        help="Merge repeated same-pitch notes into sustained notes (legato)",
+    )
+    parser.add_argument(
+        "--max-density",
+        type=float,
+        metavar="NOTES_PER_SEC",
+        help="Keep at most this many note starts per second in each track",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for reproducible output (default: different every run)",
+    )
+    parser.add_argument(
+        "--kernels",
+        choices=KERNEL_BACKENDS,
+        help=(
+            "Backend for the sequential generator kernels; output is the "
+            "same with either (default: numba when installed)"
+        ),
+    )
+    parser.add_argument(
+        "--groove-bank",
+        metavar="PATH",
+        help=(
+            "JSON groove bank replacing the built-in percussion grooves "
+            "(drum step patterns picked per bar by brightness)"
+        ),
     )
     parser.add_argument(
         "--legacy", action="store_true", help="Use legacy single-track mode"
@@ -646,26 +1695,882 @@ if __name__ == "__main__":
     parser.add_argument(
         "--ai-mode", action="store_true", help="Enable AI-enhanced music generation"
     )
+    parser.add_argument(
+        "--curve",
+        action="append",
+        default=[],
+        metavar="NAME=SPEC",
+        help=(
+            "Brightness mapping curve, e.g. pitch=gamma:2.2 or "
+            "kick_velocity=piecewise:0:60,200:127 (repeatable). "
+            "Kinds: linear, exp:K, gamma:G, piecewise:X:Y,..., table:PATH"
+        ),
+    )
+    parser.add_argument(
+        "--preview-wav",
+        metavar="PATH",
+        help="Also render an audio preview of the generated tracks to a WAV file",
+    )
+    parser.add_argument(
+        "--piano-roll",
+        metavar="PATH",
+        help="Also save a PNG piano-roll image of the generated tracks",
+    )
+    parser.add_argument(
+        "--events",
+        metavar="PATH",
+        help=(
+            "Also save the note slices and generated notes in the binary "
+            "note-event format (read by js/note-events.js)"
+        ),
+    )
+    parser.add_argument(
+        "--stems",
+        action="store_true",
+        help="Also write one MIDI file per track next to the output file",
+    )
+    parser.add_argument(
+        "--stems-zip",
+        action="store_true",
+        help="Also bundle the output file and per-track stems into a zip",
+    )
+    parser.add_argument(
+        "--progressive",
+        action="store_true",
+        help=(
+            "First write a coarse preview from a tiny decode and few slices "
+            "to OUTPUT_preview.mid, then the full render"
+        ),
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help=(
+            "Render in time windows streamed to disk with flat memory "
+            f"(allows durations up to {MAX_CHUNKED_DURATION}s)"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-steps",
+        type=int,
+        default=DEFAULT_CHUNK_STEPS,
+        help=f"Slices per window in chunked mode (default: {DEFAULT_CHUNK_STEPS})",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Write note events to stdout as JSON lines while they are "
+            "generated instead of a MIDI file (progress goes to stderr)"
+        ),
+    )
+    parser.add_argument(
+        "--stream-steps",
+        type=int,
+        default=DEFAULT_STREAM_STEPS,
+        help=(
+            "Slices generated per --stream step "
+            f"(default: {DEFAULT_STREAM_STEPS}, the lowest latency)"
+        ),
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="IMAGE",
+        help="Convert several images with parallel decode/generate worker pools",
+    )
+    parser.add_argument(
+        "--album",
+        nargs="+",
+        metavar="IMAGE",
+        help=(
+            "Arrange several images, in order, as the sections of one "
+            "continuous MIDI file with transitions between them (each "
+            "section lasts --duration seconds)"
+        ),
+    )
+    parser.add_argument(
+        "--section-bpm",
+        nargs="+",
+        type=int,
+        metavar="BPM",
+        help=(
+            "Tempo per --album section; sections play faster or slower "
+            "than --bpm and transitions ramp between them (default: --bpm)"
+        ),
+    )
+    parser.add_argument(
+        "--transition-slices",
+        type=int,
+        default=DEFAULT_TRANSITION_SLICES,
+        help=(
+            "Interpolated slices between --album sections "
+            f"(default: {DEFAULT_TRANSITION_SLICES})"
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="outputs",
+        help="Output directory for --batch and --watch (default: outputs)",
+    )
+    parser.add_argument(
+        "--decode-workers",
+        type=int,
+        help="Image decode and extraction processes for --batch (default: CPU count)",
+    )
+    parser.add_argument(
+        "--generate-workers",
+        type=int,
+        help=(
+            "MIDI generation processes for --batch, conversion processes "
+            "for --watch (default: CPU count)"
+        ),
+    )
+    parser.add_argument(
+        "--index",
+        metavar="PATH",
+        help=(
+            "Record every export (image hash, parameters, tracks, note "
+            "counts, timings) in this SQLite index (see midi_index.py)"
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help=(
+            "Serve repeated seeded requests (same image content, options and "
+            "seed) from a result cache in DIR; unseeded requests are always "
+            "generated afresh"
+        ),
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // MB,
+        help=f"Size limit of the --cache directory (default: {DEFAULT_MAX_BYTES // MB})",
+    )
+    parser.add_argument(
+        "--near-duplicate-bits",
+        type=int,
+        metavar="BITS",
+        help=(
+            "With --cache, reuse the note slices of an earlier image whose "
+            f"perceptual hash differs by at most BITS of 64 (0-{MAX_DISTANCE}, "
+            f"e.g. {DEFAULT_MAX_DISTANCE}) and whose tone matches (default: off)"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIR",
+        help=(
+            "Keep running and convert images dropped into DIR into "
+            "--output-dir as they arrive"
+        ),
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Seconds between --watch scans (default: {DEFAULT_POLL_INTERVAL})",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE_SECONDS,
+        help=(
+            "Seconds a watched file must stay unchanged before it is "
+            f"converted (default: {DEFAULT_SETTLE_SECONDS})"
+        ),
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        default=DEFAULT_BUDGET.max_pixels,
+        help=(
+            "Images above this pixel count are decoded at reduced size "
+            f"(default: {DEFAULT_BUDGET.max_pixels})"
+        ),
+    )
+    parser.add_argument(
+        "--max-decode-mb",
+        type=int,
+        default=DEFAULT_BUDGET.max_memory_bytes // MB,
+        help=(
+            "Largest full decode in MB; bigger images without a reduced "
+            f"decode are rejected (default: {DEFAULT_BUDGET.max_memory_bytes // MB})"
+        ),
+    )
 
     args = parser.parse_args()
+    decode_budget = DEFAULT_BUDGET._replace(
+        max_pixels=args.max_pixels, max_memory_bytes=args.max_decode_mb * MB
+    )
+
+    if args.kernels:
+        try:
+            set_backend(args.kernels)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.slices < 1:
+        parser.error("--slices must be at least 1")
+    if args.bands < 0:
+        parser.error("--bands cannot be negative")
+    if args.max_density is not None and args.max_density <= 0:
+        parser.error("--max-density must be positive")
+    if args.poll_interval <= 0 or args.settle < 0:
+        parser.error("--poll-interval must be positive and --settle non-negative")
+
+    note_reduction: Optional[NoteReduction] = None
+    if args.merge_notes or args.max_density is not None:
+        note_reduction = NoteReduction(args.merge_notes, args.max_density)
+    if "grid" in args.tracks and not args.bands:
+        args.bands = DEFAULT_GRID_BANDS
+    if args.chunked and (
+        args.legacy or args.preview_wav or args.piano_roll or args.events
+    ):
+        parser.error(
+            "--chunked cannot be combined with --legacy, --preview-wav, "
+            "--piano-roll or --events"
+        )
+    if (args.stems or args.stems_zip) and (args.chunked or args.legacy):
+        parser.error("--stems and --stems-zip need the multi-track (non-chunked) mode")
+    if args.cache and (
+        args.batch
+        or args.watch
+        or args.chunked
+        or args.legacy
+        or args.preview_wav
+        or args.piano_roll
+        or args.stems
+        or args.stems_zip
+    ):
+        parser.error(
+            "--cache only applies to single multi-track exports (with or "
+            "without --events)"
+        )
+    if args.cache_mb < 0:
+        parser.error("--cache-mb cannot be negative")
+    if args.near_duplicate_bits is not None:
+        if not args.cache:
+            parser.error("--near-duplicate-bits requires --cache")
+        if not (0 <= args.near_duplicate_bits <= MAX_DISTANCE):
+            parser.error(f"--near-duplicate-bits must be between 0-{MAX_DISTANCE}")
+    if args.progressive and (args.batch or args.watch or args.chunked):
+        parser.error(
+            "--progressive cannot be combined with --batch, --watch or --chunked"
+        )
+    if args.album and (
+        args.image_path
+        or args.batch
+        or args.watch
+        or args.chunked
+        or args.legacy
+        or args.cache
+        or args.progressive
+        or args.preview_wav
+        or args.piano_roll
+        or args.events
+    ):
+        parser.error(
+            "--album takes the place of image_path and cannot be combined with "
+            "--batch, --watch, --chunked, --legacy, --cache, --progressive, "
+            "--preview-wav, --piano-roll or --events"
+        )
+    if args.section_bpm and len(args.section_bpm) != len(args.album or []):
+        parser.error("--section-bpm needs one tempo per --album image")
+    if args.section_bpm and not all(20 <= bpm <= 200 for bpm in args.section_bpm):
+        parser.error("--section-bpm tempos must be between 20-200")
+    if args.transition_slices < 0:
+        parser.error("--transition-slices cannot be negative")
+    if args.stream and (
+        args.batch
+        or args.watch
+        or args.album
+        or args.chunked
+        or args.legacy
+        or args.cache
+        or args.progressive
+        or args.preview_wav
+        or args.piano_roll
+        or args.events
+        or args.stems
+        or args.stems_zip
+        or args.index
+    ):
+        parser.error(
+            "--stream writes no files and cannot be combined with --batch, "
+            "--watch, --album, --chunked, --legacy, --cache, --progressive, "
+            "--preview-wav, --piano-roll, --events, --stems, --stems-zip or --index"
+        )
+    if args.stream_steps < 1:
+        parser.error("--stream-steps must be at least 1")
+    if not (0 <= args.tempo_spread < 1):
+        parser.error("--tempo-spread must be at least 0 and below 1")
+    if args.tempo_spread and (
+        args.legacy or args.batch or args.watch or args.album or args.stream
+    ):
+        parser.error(
+            "--tempo-spread cannot be combined with --legacy, --batch, "
+            "--watch, --album or --stream"
+        )
+
+    # Keep stdout for the event stream; progress messages go to stderr
+    event_output = sys.stdout
+    if args.stream:
+        sys.stdout = sys.stderr
+
+    brightness_curves: Dict[str, MappingCurve] = {}
+    for assignment in args.curve:
+        try:
+            curve_name, curve = parse_curve_assignment(assignment)
+        except ValueError as e:
+            parser.error(str(e))
+        brightness_curves[curve_name] = curve
+
+    groove_bank: Optional[GrooveBank] = None
+    if args.groove_bank:
+        try:
+            groove_bank = load_groove_bank(args.groove_bank)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot load groove bank: {e}")
+
+    export_options = dict(
+        num_slices=args.slices,
+        bpm=args.bpm,
+        duration=args.duration,
+        tracks=args.tracks,
+        ai_mode=args.ai_mode,
+        curves=brightness_curves,
+        budget=decode_budget,
+        num_bands=args.bands,
+        features=args.features,
+        reduction=note_reduction,
+        seed=args.seed,
+        grooves=groove_bank,
+        stems=args.stems,
+        stems_zip=args.stems_zip,
+    )
+
+    def record_exports(
+        exports: List[Tuple[str, List[TrackInfo], str, Dict[str, float]]],
+        duration: Optional[float] = None,
+    ) -> None:
+        """Record (midi_path, tracks, image_path, timings) in the --index."""
+        if not args.index or not exports:
+            return
+        try:
+            with MidiIndex(args.index) as midi_index:
+                for midi_path, export_tracks, source_image, timings in exports:
+                    midi_index.record_export(
+                        midi_path,
+                        export_tracks,
+                        args.duration if duration is None else duration,
+                        source_image,
+                        export_options,
+                        args.seed,
+                        timings,
+                    )
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"⚠️ Could not record exports in {args.index}: {e}")
+
+    def result_timings(result: Dict[str, Any]) -> Dict[str, float]:
+        return {key: value for key, value in result.items() if key.endswith("_seconds")}
+
+    if args.watch:
+
+        def report_watch_result(result: Dict[str, Any]) -> None:
+            if result["ok"]:
+                print(
+                    f"✅ {result['image_path']} → {result['output_path']} "
+                    f"({result['total_notes']} notes)"
+                )
+                record_exports(
+                    [
+                        (
+                            result["output_path"],
+                            result["track_info"],
+                            os.path.join(args.watch, result["image_path"]),
+                            result_timings(result),
+                        )
+                    ]
+                )
+            else:
+                print(f"❌ {result['image_path']}: {result['error']}")
+
+        try:
+            watcher = FolderWatcher(
+                args.watch,
+                args.output_dir,
+                export_options,
+                args.generate_workers,
+                args.settle,
+            )
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+
+        print(f"👀 Watching {args.watch} for images (Ctrl+C to stop)...")
+        try:
+            watcher.run(args.poll_interval, on_result=report_watch_result)
+        except KeyboardInterrupt:
+            print("🛑 Watch stopped")
+        sys.exit(0)
+
+    if args.batch:
+        from batch_export import export_batch, make_export_options
+
+        print(f"📦 Batch converting {len(args.batch)} images...")
+        batch_results = export_batch(
+            args.batch,
+            args.output_dir,
+            make_export_options(**export_options),
+            args.decode_workers,
+            args.generate_workers,
+        )
+        for result in batch_results:
+            if result["ok"]:
+                print(
+                    f"✅ {result['image_path']} → {result['output_path']} "
+                    f"({result['total_notes']} notes)"
+                )
+            else:
+                print(f"❌ {result['image_path']}: {result['error']}")
+        record_exports(
+            [
+                (
+                    result["output_path"],
+                    result["track_info"],
+                    result["image_path"],
+                    result_timings(result),
+                )
+                for result in batch_results
+                if result["ok"]
+            ]
+        )
+        failures = sum(1 for result in batch_results if not result["ok"])
+        print(
+            f"🎉 Batch done: {len(batch_results) - failures} succeeded, {failures} failed"
+        )
+        sys.exit(1 if failures else 0)
+
+    if args.album:
+        from album import build_album_rolls, extract_sections, stitch_sections
+
+        started = time.perf_counter()
+        print(f"💿 Extracting {len(args.album)} album sections...")
+        try:
+            sections = extract_sections(
+                args.album,
+                args.slices,
+                pitch_curve=brightness_curves.get(PITCH_CURVE),
+                budget=decode_budget,
+                num_bands=args.bands,
+                features=args.features,
+                max_workers=args.decode_workers,
+            )
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        extract_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+
+        # A section at twice the tempo plays its slices in half the time
+        section_bpms = args.section_bpm or [args.bpm] * len(args.album)
+        album_notes, slice_durations = stitch_sections(
+            sections,
+            [args.duration * args.bpm / bpm for bpm in section_bpms],
+            args.transition_slices,
+        )
+        print(
+            f"🎼 Creating album of {len(sections)} sections "
+            f"({len(album_notes)} slices, {slice_durations.sum():.1f}s)..."
+        )
+        if args.ai_mode:
+            print("🤖 AI-enhanced generation enabled!")
+        try:
+            album_rolls = build_album_rolls(
+                album_notes,
+                slice_durations,
+                args.bpm,
+                args.tracks,
+                args.ai_mode,
+                brightness_curves,
+                args.seed,
+                groove_bank,
+            )
+            album_rolls = _apply_reduction(album_rolls, note_reduction)
+            output_dir = os.path.dirname(args.output)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            # Section tempos and ramps become the file's tempo map, so
+            # every section stays on the beat grid in a DAW
+            album_tempo = slice_tempo_map(
+                slice_durations, args.bpm, args.duration * args.bpm / 60 / args.slices
+            )
+            print(f"💾 Saving to: {args.output}")
+            _write_midi(album_rolls, args.output, args.bpm, album_tempo)
+            _export_stems(
+                album_rolls,
+                args.output,
+                args.bpm,
+                args.stems,
+                args.stems_zip,
+                album_tempo,
+            )
+        except ValueError as e:
+            print(f"❌ Error: Invalid parameters: {e}")
+            sys.exit(1)
+        except OSError as e:
+            print(f"❌ Error: Cannot write MIDI file: {e}")
+            sys.exit(1)
+        print(
+            f"✅ Album MIDI saved successfully: {args.output} "
+            f"({sum(len(roll) for roll in album_rolls)} notes)"
+        )
+        # Indexed under the opening image
+        record_exports(
+            [
+                (
+                    args.output,
+                    roll_track_infos(album_rolls),
+                    args.album[0],
+                    {
+                        "extract_seconds": extract_seconds,
+                        "generate_seconds": time.perf_counter() - started,
+                    },
+                )
+            ],
+            float(slice_durations.sum()),
+        )
+        print("🎉 Done! Import the MIDI into your DAW for production.")
+        sys.exit(0)
+
+    if not args.image_path:
+        parser.error(
+            "image_path is required unless --batch, --watch or --album is used"
+        )
+
+    # Cached artifact name -> output path
+    cache_outputs = {"mid": args.output}
+    if args.events:
+        cache_outputs["events"] = args.events
+    result_cache: Optional[ResultCache] = None
+    fingerprint = ""
+    if args.cache and args.seed is None:
+        # An unseeded export should sound different every run
+        print("⚠️ Result cache skipped: pass --seed to cache an export")
+    elif args.cache:
+        started = time.perf_counter()
+        cache_params = {
+            key: value
+            for key, value in export_options.items()
+            if key not in ("stems", "stems_zip")
+        }
+        if args.tempo_spread:
+            cache_params["tempo_spread"] = args.tempo_spread
+        try:
+            result_cache = ResultCache(args.cache, args.cache_mb * MB)
+            fingerprint = request_fingerprint(
+                args.image_path, cache_params, GENERATOR_VERSION
+            )
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Result cache disabled: {e}")
+            result_cache = None
+
+    if result_cache is not None:
+        cached = {
+            artifact: result_cache.get(fingerprint, artifact)
+            for artifact in ("meta", *cache_outputs)
+        }
+        cached_meta = cached.pop("meta")
+        if cached_meta is not None and all(
+            data is not None for data in cached.values()
+        ):
+            for artifact, output_path in cache_outputs.items():
+                try:
+                    with open(output_path, "wb") as output_file:
+                        output_file.write(cached[artifact] or b"")
+                except OSError as e:
+                    print(f"❌ Error: Cannot write {output_path}: {e}")
+                    sys.exit(1)
+            print(f"⚡ Served from result cache: {args.output}")
+            record_exports(
+                [
+                    (
+                        args.output,
+                        [
+                            TrackInfo(*track)
+                            for track in json.loads(cached_meta)["tracks"]
+                        ],
+                        args.image_path,
+                        {"cache_seconds": time.perf_counter() - started},
+                    )
+                ]
+            )
+            print("🎉 Done! Import the MIDI into your DAW for production.")
+            sys.exit(0)
+
+    if args.progressive:
+        started = time.perf_counter()
+        preview_path = preview_output_path(args.output)
+        print("⚡ Rendering quick preview...")
+        preview_notes = extract_preview_notes(
+            args.image_path,
+            args.slices,
+            brightness_curves.get(PITCH_CURVE),
+            decode_budget,
+            args.bands,
+            args.features,
+        )
+        if args.legacy:
+            create_midi_from_notes(preview_notes, preview_path, args.bpm, args.duration)
+        else:
+            create_preview = (
+                create_ai_multi_track_midi
+                if args.ai_mode
+                else create_multi_track_midi_from_notes
+            )
+            create_preview(
+                preview_notes,
+                preview_path,
+                args.bpm,
+                args.duration,
+                args.tracks,
+                brightness_curves,
+                note_reduction,
+                args.seed,
+                groove_bank,
+            )
+        print(
+            f"⚡ Preview ready: {preview_path} "
+            f"({(time.perf_counter() - started) * 1000:.0f} ms)",
+            flush=True,
+        )
+
+    started = time.perf_counter()
+    extraction_cache: Optional[ExtractionCache] = None
+    image_dhash = 0
+    image_tone = np.zeros(0, dtype=np.uint8)
+    extraction_options = ""
+    reused_notes: Optional[List[Dict[str, Any]]] = None
+    if args.near_duplicate_bits is not None:
+        extraction_options = options_fingerprint(
+            dict(
+                num_slices=args.slices,
+                pitch_curve=brightness_curves.get(PITCH_CURVE),
+                budget=decode_budget,
+                num_bands=args.bands,
+                features=args.features,
+            )
+        )
+        try:
+            image_dhash, image_tone = image_signature(args.image_path, decode_budget)
+            os.makedirs(args.cache, exist_ok=True)
+            extraction_cache = ExtractionCache(extraction_cache_path(args.cache))
+            reused_notes = extraction_cache.find(
+                image_dhash, image_tone, extraction_options, args.near_duplicate_bits
+            )
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"⚠️ Near-duplicate lookup skipped: {e}")
+
+    if reused_notes is not None:
+        extracted_notes = reused_notes
+        print(
+            f"♻️ Reusing {len(extracted_notes)} note slices of a near-duplicate image"
+        )
+    else:
+        print("🎨 Extracting notes from image...")
+        extracted_notes = extract_notes_from_image(
+            args.image_path,
+            num_slices=args.slices,
+            pitch_curve=brightness_curves.get(PITCH_CURVE),
+            budget=decode_budget,
+            num_bands=args.bands,
+            features=args.features,
+        )
+        print(f"📊 Extracted {len(extracted_notes)} note slices")
+        if extraction_cache is not None:
+            try:
+                extraction_cache.store(
+                    image_dhash, image_tone, extraction_options, extracted_notes
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not store the note slices in {args.cache}: {e}")
+    if extraction_cache is not None:
+        extraction_cache.close()
+    extract_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+
+    if args.stream:
+        from event_stream import stream_json_lines
+
+        print("📡 Streaming note events...")
+        try:
+            event_count = stream_json_lines(
+                extracted_notes,
+                event_output,
+                args.bpm,
+                args.duration,
+                args.tracks,
+                args.ai_mode,
+                brightness_curves,
+                note_reduction,
+                args.seed,
+                groove_bank,
+                args.stream_steps,
+            )
+        except ValueError as e:
+            print(f"❌ Error: Invalid parameters: {e}")
+            sys.exit(1)
+        except BrokenPipeError:
+            # The consumer stopped reading; nothing left to deliver
+            sys.exit(0)
+        print(f"🎉 Streamed {event_count} note events")
+        sys.exit(0)
+
+    tempo_curve: Optional[TempoMap] = None
+    if args.tempo_spread:
+        tempo_curve = brightness_tempo_map(
+            extracted_notes, args.duration, args.bpm, args.tempo_spread
+        )
+        print(
+            f"⏱️ Tempo map: {len(tempo_curve)} changes, "
+            f"{tempo_curve.bpms.min():.1f}-{tempo_curve.bpms.max():.1f} BPM"
+        )
 
-    print("🎨 Extracting notes from image...")
-    extracted_notes = extract_notes_from_image(args.image_path)
-    print(f"📊 Extracted {len(extracted_notes)} note slices")
+    if args.chunked:
+        print("🧱 Creating chunked multi-track MIDI file...")
+        chunked_summary = create_chunked_multi_track_midi(
+            extracted_notes,
+            args.output,
+            args.bpm,
+            args.duration,
+            args.tracks,
+            args.ai_mode,
+            brightness_curves,
+            args.chunk_steps,
+            note_reduction,
+            args.seed,
+            groove_bank,
+            tempo_curve,
+        )
+        record_exports(
+            [
+                (
+                    args.output,
+                    chunked_summary["track_info"],
+                    args.image_path,
+                    {
+                        "extract_seconds": extract_seconds,
+                        "generate_seconds": time.perf_counter() - started,
+                    },
+                )
+            ]
+        )
+        print("🎉 Done! Import the MIDI into your DAW for production.")
+        sys.exit(0)
 
     if args.legacy:
         print("🎵 Creating legacy single-track MIDI file...")
-        create_midi_from_notes(extracted_notes, args.output, args.bpm, args.duration)
+        midi = create_midi_from_notes(
+            extracted_notes, args.output, args.bpm, args.duration
+        )
     else:
         print("🎼 Creating multi-track MIDI file...")
         if args.ai_mode:
             print("🤖 AI-enhanced generation enabled!")
-            create_ai_multi_track_midi(
-                extracted_notes, args.output, args.bpm, args.duration, args.tracks
+            midi = create_ai_multi_track_midi(
+                extracted_notes,
+                args.output,
+                args.bpm,
+                args.duration,
+                args.tracks,
+                brightness_curves,
+                note_reduction,
+                args.seed,
+                groove_bank,
+                args.stems,
+                args.stems_zip,
+                tempo_curve,
             )
         else:
-            create_multi_track_midi_from_notes(
-                extracted_notes, args.output, args.bpm, args.duration, args.tracks
+            midi = create_multi_track_midi_from_notes(
+                extracted_notes,
+                args.output,
+                args.bpm,
+                args.duration,
+                args.tracks,
+                brightness_curves,
+                note_reduction,
+                args.seed,
+                groove_bank,
+                args.stems,
+                args.stems_zip,
+                tempo_curve,
             )
 
         print("🎉 Done! Import the MIDI into your DAW for production.")
+
+    record_exports(
+        [
+            (
+                args.output,
+                track_infos(midi),
+                args.image_path,
+                {
+                    "extract_seconds": extract_seconds,
+                    "generate_seconds": time.perf_counter() - started,
+                },
+            )
+        ]
+    )
+
+    if args.preview_wav:
+        print(f"🔊 Rendering audio preview to: {args.preview_wav}")
+        try:
+            preview_seconds = render_preview_wav(midi, args.preview_wav)
+        except OSError as e:
+            print(f"❌ Error: Cannot write preview WAV: {e}")
+            sys.exit(1)
+        print(f"✅ Preview saved: {args.preview_wav} ({preview_seconds:.1f}s)")
+
+    if args.piano_roll:
+        print(f"🖼️ Rendering piano roll to: {args.piano_roll}")
+        try:
+            roll_width, roll_height = render_piano_roll_png(
+                rolls_from_midi(midi), args.piano_roll
+            )
+        except OSError as e:
+            print(f"❌ Error: Cannot write piano roll image: {e}")
+            sys.exit(1)
+        print(f"✅ Piano roll saved: {args.piano_roll} ({roll_width}x{roll_height})")
+
+    if args.events:
+        print(f"🧾 Writing note events to: {args.events}")
+        try:
+            events_size = write_note_events(
+                args.events,
+                extracted_notes,
+                rolls_from_midi(midi),
+                args.bpm,
+                args.duration,
+            )
+        except OSError as e:
+            print(f"❌ Error: Cannot write note events: {e}")
+            sys.exit(1)
+        print(f"✅ Note events saved: {args.events} ({events_size} bytes)")
+
+    if result_cache is not None:
+        try:
+            for artifact, output_path in cache_outputs.items():
+                with open(output_path, "rb") as written_file:
+                    result_cache.put(fingerprint, artifact, written_file.read())
+            # Stored last: a hit needs the metadata, so a partly stored
+            # result is never served
+            result_cache.put(
+                fingerprint,
+                "meta",
+                json.dumps({"tracks": track_infos(midi)}).encode("utf-8"),
+            )
+        except OSError as e:
+            print(f"⚠️ Could not store the result in {args.cache}: {e}")
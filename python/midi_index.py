@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+SQLite index of generated MIDI files for the Hyper Vibe MIDI Exporter.
+
+Every export can be recorded with its source image hash, parameters,
+seed, tracks, note counts, duration, file size and timings. Existing .mid
+files are indexed incrementally: a scan only parses files whose mtime or
+size changed since the last scan and drops rows for deleted files. Listing
+and searching the library is then an indexed query.
+
+Command line:
+    python midi_index.py INDEX scan DIR [DIR ...]
+    python midi_index.py INDEX list [--track NAME] [--image-hash HASH] [--limit N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import pretty_midi  # type: ignore
+
+from piano_roll import PianoRoll
+
+SCHEMA_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    image_path TEXT,
+    image_hash TEXT,
+    params TEXT,
+    seed INTEGER,
+    track_count INTEGER NOT NULL,
+    note_count INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    timings TEXT,
+    source TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exports_image_hash ON exports (image_hash);
+CREATE INDEX IF NOT EXISTS exports_mtime ON exports (mtime_ns);
+CREATE TABLE IF NOT EXISTS tracks (
+    export_id INTEGER NOT NULL REFERENCES exports (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    program INTEGER NOT NULL,
+    is_drum INTEGER NOT NULL,
+    note_count INTEGER NOT NULL,
+    PRIMARY KEY (export_id, position)
+);
+CREATE INDEX IF NOT EXISTS tracks_name ON tracks (name);
+"""
+
+
+class TrackInfo(NamedTuple):
+    """Summary of one track of an exported file."""
+
+    name: str
+    program: int
+    is_drum: bool
+    note_count: int
+
+
+class ScanResult(NamedTuple):
+    """Counts from an incremental directory scan."""
+
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+
+
+def track_infos(midi: pretty_midi.PrettyMIDI) -> List[TrackInfo]:
+    """Track summaries of a MIDI object."""
+    return [
+        TrackInfo(inst.name, inst.program, inst.is_drum, len(inst.notes))
+        for inst in midi.instruments
+    ]
+
+
+def roll_track_infos(rolls: Sequence[PianoRoll]) -> List[TrackInfo]:
+    """Track summaries of generated rolls."""
+    return [
+        TrackInfo(roll.name, roll.program, roll.is_drum, len(roll)) for roll in rolls
+    ]
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_json(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    """JSON for stored parameters; objects such as curves use their repr."""
+    if value is None:
+        return None
+    return json.dumps(value, default=repr, sort_keys=True)
+
+
+class MidiIndex:
+    """A SQLite index of exported and scanned MIDI files."""
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the index database.
+
+        Raises:
+            ValueError: If the database was created by a newer version
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(
+                f"MIDI index {path} has schema version {version}, "
+                f"this exporter supports {SCHEMA_VERSION}"
+            )
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "MidiIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _upsert(
+        self,
+        midi_path: str,
+        tracks: Sequence[TrackInfo],
+        duration: float,
+        source: str,
+        image_path: Optional[str] = None,
+        image_hash: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """Insert or replace the row for one file and its tracks."""
+        stat = os.stat(midi_path)
+        with self.connection:
+            cursor = self.connection.execute(
+                """
+                INSERT INTO exports (
+                    path, image_path, image_hash, params, seed, track_count,
+                    note_count, duration, file_size, mtime_ns, timings, source,
+                    indexed_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    image_path = excluded.image_path,
+                    image_hash = excluded.image_hash,
+                    params = excluded.params,
+                    seed = excluded.seed,
+                    track_count = excluded.track_count,
+                    note_count = excluded.note_count,
+                    duration = excluded.duration,
+                    file_size = excluded.file_size,
+                    mtime_ns = excluded.mtime_ns,
+                    timings = excluded.timings,
+                    source = excluded.source,
+                    indexed_at = excluded.indexed_at
+                RETURNING id
+                """,
+                (
+                    midi_path,
+                    image_path,
+                    image_hash,
+                    _to_json(params),
+                    seed,
+                    len(tracks),
+                    sum(track.note_count for track in tracks),
+                    duration,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    _to_json(timings),
+                    source,
+                    time.time(),
+                ),
+            )
+            export_id: int = cursor.fetchone()[0]
+            self.connection.execute(
+                "DELETE FROM tracks WHERE export_id = ?", (export_id,)
+            )
+            self.connection.executemany(
+                "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (export_id, position, *track)
+                    for position, track in enumerate(tracks)
+                ],
+            )
+        return export_id
+
+    def record_export(
+        self,
+        midi_path: str,
+        tracks: Sequence[TrackInfo],
+        duration: float,
+        image_path: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """
+        Record a file the exporter just wrote.
+
+        Args:
+            midi_path: The written MIDI file
+            tracks: Track summaries (see track_infos)
+            duration: Arrangement length in seconds
+            image_path: Source image, hashed for duplicate lookups
+            params: Export parameters (stored as JSON)
+            seed: Random seed used, if any
+            timings: Stage timings in seconds (stored as JSON)
+
+        Returns:
+            Row id of the export
+
+        Raises:
+            OSError: If the MIDI file or source image cannot be read
+        """
+        midi_path = os.path.abspath(midi_path)
+        image_hash = None
+        if image_path is not None:
+            image_hash = file_sha256(image_path)
+            image_path = os.path.abspath(image_path)
+        return self._upsert(
+            midi_path,
+            tracks,
+            duration,
+            "export",
+            image_path,
+            image_hash,
+            params,
+            seed,
+            timings,
+        )
+
+    def scan(self, directory: str) -> ScanResult:
+        """
+        Index the .mid files under a directory incrementally.
+
+        Files whose mtime and size match their row are skipped; new or
+        changed files are parsed, keeping any export metadata already
+        recorded for them; rows for files that no longer exist are removed.
+        Files that cannot be parsed are skipped.
+
+        Raises:
+            ValueError: If the directory does not exist
+        """
+        if not os.path.isdir(directory):
+            raise ValueError(f"Scan directory does not exist: {directory}")
+        directory = os.path.abspath(directory)
+        known = {
+            row["path"]: (row["mtime_ns"], row["file_size"], row["source"])
+            for row in self.connection.execute(
+                "SELECT path, mtime_ns, file_size, source FROM exports "
+                "WHERE path LIKE ? ESCAPE '\\'",
+                (_like_prefix(directory),),
+            )
+        }
+
+        added = updated = unchanged = 0
+        seen = set()
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                if not file_name.lower().endswith((".mid", ".midi")):
+                    continue
+                path = os.path.join(root, file_name)
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                previous = known.get(path)
+                if previous is not None and previous[:2] == (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                ):
+                    unchanged += 1
+                    continue
+                try:
+                    midi = pretty_midi.PrettyMIDI(path)
+                except Exception:
+                    continue  # Not a readable MIDI file
+                self._rescan(path, midi, previous is not None)
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+
+        removed = [path for path in known if path not in seen]
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM exports WHERE path = ?", [(path,) for path in removed]
+            )
+        return ScanResult(added, updated, len(removed), unchanged)
+
+    def _rescan(self, path: str, midi: pretty_midi.PrettyMIDI, known: bool) -> None:
+        """Update the parsed fields of a scanned file, keeping export data."""
+        if not known:
+            self._upsert(path, track_infos(midi), midi.get_end_time(), "scan")
+            return
+        row = self.connection.execute(
+            "SELECT image_path, image_hash, params, seed, timings, source "
+            "FROM exports WHERE path = ?",
+            (path,),
+        ).fetchone()
+        self._upsert(
+            path,
+            track_infos(midi),
+            midi.get_end_time(),
+            row["source"],
+            row["image_path"],
+            row["image_hash"],
+            json.loads(row["params"]) if row["params"] else None,
+            row["seed"],
+            json.loads(row["timings"]) if row["timings"] else None,
+        )
+
+    def search(
+        self,
+        track: Optional[str] = None,
+        image_hash: Optional[str] = None,
+        directory: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        List indexed files, newest first.
+
+        Args:
+            track: Only files with a track of this name
+            image_hash: Only files generated from this image
+            directory: Only files under this directory
+            limit: Maximum number of results
+
+        Returns:
+            One dict per file with its columns and a "tracks" list
+        """
+        clauses, values = [], []
+        if track is not None:
+            clauses.append(
+                "id IN (SELECT export_id FROM tracks WHERE name = ? COLLATE NOCASE)"
+            )
+            values.append(track)
+        if image_hash is not None:
+            clauses.append("image_hash = ?")
+            values.append(image_hash)
+        if directory is not None:
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            values.append(_like_prefix(os.path.abspath(directory)))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self.connection.execute(
+            f"SELECT * FROM exports {where} ORDER BY mtime_ns DESC LIMIT ?",
+            (*values, limit),
+        ).fetchall()
+        if not rows:
+            return []
+
+        tracks: Dict[int, List[Dict[str, Any]]] = {row["id"]: [] for row in rows}
+        placeholders = ", ".join("?" * len(rows))
+        for track_row in self.connection.execute(
+            f"SELECT * FROM tracks WHERE export_id IN ({placeholders}) "
+            "ORDER BY export_id, position",
+            list(tracks),
+        ):
+            tracks[track_row["export_id"]].append(
+                {
+                    "name": track_row["name"],
+                    "program": track_row["program"],
+                    "is_drum": bool(track_row["is_drum"]),
+                    "note_count": track_row["note_count"],
+                }
+            )
+
+        results = []
+        for row in rows:
+            entry = dict(row)
+            for column in ("params", "timings"):
+                entry[column] = json.loads(entry[column]) if entry[column] else None
+            entry["tracks"] = tracks[row["id"]]
+            results.append(entry)
+        return results
+
+
+def _like_prefix(directory: str) -> str:
+    """LIKE pattern matching every path below a directory."""
+    escaped = directory.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.rstrip(os.sep) + os.sep + "%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Index generated MIDI files and query the index"
+    )
+    parser.add_argument("index", help="Path of the SQLite index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan_parser = commands.add_parser("scan", help="Index .mid files incrementally")
+    scan_parser.add_argument("directories", nargs="+")
+    list_parser = commands.add_parser("list", help="Print indexed files as JSON")
+    list_parser.add_argument("--track", help="Only files with this track name")
+    list_parser.add_argument("--image-hash", help="Only files from this image")
+    list_parser.add_argument("--dir", help="Only files under this directory")
+    list_parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        with MidiIndex(args.index) as midi_index:
+            if args.command == "scan":
+                for scan_dir in args.directories:
+                    result = midi_index.scan(scan_dir)
+                    print(
+                        f"🗂️ {scan_dir}: {result.added} added, {result.updated} "
+                        f"updated, {result.removed} removed, "
+                        f"{result.unchanged} unchanged"
+                    )
+            else:
+                json.dump(
+                    midi_index.search(
+                        args.track, args.image_hash, args.dir, args.limit
+                    ),
+                    sys.stdout,
+                    indent=1,
+                )
+                print()
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
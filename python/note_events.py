@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Binary note-event interchange format for the Hyper Vibe front end.
+
+A compact, versioned file holding the extracted slices and the generated
+notes as fixed-width little-endian records, so Node / the browser can
+read them with typed arrays and Python with np.frombuffer, without
+parsing MIDI. Layout (every section starts on a 4-byte boundary):
+
+    header   32 bytes   HEADER_DTYPE
+    tracks   40 bytes   TRACK_DTYPE x track_count
+    slices   16 bytes   SLICE_DTYPE x slice_count
+    events   12 bytes   EVENT_DTYPE x event_count, sorted by start time
+
+Readers must check the magic and version and skip `header_size` bytes
+to reach the track table, so later versions can grow the header. The
+JavaScript reader lives in js/note-events.js.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Sequence, Union
+
+import numpy as np
+
+from piano_roll import PianoRoll
+
+MAGIC = b"HVNE"
+FORMAT_VERSION = 1
+TRACK_NAME_BYTES = 32
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u2"),
+        ("header_size", "<u2"),
+        ("bpm", "<f4"),
+        ("duration", "<f4"),
+        ("track_count", "<u2"),
+        ("reserved", "<u2"),
+        ("slice_count", "<u4"),
+        ("event_count", "<u4"),
+        ("reserved2", "<u4"),
+    ]
+)
+
+TRACK_DTYPE = np.dtype(
+    [
+        ("name", f"S{TRACK_NAME_BYTES}"),  # UTF-8, NUL padded
+        ("program", "u1"),
+        ("is_drum", "u1"),
+        ("reserved", "<u2"),
+        ("event_count", "<u4"),
+    ]
+)
+
+SLICE_DTYPE = np.dtype(
+    [
+        ("midi", "<i2"),
+        ("chord", "<i2", (3,)),
+        ("position", "<f4"),
+        ("brightness", "<f4"),
+    ]
+)
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("start", "<f4"),  # Seconds
+        ("end", "<f4"),
+        ("track", "u1"),  # Index into the track table
+        ("pitch", "u1"),
+        ("velocity", "u1"),
+        ("reserved", "u1"),
+    ]
+)
+
+
+class NoteEvents(NamedTuple):
+    """A decoded note-event file."""
+
+    bpm: float
+    duration: float
+    tracks: np.ndarray  # TRACK_DTYPE
+    slices: np.ndarray  # SLICE_DTYPE
+    events: np.ndarray  # EVENT_DTYPE
+
+    def track_names(self) -> List[str]:
+        """Decoded track names, in track-table order."""
+        return [name.decode("utf-8", "replace") for name in self.tracks["name"]]
+
+
+def _track_name(name: str) -> bytes:
+    """UTF-8 name cut to the fixed field without splitting a character."""
+    encoded = name.encode("utf-8")[:TRACK_NAME_BYTES]
+    return encoded.decode("utf-8", "ignore").encode("utf-8")
+
+
+def encode_note_events(
+    notes: List[Dict[str, Any]],
+    rolls: Sequence[PianoRoll],
+    bpm: float,
+    duration: float,
+) -> bytes:
+    """
+    Pack note slices and generated tracks into the binary format.
+
+    Args:
+        notes: Note slices from extract_notes_from_image
+        rolls: Generated tracks, e.g. rolls_from_midi(midi)
+        bpm: Tempo of the arrangement
+        duration: Length of the arrangement in seconds
+
+    Returns:
+        The encoded file contents
+
+    Raises:
+        ValueError: If there are more than 255 tracks
+    """
+    if len(rolls) > 255:
+        raise ValueError(f"At most 255 tracks can be encoded, got {len(rolls)}")
+
+    tracks = np.zeros(len(rolls), dtype=TRACK_DTYPE)
+    tracks["name"] = [_track_name(roll.name) for roll in rolls]
+    tracks["program"] = [roll.program for roll in rolls]
+    tracks["is_drum"] = [roll.is_drum for roll in rolls]
+    tracks["event_count"] = [len(roll) for roll in rolls]
+
+    slices = np.zeros(len(notes), dtype=SLICE_DTYPE)
+    if notes:
+        slices["midi"] = [note_data["midi"] for note_data in notes]
+        slices["chord"] = [note_data["chord"][:3] for note_data in notes]
+        slices["position"] = [note_data.get("position", 0.0) for note_data in notes]
+        slices["brightness"] = [note_data["brightness"] for note_data in notes]
+
+    events = np.zeros(sum(len(roll) for roll in rolls), dtype=EVENT_DTYPE)
+    if len(events):
+        events["start"] = np.concatenate([roll.starts for roll in rolls])
+        events["end"] = np.concatenate([roll.ends for roll in rolls])
+        events["track"] = np.repeat(np.arange(len(rolls)), tracks["event_count"])
+        events["pitch"] = np.concatenate([roll.pitches for roll in rolls])
+        events["velocity"] = np.concatenate([roll.velocities for roll in rolls])
+        events = events[np.argsort(events["start"], kind="stable")]
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["header_size"] = HEADER_DTYPE.itemsize
+    header["bpm"] = bpm
+    header["duration"] = duration
+    header["track_count"] = len(tracks)
+    header["slice_count"] = len(slices)
+    header["event_count"] = len(events)
+
+    return b"".join(array.tobytes() for array in (header, tracks, slices, events))
+
+
+def decode_note_events(data: Union[bytes, bytearray, memoryview]) -> NoteEvents:
+    """
+    Decode a note-event file without copying its record sections.
+
+    Raises:
+        ValueError: If the data is not a supported note-event file
+    """
+    if len(data) < HEADER_DTYPE.itemsize:
+        raise ValueError("Note-event data is shorter than its header")
+    header = np.frombuffer(data, HEADER_DTYPE, count=1)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError("Not a note-event file (bad magic)")
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported note-event version {header['version']}, "
+            f"expected {FORMAT_VERSION}"
+        )
+
+    offset = int(header["header_size"])
+    sections = []
+    for dtype, count in (
+        (TRACK_DTYPE, int(header["track_count"])),
+        (SLICE_DTYPE, int(header["slice_count"])),
+        (EVENT_DTYPE, int(header["event_count"])),
+    ):
+        if offset + dtype.itemsize * count > len(data):
+            raise ValueError("Note-event data is truncated")
+        sections.append(np.frombuffer(data, dtype, count=count, offset=offset))
+        offset += dtype.itemsize * count
+
+    tracks, slices, events = sections
+    return NoteEvents(
+        float(header["bpm"]), float(header["duration"]), tracks, slices, events
+    )
+
+
+def write_note_events(
+    output_path: str,
+    notes: List[Dict[str, Any]],
+    rolls: Sequence[PianoRoll],
+    bpm: float,
+    duration: float,
+) -> int:
+    """
+    Write the binary note-event file.
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    data = encode_note_events(notes, rolls, bpm, duration)
+    with open(output_path, "wb") as events_file:
+        events_file.write(data)
+    return len(data)
+
+
+def read_note_events(path: str) -> NoteEvents:
+    """
+    Read a binary note-event file.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it is not a supported note-event file
+    """
+    with open(path, "rb") as events_file:
+        return decode_note_events(events_file.read())
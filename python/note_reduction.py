@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Note merging and event-density reduction for generated tracks.
+
+The generators emit one note per slice, so a held pitch comes out as a
+chain of re-articulated notes. Before a track is serialized it can be
+reduced with vectorized run-length operations on its note arrays:
+
+    merge  - contiguous or overlapping notes of the same pitch become one
+             sustained note (drum tracks are never merged)
+    limit  - at most N notes start in any one-second window; the loudest
+             are kept
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from piano_roll import PianoRoll
+
+# Notes separated by less than this (seconds) count as contiguous
+MERGE_TOLERANCE = 1e-6
+
+NoteColumns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class NoteReduction(NamedTuple):
+    """Which reduction steps to apply to every track."""
+
+    merge_repeats: bool = True
+    max_notes_per_second: Optional[float] = None
+
+
+def merge_repeated_notes(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    pitches: np.ndarray,
+    velocities: np.ndarray,
+    tolerance: float = MERGE_TOLERANCE,
+) -> NoteColumns:
+    """
+    Merge runs of same-pitch notes that touch or overlap.
+
+    A merged note starts with the first note of its run, keeps that note's
+    velocity and ends with the latest end in the run.
+
+    Returns:
+        The merged (starts, ends, pitches, velocities), sorted by start
+    """
+    if len(starts) < 2:
+        return starts, ends, pitches, velocities
+
+    order = np.lexsort((starts, pitches))
+    starts, ends = starts[order], ends[order]
+    pitches, velocities = pitches[order], velocities[order]
+
+    # Running latest end within each pitch group: offsetting every group by
+    # its pitch keeps one cumulative max from leaking across groups
+    offset = (ends.max() - starts.min() + 1.0) * pitches
+    reach = np.maximum.accumulate(ends - starts.min() + offset) - offset
+    reach += starts.min()
+
+    new_run = np.ones(len(starts), dtype=bool)
+    new_run[1:] = (pitches[1:] != pitches[:-1]) | (starts[1:] > reach[:-1] + tolerance)
+    run_starts = np.flatnonzero(new_run)
+
+    merged = (
+        starts[run_starts],
+        np.maximum.reduceat(ends, run_starts),
+        pitches[run_starts],
+        velocities[run_starts],
+    )
+    by_time = np.argsort(merged[0], kind="stable")
+    return (
+        merged[0][by_time],
+        merged[1][by_time],
+        merged[2][by_time],
+        merged[3][by_time],
+    )
+
+
+def limit_note_density(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    pitches: np.ndarray,
+    velocities: np.ndarray,
+    max_notes_per_second: float,
+    window: float = 1.0,
+) -> NoteColumns:
+    """
+    Keep at most max_notes_per_second * window note starts per window.
+
+    The loudest notes of a crowded window are kept (earliest first on ties).
+
+    Returns:
+        The remaining (starts, ends, pitches, velocities), sorted by start
+    """
+    if max_notes_per_second <= 0:
+        raise ValueError(
+            f"Note density must be positive, got {max_notes_per_second} per second"
+        )
+
+    per_window = max(1, int(max_notes_per_second * window))
+    bins = np.floor(starts / window).astype(np.int64)
+
+    order = np.lexsort((starts, -velocities, bins))
+    sorted_bins = bins[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_bins[1:] != sorted_bins[:-1]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+    rank = np.arange(len(order)) - group_start
+
+    keep = np.sort(order[rank < per_window])
+    return starts[keep], ends[keep], pitches[keep], velocities[keep]
+
+
+def reduce_roll(roll: PianoRoll, reduction: NoteReduction) -> PianoRoll:
+    """Apply the reduction to one piano roll."""
+    if len(roll) == 0:
+        return roll
+
+    columns = roll.columns()
+    if reduction.merge_repeats and not roll.is_drum:
+        columns = merge_repeated_notes(*columns)
+    if reduction.max_notes_per_second is not None:
+        columns = limit_note_density(*columns, reduction.max_notes_per_second)
+    return PianoRoll(*columns, roll.name, roll.program, roll.is_drum)
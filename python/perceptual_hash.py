@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Perceptual hashing and near-duplicate reuse of extraction results.
+
+A 64-bit difference hash (dHash) is computed from a tiny decode: the image
+is shrunk to 9x8 grayscale and each bit records whether a pixel is
+brighter than its right-hand neighbour. Re-encoded or resized copies of a
+picture land within a few bits of each other, while exact content hashes
+differ completely.
+
+dHash ignores absolute brightness, which is what the note slices encode,
+so a darkened copy hashes like the original. Each image therefore also
+gets a tone profile, the mean luma of every thumbnail column, and a
+near-duplicate must match it within a tolerance too.
+
+ExtractionCache stores the note slices of each extraction under its hash,
+tone profile and extraction options. The hash is split into eight 8-bit
+bands, each an indexed column: two hashes at most 7 bits apart agree on
+at least one band, so a lookup reads only the rows sharing a band and
+needs no in-memory index.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image  # type: ignore
+
+from image_preflight import DEFAULT_BUDGET, DecodeBudget, decode_pixels, preflight_image
+
+HASH_SIZE = 8  # 8x8 comparisons, 64 bits
+DEFAULT_MAX_DISTANCE = 4
+DEFAULT_TONE_TOLERANCE = 8  # Luma levels per thumbnail column
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Band lookup of a 64-bit hash; finds every match up to MAX_DISTANCE bits
+NUM_BANDS = 8
+BAND_BITS = 8
+MAX_DISTANCE = NUM_BANDS - 1
+
+# Decode width for hashing; only the 9x8 thumbnail matters
+_HASH_DECODE_WIDTH = 64
+
+_BAND_COLUMNS = [f"band{index}" for index in range(NUM_BANDS)]
+
+
+def _thumbnail(pixels: np.ndarray, hash_size: int) -> np.ndarray:
+    """Grayscale (hash_size + 1) x hash_size thumbnail as int16."""
+    image = Image.fromarray(np.asarray(pixels, dtype=np.uint8)).convert("L")
+    thumb: np.ndarray = np.asarray(
+        image.resize((hash_size + 1, hash_size), Image.Resampling.BOX),
+        dtype=np.int16,
+    )
+    return thumb
+
+
+def dhash_pixels(pixels: np.ndarray, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of a grayscale (or RGB) pixel array.
+
+    Returns:
+        hash_size * hash_size bit integer
+    """
+    thumb = _thumbnail(pixels, hash_size)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def tone_profile(pixels: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """Mean luma of each column of the hash thumbnail, as uint8."""
+    profile: np.ndarray = np.rint(_thumbnail(pixels, hash_size).mean(axis=0)).astype(
+        np.uint8
+    )
+    return profile
+
+
+def image_signature(
+    image_path: str, budget: Optional[DecodeBudget] = None, hash_size: int = HASH_SIZE
+) -> Tuple[int, np.ndarray]:
+    """
+    Difference hash and tone profile of an image file, from one reduced
+    decode where the format allows one (see image_preflight).
+
+    Raises:
+        OSError: If the file is not a readable image
+        ValueError: If the image is rejected by the decode budget
+    """
+    budget = (budget or DEFAULT_BUDGET)._replace(max_pixels=0)
+    plan = preflight_image(image_path, _HASH_DECODE_WIDTH, budget)
+    pixels = decode_pixels(image_path, plan, _HASH_DECODE_WIDTH)
+    return dhash_pixels(pixels, hash_size), tone_profile(pixels, hash_size)
+
+
+def dhash_image(
+    image_path: str, budget: Optional[DecodeBudget] = None, hash_size: int = HASH_SIZE
+) -> int:
+    """Difference hash of an image file (see image_signature)."""
+    return image_signature(image_path, budget, hash_size)[0]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def hash_bands(dhash: int) -> List[int]:
+    """The NUM_BANDS indexed BAND_BITS-bit pieces of a hash."""
+    mask = (1 << BAND_BITS) - 1
+    return [(dhash >> (BAND_BITS * index)) & mask for index in range(NUM_BANDS)]
+
+
+def tone_difference(a: np.ndarray, b: np.ndarray) -> int:
+    """Largest per-column luma difference of two tone profiles."""
+    if len(a) != len(b):
+        return 255
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max(initial=0))
+
+
+class ExtractionCache:
+    """Note slices of earlier extractions, looked up by perceptual hash."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: SQLite file
+            max_entries: Oldest extractions beyond this many are dropped
+
+        Raises:
+            ValueError: If max_entries is less than 1
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(extractions)")
+        }
+        with self.connection:
+            if columns and "tone" not in columns:
+                # Written before tone profiles; it is only a cache
+                self.connection.execute("DROP TABLE extractions")
+            band_columns = "".join(
+                f"{column} INTEGER NOT NULL,\n" for column in _BAND_COLUMNS
+            )
+            self.connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    id INTEGER PRIMARY KEY,
+                    dhash TEXT NOT NULL,
+                    tone BLOB NOT NULL,
+                    options TEXT NOT NULL,
+                    notes TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    {band_columns}
+                    UNIQUE (options, dhash)
+                )
+                """)
+            for column in _BAND_COLUMNS:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS extractions_{column} "
+                    f"ON extractions (options, {column})"
+                )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ExtractionCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def find(
+        self,
+        dhash: int,
+        tone: np.ndarray,
+        options: str,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        tone_tolerance: int = DEFAULT_TONE_TOLERANCE,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Note slices of the closest earlier extraction with the same options.
+
+        Args:
+            dhash: Perceptual hash of the new image
+            tone: Tone profile of the new image
+            options: Fingerprint of the extraction options
+            max_distance: Largest Hamming distance that counts as a duplicate
+            tone_tolerance: Largest per-column luma difference allowed
+
+        Returns:
+            The stored notes, or None if there is no near-duplicate
+
+        Raises:
+            ValueError: If max_distance is outside 0-MAX_DISTANCE
+        """
+        if not (0 <= max_distance <= MAX_DISTANCE):
+            raise ValueError(
+                f"max_distance must be between 0-{MAX_DISTANCE}, got {max_distance}"
+            )
+        # Any hash within MAX_DISTANCE bits shares at least one band; one
+        # indexed lookup per band
+        query = " UNION ".join(
+            f"SELECT id, dhash, tone FROM extractions WHERE options = ? AND {column} = ?"
+            for column in _BAND_COLUMNS
+        )
+        parameters = [value for band in hash_bands(dhash) for value in (options, band)]
+        candidates = []
+        for row_id, stored_hash, stored_tone in self.connection.execute(
+            query, parameters
+        ):
+            distance = hamming_distance(dhash, int(stored_hash, 16))
+            tone_delta = tone_difference(tone, np.frombuffer(stored_tone, np.uint8))
+            if distance <= max_distance and tone_delta <= tone_tolerance:
+                candidates.append((distance, tone_delta, row_id))
+
+        for _, _, row_id in sorted(candidates):
+            row = self.connection.execute(
+                "SELECT notes FROM extractions WHERE id = ?", (row_id,)
+            ).fetchone()
+            if row is not None:  # Skip rows evicted by another process
+                notes: List[Dict[str, Any]] = json.loads(row[0])
+                return notes
+        return None
+
+    def store(
+        self,
+        dhash: int,
+        tone: np.ndarray,
+        options: str,
+        notes: List[Dict[str, Any]],
+    ) -> None:
+        """Record an extraction and drop the oldest beyond max_entries."""
+        columns = ", ".join(_BAND_COLUMNS)
+        placeholders = ", ".join("?" * NUM_BANDS)
+        with self.connection:
+            self.connection.execute(
+                f"""
+                INSERT INTO extractions
+                    (dhash, tone, options, notes, created_at, {columns})
+                VALUES (?, ?, ?, ?, ?, {placeholders})
+                ON CONFLICT (options, dhash) DO UPDATE SET
+                    tone = excluded.tone,
+                    notes = excluded.notes,
+                    created_at = excluded.created_at
+                """,
+                (
+                    f"{dhash:016x}",
+                    np.asarray(tone, dtype=np.uint8).tobytes(),
+                    options,
+                    json.dumps(notes),
+                    time.time(),
+                    *hash_bands(dhash),
+                ),
+            )
+            self.connection.execute(
+                "DELETE FROM extractions WHERE id NOT IN "
+                "(SELECT id FROM extractions ORDER BY created_at DESC, id DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+def extraction_cache_path(cache_dir: str) -> str:
+    """Location of the extraction cache inside a --cache directory."""
+    return os.path.join(cache_dir, "extractions.sqlite")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Piano-roll track representation for the Hyper Vibe MIDI Exporter.
+
+A PianoRoll stores one track's notes as parallel NumPy arrays (a sparse
+COO layout: start, end, pitch, velocity), so transformations such as
+transpose, quantize, mute and merge are single array operations. It
+converts to and from pretty_midi instruments, a dense uint8 velocity
+matrix of pitch x step, a Standard MIDI File, and a PNG preview.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pretty_midi  # type: ignore
+from PIL import Image  # type: ignore
+
+from smf_writer import StreamingMidiWriter
+from tempo_map import TempoMap
+
+NUM_PITCHES = 128
+
+# Track colours for the PNG preview (RGB)
+_TRACK_COLOURS = [
+    (255, 196, 64),
+    (96, 200, 255),
+    (255, 96, 128),
+    (128, 255, 128),
+    (200, 128, 255),
+    (255, 255, 255),
+]
+
+
+class PianoRoll:
+    """One track's notes as columnar arrays plus its instrument settings."""
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        pitches: np.ndarray,
+        velocities: np.ndarray,
+        name: str = "",
+        program: int = 0,
+        is_drum: bool = False,
+    ):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.pitches = np.asarray(pitches, dtype=np.int16)
+        self.velocities = np.asarray(velocities, dtype=np.int16)
+        self.name = name
+        self.program = program
+        self.is_drum = is_drum
+
+    @classmethod
+    def from_instrument(cls, instrument: pretty_midi.Instrument) -> "PianoRoll":
+        """Copy a pretty_midi instrument's notes into arrays."""
+        notes = instrument.notes
+        return cls(
+            np.fromiter((note.start for note in notes), np.float64, len(notes)),
+            np.fromiter((note.end for note in notes), np.float64, len(notes)),
+            np.fromiter((note.pitch for note in notes), np.int16, len(notes)),
+            np.fromiter((note.velocity for note in notes), np.int16, len(notes)),
+            instrument.name,
+            instrument.program,
+            instrument.is_drum,
+        )
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix: np.ndarray,
+        step_duration: float,
+        name: str = "",
+        program: int = 0,
+        is_drum: bool = False,
+    ) -> "PianoRoll":
+        """
+        Decode a pitch x step velocity matrix into notes.
+
+        Consecutive steps of one pitch with the same velocity form a note.
+        """
+        num_pitches, num_steps = matrix.shape
+        padded = np.zeros((num_pitches, num_steps + 2), dtype=matrix.dtype)
+        padded[:, 1:-1] = matrix
+
+        # Every point where a pitch's velocity changes; runs end at the next one
+        rows, cols = np.nonzero(padded[:, 1:] != padded[:, :-1])
+        values = padded[rows, cols + 1]
+        is_start = values != 0
+        run_ends = np.append(cols[1:], num_steps)[is_start]
+
+        return cls(
+            cols[is_start] * step_duration,
+            run_ends * step_duration,
+            rows[is_start],
+            values[is_start],
+            name,
+            program,
+            is_drum,
+        )
+
+    def _with(self, keep: Optional[np.ndarray] = None, **columns) -> "PianoRoll":
+        """A copy with some columns replaced and/or only the `keep` notes."""
+        arrays = {
+            "starts": self.starts,
+            "ends": self.ends,
+            "pitches": self.pitches,
+            "velocities": self.velocities,
+            **columns,
+        }
+        if keep is not None:
+            arrays = {key: value[keep] for key, value in arrays.items()}
+        return PianoRoll(
+            name=self.name, program=self.program, is_drum=self.is_drum, **arrays
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(starts, ends, pitches, velocities)."""
+        return self.starts, self.ends, self.pitches, self.velocities
+
+    @property
+    def end_time(self) -> float:
+        """Time the last note ends (0 for an empty roll)."""
+        return float(self.ends.max()) if len(self) else 0.0
+
+    def sorted(self) -> "PianoRoll":
+        """Notes ordered by start time, then pitch."""
+        return self._with(np.lexsort((self.pitches, self.starts)))
+
+    def shift(self, seconds: float) -> "PianoRoll":
+        """Every note moved later by `seconds`."""
+        return self._with(starts=self.starts + seconds, ends=self.ends + seconds)
+
+    def transpose(self, semitones: int) -> "PianoRoll":
+        """Shift pitched notes; notes pushed outside 0-127 are dropped."""
+        if self.is_drum:
+            return self._with()
+        pitches = self.pitches + semitones
+        keep = (pitches >= 0) & (pitches < NUM_PITCHES)
+        return self._with(keep, pitches=pitches)
+
+    def quantize(self, step_duration: float) -> "PianoRoll":
+        """Snap note starts and ends to a grid; every note keeps one step."""
+        starts = np.round(self.starts / step_duration) * step_duration
+        ends = np.round(self.ends / step_duration) * step_duration
+        return self._with(starts=starts, ends=np.maximum(ends, starts + step_duration))
+
+    def retime(self, tempo_map: TempoMap, bpm: float) -> "PianoRoll":
+        """Move notes laid out at a fixed `bpm` to real time under a tempo map."""
+        return self._with(
+            starts=tempo_map.to_seconds(self.starts, bpm),
+            ends=tempo_map.to_seconds(self.ends, bpm),
+        )
+
+    def mute(
+        self,
+        pitch_range: Optional[Tuple[int, int]] = None,
+        time_range: Optional[Tuple[float, float]] = None,
+    ) -> "PianoRoll":
+        """Remove notes with pitch in [low, high] starting in [start, end)."""
+        muted = np.ones(len(self), dtype=bool)
+        if pitch_range is not None:
+            muted &= (self.pitches >= pitch_range[0]) & (self.pitches <= pitch_range[1])
+        if time_range is not None:
+            muted &= (self.starts >= time_range[0]) & (self.starts < time_range[1])
+        return self._with(~muted)
+
+    def merge(self, *others: "PianoRoll") -> "PianoRoll":
+        """Combine notes of several rolls under this roll's settings."""
+        rolls = (self,) + others
+        return PianoRoll(
+            np.concatenate([roll.starts for roll in rolls]),
+            np.concatenate([roll.ends for roll in rolls]),
+            np.concatenate([roll.pitches for roll in rolls]),
+            np.concatenate([roll.velocities for roll in rolls]),
+            self.name,
+            self.program,
+            self.is_drum,
+        ).sorted()
+
+    def to_instrument(self) -> pretty_midi.Instrument:
+        """Build a pretty_midi instrument from the arrays."""
+        instrument = pretty_midi.Instrument(
+            program=self.program, name=self.name, is_drum=self.is_drum
+        )
+        # tolist() converts to Python numbers in one pass per column
+        instrument.notes = [
+            pretty_midi.Note(velocity=v, pitch=p, start=s, end=e)
+            for s, e, p, v in zip(*(column.tolist() for column in self.columns()))
+        ]
+        return instrument
+
+    def to_matrix(
+        self, step_duration: float, num_steps: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Render into a uint8 velocity matrix of 128 pitches x steps.
+
+        A note covers every step it overlaps (at least one); where notes
+        overlap the louder velocity wins.
+        """
+        first = np.floor(self.starts / step_duration + 1e-9).astype(np.int64)
+        last = np.ceil(self.ends / step_duration - 1e-9).astype(np.int64)
+        last = np.maximum(last, first + 1)
+        if num_steps is None:
+            num_steps = int(last.max()) if len(self) else 0
+
+        matrix = np.zeros((NUM_PITCHES, num_steps), dtype=np.uint8)
+        lengths = last - first
+        steps = np.repeat(first - np.cumsum(lengths) + lengths, lengths)
+        steps += np.arange(int(lengths.sum()))
+        pitches = np.repeat(self.pitches, lengths)
+        velocities = np.repeat(self.velocities, lengths).astype(np.uint8)
+        inside = (steps >= 0) & (steps < num_steps)
+        np.maximum.at(matrix, (pitches[inside], steps[inside]), velocities[inside])
+        return matrix
+
+
+def rolls_from_midi(midi: pretty_midi.PrettyMIDI) -> List[PianoRoll]:
+    """One PianoRoll per instrument of a MIDI object."""
+    return [PianoRoll.from_instrument(inst) for inst in midi.instruments]
+
+
+def midi_from_rolls(rolls: Sequence[PianoRoll], bpm: int) -> pretty_midi.PrettyMIDI:
+    """A MIDI object with one instrument per roll."""
+    midi = pretty_midi.PrettyMIDI(initial_tempo=bpm)
+    midi.instruments = [roll.to_instrument() for roll in rolls]
+    return midi
+
+
+def write_rolls_smf(
+    rolls: Sequence[PianoRoll],
+    output_path: str,
+    bpm: int,
+    tempo_map: Optional[TempoMap] = None,
+) -> int:
+    """
+    Write rolls as a format 1 MIDI file with the streaming writer.
+
+    With a tempo map, note times are real seconds under that map (see
+    TempoMap.to_seconds) and the map becomes the file's tempo track.
+
+    Returns:
+        Number of notes written
+    """
+    with StreamingMidiWriter(
+        output_path,
+        bpm,
+        [(roll.name, roll.program, roll.is_drum) for roll in rolls],
+        tempo_map=tempo_map,
+    ) as writer:
+        for index, roll in enumerate(rolls):
+            writer.add_notes(index, *roll.columns())
+    return writer.note_count
+
+
+def render_piano_roll_png(
+    rolls: Sequence[PianoRoll],
+    output_path: str,
+    step_duration: float = 0.05,
+    pixel_size: int = 2,
+) -> Tuple[int, int]:
+    """
+    Save a piano-roll preview image of the tracks.
+
+    Time runs left to right and pitch bottom to top, cropped to the pitches
+    in use; each track has its own colour, brightened by velocity.
+
+    Returns:
+        (width, height) of the saved image
+    """
+    num_steps = max(
+        1,
+        int(np.ceil(max((roll.end_time for roll in rolls), default=0) / step_duration)),
+    )
+    matrices = [roll.to_matrix(step_duration, num_steps) for roll in rolls]
+    used = np.flatnonzero(np.any([matrix.any(axis=1) for matrix in matrices], axis=0))
+    low, high = (int(used[0]), int(used[-1])) if len(used) else (60, 60)
+
+    canvas = np.zeros((high - low + 1, num_steps, 3), dtype=np.float32)
+    for index, matrix in enumerate(matrices):
+        colour = np.array(_TRACK_COLOURS[index % len(_TRACK_COLOURS)], np.float32)
+        intensity = matrix[low : high + 1, :, None].astype(np.float32) / 127
+        canvas = np.maximum(canvas, intensity * colour)
+
+    pixels = np.clip(canvas[::-1], 0, 255).astype(np.uint8)
+    pixels = pixels.repeat(pixel_size, axis=0).repeat(pixel_size, axis=1)
+    Image.fromarray(pixels, "RGB").save(output_path)
+    return pixels.shape[1], pixels.shape[0]
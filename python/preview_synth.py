@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Offline audio preview renderer for the Hyper Vibe MIDI Exporter.
+
+Renders generated tracks to a WAV file with a small vectorized synthesizer,
+so a preview can be played without a DAW, fluidsynth or soundfonts. Each
+note is rendered as a whole NumPy array (oscillator * envelope), and
+identical notes are rendered once and reused.
+"""
+
+import wave
+from typing import Dict, Tuple
+
+import numpy as np
+import pretty_midi  # type: ignore
+
+DEFAULT_SAMPLE_RATE = 22050
+
+# Seconds of audio kept after the last note so releases are not cut off
+RELEASE_TAIL = 0.5
+
+# Relative harmonic amplitudes per oscillator shape (index 0 = fundamental)
+_HARMONICS: Dict[str, np.ndarray] = {
+    "sine": np.array([1.0]),
+    "saw": 1.0 / np.arange(1, 25),
+    "square": np.array([1.0 / k if k % 2 else 0.0 for k in range(1, 25)]),
+    "triangle": np.array(
+        [(1.0 / k**2) * (-1) ** ((k - 1) // 2) if k % 2 else 0.0 for k in range(1, 25)]
+    ),
+    "piano": np.array([1.0, 0.5, 0.3, 0.15, 0.1, 0.06, 0.04, 0.02]),
+    "organ": np.array([1.0, 0.8, 0.0, 0.5, 0.0, 0.3, 0.0, 0.2]),
+    "bell": np.array([1.0, 0.0, 0.4, 0.0, 0.0, 0.25, 0.0, 0.0, 0.15]),
+}
+
+# General MIDI family (program // 8) -> (oscillator, (attack, decay, sustain, release))
+_FAMILY_VOICES: Dict[int, Tuple[str, Tuple[float, float, float, float]]] = {
+    0: ("piano", (0.005, 0.3, 0.4, 0.2)),  # Piano
+    1: ("bell", (0.002, 0.4, 0.2, 0.3)),  # Chromatic percussion
+    2: ("organ", (0.01, 0.05, 0.9, 0.1)),  # Organ
+    3: ("triangle", (0.003, 0.2, 0.3, 0.15)),  # Guitar
+    4: ("triangle", (0.005, 0.1, 0.8, 0.1)),  # Bass
+    5: ("saw", (0.08, 0.1, 0.8, 0.3)),  # Strings
+    6: ("saw", (0.1, 0.1, 0.8, 0.4)),  # Ensemble
+    7: ("saw", (0.03, 0.1, 0.7, 0.15)),  # Brass
+    8: ("square", (0.02, 0.1, 0.7, 0.1)),  # Reed
+    9: ("sine", (0.03, 0.1, 0.8, 0.15)),  # Pipe
+    10: ("saw", (0.01, 0.1, 0.7, 0.1)),  # Synth lead
+    11: ("triangle", (0.2, 0.2, 0.8, 0.5)),  # Synth pad
+}
+_DEFAULT_VOICE = ("sine", (0.01, 0.1, 0.7, 0.1))
+
+# Per-instrument gain so drums and bass sit under the melodic parts
+_DRUM_GAIN = 0.8
+_NOTE_GAIN = 0.3
+
+
+def _midi_to_hz(pitch: int) -> float:
+    """Convert a MIDI pitch number to frequency in Hz."""
+    return float(440.0 * 2.0 ** ((pitch - 69) / 12.0))
+
+
+def _adsr(
+    num_samples: int,
+    sustain_samples: int,
+    envelope: Tuple[float, float, float, float],
+    sample_rate: int,
+) -> np.ndarray:
+    """Build an ADSR envelope over a note's samples (sustain part + release)."""
+    attack, decay, sustain, release = envelope
+    a = max(1, int(attack * sample_rate))
+    d = max(1, int(decay * sample_rate))
+    r = max(1, int(release * sample_rate))
+    hold_end = max(sustain_samples, a + d)
+
+    times = [0, a, a + d, hold_end, hold_end + r]
+    levels = [0.0, 1.0, sustain, sustain, 0.0]
+    return np.interp(np.arange(num_samples), times, levels)
+
+
+def _oscillator(
+    shape: str, freq: float, num_samples: int, sample_rate: int
+) -> np.ndarray:
+    """Band-limited additive oscillator (harmonics above Nyquist are dropped)."""
+    amplitudes = _HARMONICS[shape]
+    max_harmonic = int((sample_rate / 2) // freq)
+    amplitudes = amplitudes[: max(1, min(len(amplitudes), max_harmonic))]
+
+    phase = 2.0 * np.pi * freq * np.arange(num_samples) / sample_rate
+    harmonics = np.arange(1, len(amplitudes) + 1)[:, np.newaxis]
+    wave_data: np.ndarray = amplitudes @ np.sin(harmonics * phase)
+    return wave_data / float(np.sum(np.abs(amplitudes)))
+
+
+def _drum_sample(pitch: int, sample_rate: int) -> np.ndarray:
+    """Procedurally generated drum hit for a General MIDI percussion key."""
+    noise_rng = np.random.default_rng(pitch)
+
+    if pitch in (35, 36):  # Bass drum: falling sine sweep
+        length = int(0.35 * sample_rate)
+        t = np.arange(length) / sample_rate
+        freq = 50.0 + 100.0 * np.exp(-t * 30.0)
+        phase = 2.0 * np.pi * np.cumsum(freq) / sample_rate
+        return np.sin(phase) * np.exp(-t * 9.0)
+
+    if pitch in (38, 40):  # Snare: tone plus noise
+        length = int(0.25 * sample_rate)
+        t = np.arange(length) / sample_rate
+        tone = np.sin(2.0 * np.pi * 185.0 * t) * np.exp(-t * 25.0)
+        noise = noise_rng.uniform(-1, 1, length) * np.exp(-t * 18.0)
+        return 0.4 * tone + 0.6 * noise
+
+    # Hi-hats and everything else: high-passed noise burst
+    decay = 8.0 if pitch == 46 else 40.0  # Open hat rings longer
+    length = int((0.4 if pitch == 46 else 0.1) * sample_rate)
+    t = np.arange(length) / sample_rate
+    noise = np.diff(noise_rng.uniform(-1, 1, length + 1))
+    return 0.5 * noise * np.exp(-t * decay)
+
+
+def render_midi_to_array(
+    midi: pretty_midi.PrettyMIDI, sample_rate: int = DEFAULT_SAMPLE_RATE
+) -> np.ndarray:
+    """
+    Render all instruments of a PrettyMIDI object to a mono float array.
+
+    Args:
+        midi: The generated multi-track MIDI
+        sample_rate: Output sample rate in Hz
+
+    Returns:
+        Float32 samples normalized to a peak of 0.9
+    """
+    end_time = max(
+        (note.end for inst in midi.instruments for note in inst.notes), default=0.0
+    )
+    total_samples = int((end_time + RELEASE_TAIL) * sample_rate) + 1
+    mix = np.zeros(total_samples, dtype=np.float64)
+
+    # Rendered notes are reused for identical (voice, pitch, length) blocks
+    cache: Dict[Tuple[object, ...], np.ndarray] = {}
+
+    for inst in midi.instruments:
+        if inst.is_drum:
+            for note in inst.notes:
+                key: Tuple[object, ...] = ("drum", note.pitch)
+                if key not in cache:
+                    cache[key] = _drum_sample(note.pitch, sample_rate)
+                _mix_in(
+                    mix, cache[key], note.start, note.velocity * _DRUM_GAIN, sample_rate
+                )
+            continue
+
+        shape, envelope = _FAMILY_VOICES.get(inst.program // 8, _DEFAULT_VOICE)
+        release_samples = int(envelope[3] * sample_rate)
+        for note in inst.notes:
+            sustain_samples = max(1, int((note.end - note.start) * sample_rate))
+            key = (shape, envelope, note.pitch, sustain_samples)
+            if key not in cache:
+                num_samples = sustain_samples + release_samples
+                tone = _oscillator(
+                    shape, _midi_to_hz(note.pitch), num_samples, sample_rate
+                )
+                cache[key] = tone * _adsr(
+                    num_samples, sustain_samples, envelope, sample_rate
+                )
+            _mix_in(
+                mix, cache[key], note.start, note.velocity * _NOTE_GAIN, sample_rate
+            )
+
+    peak = np.max(np.abs(mix)) if mix.size else 0.0
+    if peak > 0:
+        mix *= 0.9 / peak
+    return mix.astype(np.float32)
+
+
+def _mix_in(
+    mix: np.ndarray, block: np.ndarray, start: float, velocity: float, sample_rate: int
+) -> None:
+    """Add a rendered note block into the mix buffer at its start time."""
+    offset = int(start * sample_rate)
+    if offset >= len(mix):
+        return
+    length = min(len(block), len(mix) - offset)
+    mix[offset : offset + length] += block[:length] * (velocity / 127.0)
+
+
+def write_wav(samples: np.ndarray, output_path: str, sample_rate: int) -> None:
+    """Write mono float samples in [-1, 1] as a 16-bit PCM WAV file."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(output_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+
+
+def render_preview_wav(
+    midi: pretty_midi.PrettyMIDI,
+    output_path: str,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+) -> float:
+    """
+    Render a PrettyMIDI object to a WAV preview file.
+
+    Args:
+        midi: The generated multi-track MIDI
+        output_path: Path of the WAV file to write
+        sample_rate: Output sample rate in Hz
+
+    Returns:
+        Length of the rendered preview in seconds
+    """
+    samples = render_midi_to_array(midi, sample_rate)
+    write_wav(samples, output_path, sample_rate)
+    return len(samples) / sample_rate
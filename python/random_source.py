@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Default random generator for the Hyper Vibe generators.
+
+Generators take an optional random.Random. Without one they draw from
+DEFAULT_RNG, never from the global `random` state, so unseeded runs
+neither depend on nor change random.seed(). Pass a seeded generator
+(or --seed) for reproducible output.
+"""
+
+import random
+from typing import Optional
+
+DEFAULT_RNG = random.Random()
+
+
+def resolve_rng(rng: Optional[random.Random]) -> random.Random:
+    """The given generator, or the module-level default one."""
+    return rng if rng is not None else DEFAULT_RNG
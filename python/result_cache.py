@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Result cache for the Hyper Vibe MIDI Exporter.
+
+Identical requests (same image bytes, parameters, seed and generator
+version) produce the same files, so the finished artifacts (.mid, note
+events, ...) are stored under a fingerprint of the whole request and
+served again without decoding the image or building the arrangement.
+
+Artifacts live as one file each in a cache directory, evicted least
+recently used once the directory grows past `max_bytes`; a hit refreshes
+the file's mtime. A small in-memory tier keeps the hottest artifacts of a
+long-running process (watch mode, a server worker) off the disk.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from midi_index import file_sha256
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 16 * 1024 * 1024
+
+_FINGERPRINT = re.compile(r"^[0-9a-f]{64}$")
+_ARTIFACT = re.compile(r"^[a-z0-9_]+$")
+_ARTIFACT_FILE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9_]+$")
+
+
+def _canonical(value: Any) -> Any:
+    """JSON stand-in for parameter objects, covering their full contents."""
+    if isinstance(value, np.ndarray):
+        return [
+            value.dtype.str,
+            value.shape,
+            hashlib.sha256(value.tobytes()).hexdigest(),
+        ]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "__dict__"):
+        # Underscore attributes are derived caches, e.g. GrooveBank._hits
+        public = {k: v for k, v in vars(value).items() if not k.startswith("_")}
+        return [type(value).__name__, public]
+    raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+
+def options_fingerprint(params: Dict[str, Any]) -> str:
+    """
+    Hex SHA-256 of a set of options, hashing objects by their attributes.
+
+    Raises:
+        TypeError: If a parameter cannot be fingerprinted
+    """
+    encoded = json.dumps(params, default=_canonical, sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def request_fingerprint(image_path: str, params: Dict[str, Any], version: int) -> str:
+    """
+    Fingerprint of an export request.
+
+    Args:
+        image_path: Source image; its content is hashed, not its name
+        params: Every option that affects the output, including the seed.
+            Objects such as mapping curves and groove banks are hashed by
+            their attributes.
+        version: Generator version, bumped whenever the output for the
+            same request changes
+
+    Returns:
+        Hex SHA-256 of the request
+
+    Raises:
+        OSError: If the image cannot be read
+        TypeError: If a parameter cannot be fingerprinted
+    """
+    return options_fingerprint(
+        {"image": file_sha256(image_path), "params": params, "version": version}
+    )
+
+
+class ResultCache:
+    """Size-bounded LRU store of export artifacts on disk and in memory."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    ):
+        """
+        Args:
+            directory: Cache directory (created if needed)
+            max_bytes: Size limit of the directory
+            memory_bytes: Size limit of the in-memory tier (0 disables it)
+
+        Raises:
+            ValueError: If a limit is negative
+            OSError: If the directory cannot be created
+        """
+        if max_bytes < 0 or memory_bytes < 0:
+            raise ValueError("Cache size limits cannot be negative")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+
+    def _path(self, fingerprint: str, artifact: str) -> str:
+        if not _FINGERPRINT.match(fingerprint):
+            raise ValueError(f"Invalid request fingerprint: {fingerprint!r}")
+        if not _ARTIFACT.match(artifact):
+            raise ValueError(f"Invalid artifact name: {artifact!r}")
+        return os.path.join(self.directory, f"{fingerprint}.{artifact}")
+
+    def _remember(self, path: str, data: bytes) -> None:
+        """Add an artifact to the memory tier, evicting the coldest."""
+        if len(data) > self.memory_bytes:
+            return
+        previous = self._memory.pop(path, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[path] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, fingerprint: str, artifact: str) -> Optional[bytes]:
+        """
+        Look up a stored artifact.
+
+        Returns:
+            The artifact bytes, or None on a miss
+        """
+        path = self._path(fingerprint, artifact)
+        data = self._memory.get(path)
+        if data is not None:
+            self._memory.move_to_end(path)
+            return data
+        try:
+            with open(path, "rb") as cached:
+                data = cached.read()
+            os.utime(path)  # Mark as recently used for eviction
+        except FileNotFoundError:
+            return None
+        self._remember(path, data)
+        return data
+
+    def put(self, fingerprint: str, artifact: str, data: bytes) -> None:
+        """
+        Store an artifact and evict old ones beyond the size limit.
+
+        Raises:
+            OSError: If the artifact cannot be written
+        """
+        path = self._path(fingerprint, artifact)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cached:
+                cached.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._remember(path, data)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete least recently used artifacts until the directory fits.
+
+        Returns:
+            Number of artifacts deleted
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as found:
+            for entry in found:
+                if not _ARTIFACT_FILE.match(entry.name) or not entry.is_file():
+                    continue  # Temporary files and other users of the directory
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Evicted by another process
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total += stat.st_size
+
+        deleted = 0
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+            stale = self._memory.pop(path, None)
+            if stale is not None:
+                self._memory_size -= len(stale)
+        return deleted
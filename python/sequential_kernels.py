@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Sequential generator kernels with an optional JIT backend.
+
+Some generator steps depend on the previous step's result and cannot be
+vectorized: the AI melody walks from its last pitch and clamps every step
+to the playable range. The random decisions are drawn up front as NumPy
+arrays; the kernels here only run the dependent walk over them.
+
+Each kernel is written once. The "python" backend runs it on lists; the
+"numba" backend (used automatically when numba is installed) compiles the
+same source for arrays. Both only do integer arithmetic, so seeded output
+is identical whichever backend runs. Set HYPER_VIBE_KERNELS=python (or
+call set_backend) to force the pure-Python backend.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import numba  # type: ignore
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+KERNEL_BACKENDS = ("python", "numba")
+BACKEND_ENV_VAR = "HYPER_VIBE_KERNELS"
+
+
+def _melody_walk_into(
+    continues: Any, steps: Any, fresh: Any, start: int, low: int, high: int, out: Any
+) -> None:
+    """
+    The melody walk: step from the previous pitch where `continues` is
+    set, otherwise jump to `fresh`, clamping to [low, high]. A negative
+    `start` means there is no previous pitch, so the first step jumps.
+    """
+    last = start
+    for i in range(len(out)):
+        if continues[i] and last >= 0:
+            pitch = last + steps[i]
+        else:
+            pitch = fresh[i]
+        if pitch < low:
+            pitch = low
+        elif pitch > high:
+            pitch = high
+        out[i] = pitch
+        last = pitch
+
+
+def _python_melody_walk(
+    continues: np.ndarray,
+    steps: np.ndarray,
+    fresh: np.ndarray,
+    start: int,
+    low: int,
+    high: int,
+) -> np.ndarray:
+    out: List[int] = [0] * len(fresh)
+    _melody_walk_into(
+        continues.tolist(), steps.tolist(), fresh.tolist(), start, low, high, out
+    )
+    return np.array(out, dtype=np.int64)
+
+
+_KERNELS: Dict[str, Callable[..., np.ndarray]] = {"python": _python_melody_walk}
+
+if HAVE_NUMBA:
+    _numba_walk_into = numba.njit(cache=True, nogil=True)(_melody_walk_into)
+
+    def _numba_melody_walk(
+        continues: np.ndarray,
+        steps: np.ndarray,
+        fresh: np.ndarray,
+        start: int,
+        low: int,
+        high: int,
+    ) -> np.ndarray:
+        out = np.empty(len(fresh), dtype=np.int64)
+        _numba_walk_into(
+            np.ascontiguousarray(continues, dtype=np.bool_),
+            np.ascontiguousarray(steps, dtype=np.int64),
+            np.ascontiguousarray(fresh, dtype=np.int64),
+            start,
+            low,
+            high,
+            out,
+        )
+        return out
+
+    _KERNELS["numba"] = _numba_melody_walk
+
+
+def available_backends() -> List[str]:
+    """Kernel backends usable in this environment."""
+    return [name for name in KERNEL_BACKENDS if name in _KERNELS]
+
+
+def _default_backend() -> str:
+    requested = os.environ.get(BACKEND_ENV_VAR)
+    if requested in _KERNELS:
+        return requested
+    return "numba" if "numba" in _KERNELS else "python"
+
+
+_backend = _default_backend()
+
+
+def get_backend() -> str:
+    """Name of the active kernel backend."""
+    return _backend
+
+
+def set_backend(name: Optional[str]) -> None:
+    """
+    Select the kernel backend; None picks the default again.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    global _backend
+    if name is None:
+        _backend = _default_backend()
+        return
+    if name not in _KERNELS:
+        raise ValueError(
+            f"Kernel backend {name!r} is not available "
+            f"(available: {', '.join(available_backends())})"
+        )
+    _backend = name
+
+
+def melody_walk(
+    continues: np.ndarray,
+    steps: np.ndarray,
+    fresh: np.ndarray,
+    start: Optional[int] = None,
+    low: int = 48,
+    high: int = 96,
+) -> np.ndarray:
+    """
+    Run the clamped melodic walk on the active backend.
+
+    Args:
+        continues: Per step, whether to move from the previous pitch
+        steps: Interval added when continuing
+        fresh: Pitch used when not continuing (or when there is no
+            previous pitch yet)
+        start: Pitch before the first step, e.g. carried from the previous
+            chunk
+        low: Lowest allowed pitch
+        high: Highest allowed pitch
+
+    Returns:
+        int64 pitch per step
+    """
+    start_pitch = -1 if start is None else int(start)
+    return _KERNELS[_backend](continues, steps, fresh, start_pitch, low, high)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Shared-memory NumPy arrays for handing data between worker processes.
+
+Arrays are copied once into a `multiprocessing.shared_memory` block and
+only a small picklable SharedArrayRef descriptor crosses the process
+boundary. Workers attach to the block as a zero-copy view.
+"""
+
+import sys
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, NamedTuple, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class SharedArrayRef(NamedTuple):
+    """Descriptor of an array stored in a shared memory block."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: Any  # dtype string, or field list for structured arrays
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the array data in bytes."""
+        itemsize = int(np.dtype(self.dtype).itemsize)
+        return int(np.prod(self.shape, dtype=np.int64)) * itemsize
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _dtype_descr(dtype: np.dtype) -> Any:
+    """A picklable, round-trippable description of a (structured) dtype."""
+    return dtype.descr if dtype.fields else dtype.str
+
+
+def create_shared_array(
+    array: np.ndarray,
+) -> Tuple[shared_memory.SharedMemory, SharedArrayRef]:
+    """
+    Copy an array into a new shared memory block.
+
+    The caller owns the returned block and must close() and unlink() it.
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    try:
+        view: np.ndarray = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[...] = array
+        del view
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block, SharedArrayRef(block.name, array.shape, _dtype_descr(array.dtype))
+
+
+def publish_array(array: np.ndarray) -> SharedArrayRef:
+    """
+    Copy an array into shared memory and hand ownership to the receiver.
+
+    Used by worker processes: the block stays alive after this process
+    detaches, and whoever receives the descriptor must release it with
+    unlink_shared_array (or adopt it into a SharedArrayRegistry).
+    """
+    block, ref = create_shared_array(array)
+    block.close()
+    return ref
+
+
+def with_shared_array(ref: SharedArrayRef, func: Callable[[np.ndarray], T]) -> T:
+    """
+    Call `func` with a zero-copy, read-only view of a shared array.
+
+    The view is only valid during the call, so `func` must return data
+    that does not reference it (a computed result or an explicit copy).
+    """
+    block = _open_block(ref.name)
+    view: np.ndarray = np.ndarray(
+        ref.shape, dtype=np.dtype(ref.dtype), buffer=block.buf
+    )
+    view.flags.writeable = False
+    try:
+        return func(view)
+    finally:
+        del view
+        try:
+            block.close()
+        except BufferError:
+            # A failing `func` can keep the view alive in its traceback; the
+            # mapping is released once that traceback is dropped.
+            pass
+
+
+def unlink_shared_array(ref: SharedArrayRef) -> None:
+    """Free a shared array block (no error if it is already gone)."""
+    try:
+        block = shared_memory.SharedMemory(name=ref.name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+class SharedArrayRegistry:
+    """
+    Owner-side registry that frees every shared block it knows about.
+
+    Use as a context manager around a batch so blocks are unlinked even
+    when a worker fails or the batch is interrupted.
+    """
+
+    def __init__(self) -> None:
+        self._blocks: Dict[str, SharedArrayRef] = {}
+
+    def put(self, array: np.ndarray) -> SharedArrayRef:
+        """Copy an array into a registered shared block."""
+        block, ref = create_shared_array(array)
+        block.close()
+        self._blocks[ref.name] = ref
+        return ref
+
+    def adopt(self, ref: SharedArrayRef) -> SharedArrayRef:
+        """Take ownership of a block published by another process."""
+        self._blocks[ref.name] = ref
+        return ref
+
+    def release(self, ref: SharedArrayRef) -> None:
+        """Free one block as soon as it is no longer needed."""
+        if self._blocks.pop(ref.name, None) is not None:
+            unlink_shared_array(ref)
+
+    def close(self) -> None:
+        """Free all remaining blocks."""
+        for ref in list(self._blocks.values()):
+            self.release(ref)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __enter__(self) -> "SharedArrayRegistry":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
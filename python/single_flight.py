@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical in-flight work.
+
+While a computation for a key is running, further requests for the same
+key do not start their own; they get the running computation's future
+(the leader's) and see its result or its exception. Once the leader
+finishes, the key is forgotten, so later requests compute afresh (use
+the result cache to keep results around).
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Share one running future among requests with the same key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        """Number of keys currently in flight."""
+        with self._lock:
+            return len(self._flights)
+
+    def submit(self, key: Hashable, start: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Join the flight for `key`, starting it if none is running.
+
+        Args:
+            key: Identity of the request, e.g. a request fingerprint
+            start: Starts the computation and returns its future, e.g.
+                functools.partial(pool.submit, fn, *args); only called for
+                a leader
+
+        Returns:
+            (future, is_leader): the leader's future, shared by all
+            followers, and whether this call started it
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = start()
+            self._flights[key] = future
+            self.leaders += 1
+        future.add_done_callback(lambda done: self._land(key, done))
+        return future, True
+
+    def _land(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Streaming Standard MIDI File writer for the Hyper Vibe MIDI Exporter.
+
+Notes are fed in time windows and encoded straight to per-track spool
+files, so only the current window is held in memory. The spools are
+stitched into a format 1 MIDI file when the writer is closed.
+"""
+
+import heapq
+import shutil
+import struct
+import tempfile
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tempo_map import TempoMap
+
+TICKS_PER_BEAT = 480
+DRUM_CHANNEL = 9
+
+# Event kinds, ordered so note-offs sort before note-ons at the same tick
+_NOTE_OFF = 0
+_NOTE_ON = 1
+
+
+def encode_varlen(value: int) -> bytes:
+    """Encode an integer as a MIDI variable-length quantity."""
+    buffer = [value & 0x7F]
+    value >>= 7
+    while value:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(buffer))
+
+
+def _meta_event(delta: int, meta_type: int, data: bytes) -> bytes:
+    """Encode a meta event with its delta time."""
+    return (
+        encode_varlen(delta)
+        + bytes([0xFF, meta_type])
+        + encode_varlen(len(data))
+        + data
+    )
+
+
+def tempo_event(delta: int, bpm: float) -> bytes:
+    """Encode a set-tempo meta event."""
+    microseconds = int(round(60_000_000 / bpm))
+    return _meta_event(delta, 0x51, microseconds.to_bytes(3, "big"))
+
+
+def track_name_event(name: str) -> bytes:
+    """Encode a track-name meta event at delta 0."""
+    return _meta_event(0, 0x03, name.encode("latin-1", errors="replace"))
+
+
+def end_of_track_event(delta: int = 0) -> bytes:
+    """Encode the end-of-track meta event."""
+    return _meta_event(delta, 0x2F, b"")
+
+
+class _TrackSpool:
+    """Encoded events of one track, spooled to a temporary file."""
+
+    def __init__(self, name: str, program: int, channel: int):
+        self.name = name
+        self.program = program
+        self.channel = channel
+        self.file: BinaryIO = tempfile.TemporaryFile()
+        self.last_tick = 0
+        self.note_count = 0
+        # Note-offs that fall after the current window: (tick, kind, pitch, velocity)
+        self.pending: List[Tuple[int, int, int, int]] = []
+
+        self.file.write(track_name_event(name))
+        if channel != DRUM_CHANNEL:
+            self.file.write(bytes([0x00, 0xC0 | channel, program & 0x7F]))
+
+    def write_events(self, events: Sequence[Tuple[int, int, int, int]]) -> None:
+        """Encode time-sorted (tick, kind, pitch, velocity) events."""
+        chunks = []
+        for tick, kind, pitch, velocity in events:
+            status = (0x90 if kind == _NOTE_ON else 0x80) | self.channel
+            chunks.append(encode_varlen(tick - self.last_tick))
+            chunks.append(bytes([status, pitch, velocity]))
+            self.last_tick = tick
+        self.file.write(b"".join(chunks))
+
+
+class StreamingMidiWriter:
+    """
+    Write a multi-track MIDI file window by window with bounded memory.
+
+    Usage:
+        writer = StreamingMidiWriter(path, bpm, [("Melody", 0, False), ...])
+        writer.add_notes(0, starts, ends, pitches, velocities)  # per window
+        writer.flush(window_end_seconds)
+        writer.close()
+
+    With a tempo map, times are real seconds under that map and the map
+    is written as the file's tempo track instead of the single `bpm`.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        bpm: float,
+        tracks: Sequence[Tuple[str, int, bool]],
+        ticks_per_beat: int = TICKS_PER_BEAT,
+        tempo_map: Optional[TempoMap] = None,
+    ):
+        self.output_path = output_path
+        self.bpm = bpm
+        self.ticks_per_beat = ticks_per_beat
+        self.tempo_map = tempo_map if tempo_map is not None else TempoMap.constant(bpm)
+        self._window: List[List[Tuple[int, int, int, int]]] = [[] for _ in tracks]
+        self._closed = False
+
+        self.tracks: List[_TrackSpool] = []
+        melodic_channels = [c for c in range(16) if c != DRUM_CHANNEL]
+        for name, program, is_drum in tracks:
+            if is_drum:
+                channel = DRUM_CHANNEL
+            else:
+                channel = melodic_channels[len(self.tracks) % len(melodic_channels)]
+            self.tracks.append(_TrackSpool(name, program, channel))
+
+    def seconds_to_ticks(self, seconds: np.ndarray) -> np.ndarray:
+        """Convert an array of times in seconds to absolute ticks."""
+        return self.tempo_map.seconds_to_ticks(seconds, self.ticks_per_beat)
+
+    def add_notes(
+        self,
+        track_index: int,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        pitches: np.ndarray,
+        velocities: np.ndarray,
+    ) -> None:
+        """Queue notes (absolute times in seconds) for the current window."""
+        start_ticks = self.seconds_to_ticks(starts)
+        end_ticks = np.maximum(self.seconds_to_ticks(ends), start_ticks + 1)
+        window = self._window[track_index]
+        for on, off, pitch, velocity in zip(
+            start_ticks.tolist(),
+            end_ticks.tolist(),
+            pitches.tolist(),
+            velocities.tolist(),
+        ):
+            window.append((on, _NOTE_ON, int(pitch), int(velocity)))
+            window.append((off, _NOTE_OFF, int(pitch), 0))
+        self.tracks[track_index].note_count += len(start_ticks)
+
+    def flush(self, until_seconds: Optional[float] = None) -> None:
+        """
+        Encode all queued events before `until_seconds` to the track spools.
+
+        Events at or after that time (e.g. note-offs of notes that ring
+        into the next window) are carried over. With no limit, everything
+        is written.
+        """
+        limit = (
+            None
+            if until_seconds is None
+            else int(self.seconds_to_ticks(np.array(until_seconds)))
+        )
+        for spool, window in zip(self.tracks, self._window):
+            events = list(heapq.merge(sorted(window), sorted(spool.pending)))
+            window.clear()
+            if limit is None:
+                ready, spool.pending = events, []
+            else:
+                split = next(
+                    (i for i, e in enumerate(events) if e[0] >= limit), len(events)
+                )
+                ready, spool.pending = events[:split], events[split:]
+            spool.write_events(ready)
+
+    def close(self) -> None:
+        """Write remaining events and assemble the final MIDI file."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+
+        tempo_track = b""
+        last_tick = 0
+        for tick, bpm in self.tempo_map.tempo_events(self.ticks_per_beat):
+            tempo_track += tempo_event(tick - last_tick, bpm)
+            last_tick = tick
+        tempo_track += end_of_track_event()
+        with open(self.output_path, "wb") as output:
+            output.write(
+                b"MThd"
+                + struct.pack(">IHHH", 6, 1, len(self.tracks) + 1, self.ticks_per_beat)
+            )
+            output.write(b"MTrk" + struct.pack(">I", len(tempo_track)) + tempo_track)
+
+            for spool in self.tracks:
+                spool.file.write(end_of_track_event())
+                length = spool.file.tell()
+                spool.file.seek(0)
+                output.write(b"MTrk" + struct.pack(">I", length))
+                shutil.copyfileobj(spool.file, output)
+                spool.file.close()
+
+    def discard(self) -> None:
+        """Release the track spools without writing (safe after close)."""
+        self._closed = True
+        for spool in self.tracks:
+            if not spool.file.closed:
+                spool.file.close()
+
+    @property
+    def note_count(self) -> int:
+        """Total notes written across all tracks."""
+        return sum(spool.note_count for spool in self.tracks)
+
+    def __enter__(self) -> "StreamingMidiWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        self.discard()
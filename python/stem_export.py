@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Per-track stem export for the Hyper Vibe MIDI Exporter.
+
+Stems are written from the tracks already generated for the combined
+file, one format 1 MIDI file per track, serialized concurrently with the
+streaming SMF writer. They can also be bundled into a zip archive
+together with the combined file.
+"""
+
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from piano_roll import PianoRoll, write_rolls_smf
+from tempo_map import TempoMap
+
+
+def stem_paths(output_path: str, track_names: Sequence[str]) -> List[str]:
+    """
+    One stem path per track next to the combined file.
+
+    "song.mid" with tracks Melody and AI Bass gives "song_melody.mid" and
+    "song_ai_bass.mid"; repeated names get a numeric suffix.
+    """
+    base, _ = os.path.splitext(output_path)
+    paths: List[str] = []
+    seen: set = set()
+    for index, name in enumerate(track_names):
+        slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or f"track{index}"
+        candidate, suffix = slug, 2
+        while candidate in seen:
+            candidate = f"{slug}_{suffix}"
+            suffix += 1
+        seen.add(candidate)
+        paths.append(f"{base}_{candidate}.mid")
+    return paths
+
+
+def stem_bundle_path(output_path: str) -> str:
+    """Path of the zip bundle for a combined file ("song.mid" → "song_stems.zip")."""
+    base, _ = os.path.splitext(output_path)
+    return f"{base}_stems.zip"
+
+
+def write_stems(
+    rolls: Sequence[PianoRoll],
+    output_path: str,
+    bpm: int,
+    bundle: bool = False,
+    max_workers: Optional[int] = None,
+    tempo_map: Optional[TempoMap] = None,
+) -> List[str]:
+    """
+    Write one MIDI file per track of an already generated arrangement.
+
+    Args:
+        rolls: The generated tracks
+        output_path: Path of the combined MIDI file; stems are written
+            next to it
+        bpm: Tempo written to every stem
+        bundle: Also write a zip with the combined file (if present) and
+            all stems to stem_bundle_path(output_path)
+        max_workers: Threads serializing stems (default: one per track)
+        tempo_map: Tempo map written to every stem instead of `bpm`; note
+            times are real seconds under it
+
+    Returns:
+        Paths of the written stems, in track order
+
+    Raises:
+        OSError: If a stem or the bundle cannot be written
+    """
+    if not rolls:
+        return []
+
+    paths = stem_paths(output_path, [roll.name for roll in rolls])
+    with ThreadPoolExecutor(max_workers or len(rolls)) as pool:
+        # list() re-raises the first write error
+        list(
+            pool.map(
+                write_rolls_smf,
+                [[roll] for roll in rolls],
+                paths,
+                [bpm] * len(rolls),
+                [tempo_map] * len(rolls),
+            )
+        )
+
+    if bundle:
+        members = ([output_path] if os.path.exists(output_path) else []) + paths
+        with zipfile.ZipFile(
+            stem_bundle_path(output_path), "w", zipfile.ZIP_DEFLATED
+        ) as archive:
+            for path in members:
+                archive.write(path, os.path.basename(path))
+
+    return paths
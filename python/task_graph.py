@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Minimal task DAG executor for arrangement pipelines.
+
+Tasks are added with the names of the tasks they depend on; each task
+runs exactly once, receives its dependencies' results as arguments, and
+independent tasks run concurrently on a thread pool.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+class TaskGraph:
+    """A set of named tasks with dependencies, executed in topological order."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(
+        self, name: str, func: Callable[..., Any], depends_on: Sequence[str] = ()
+    ) -> None:
+        """
+        Register a task.
+
+        Dependencies must already be registered, which keeps the graph
+        acyclic by construction.
+
+        Raises:
+            ValueError: If the name is taken or a dependency is unknown
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        missing = [dep for dep in depends_on if dep not in self._tasks]
+        if missing:
+            raise ValueError(f"Task {name} depends on unknown tasks: {missing}")
+        self._tasks[name] = (func, tuple(depends_on))
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def run(self, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Execute every task once, as soon as its dependencies are done.
+
+        Returns:
+            Mapping of task name to result
+
+        Raises:
+            Exception: The first task failure; tasks not yet started are
+                cancelled
+        """
+        results: Dict[str, Any] = {}
+        pending = dict(self._tasks)
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers or max(1, len(self._tasks))) as pool:
+            while pending or running:
+                ready = [
+                    name
+                    for name, (_, deps) in pending.items()
+                    if all(dep in results for dep in deps)
+                ]
+                for name in ready:
+                    func, deps = pending.pop(name)
+                    future = pool.submit(func, *(results[dep] for dep in deps))
+                    running[future] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        return results
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tempo maps for the Hyper Vibe MIDI Exporter.
+
+A TempoMap is a piecewise-constant tempo: a list of change times (in
+seconds) with the tempo that holds from each change to the next. Times
+are converted to ticks and back for whole arrays at once. The tick
+positions of the changes are integrated once, and every conversion is
+then one searchsorted plus one multiply-add, instead of a lookup per
+event.
+
+brightness_tempo_map derives a map from the slice data, so bright
+passages push ahead and dark ones hold back. Generators still lay notes
+out on an even grid at the base tempo ("score time"). to_seconds moves
+them to real time under the map, and the writer turns real time back
+into ticks that sit on the original beat grid.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class TempoMap:
+    """Piecewise-constant tempo with vectorized time conversion."""
+
+    def __init__(self, times: Sequence[float], bpms: Sequence[float]):
+        """
+        Args:
+            times: Seconds at which each tempo starts; the first must be 0
+            bpms: Tempo from each time until the next
+
+        Raises:
+            ValueError: If the times are not increasing from 0 or a tempo
+                is not positive
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.bpms = np.asarray(bpms, dtype=np.float64)
+        if len(self.times) == 0 or len(self.times) != len(self.bpms):
+            raise ValueError("A tempo map needs one tempo per change time")
+        if self.times[0] != 0 or np.any(np.diff(self.times) <= 0):
+            raise ValueError("Tempo change times must increase from 0")
+        if np.any(self.bpms <= 0):
+            raise ValueError("Tempos must be positive")
+        # Beats elapsed at each change: the integral of the tempo
+        self._beats = np.concatenate(
+            [[0.0], np.cumsum(np.diff(self.times) * self.bpms[:-1] / 60.0)]
+        )
+
+    @classmethod
+    def constant(cls, bpm: float) -> "TempoMap":
+        """A map holding one tempo throughout."""
+        return cls([0.0], [bpm])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def seconds_to_beats(self, seconds: Any) -> np.ndarray:
+        """Beats elapsed at each time (array in, array out)."""
+        seconds = np.asarray(seconds, dtype=np.float64)
+        segment = np.searchsorted(self.times, seconds, side="right") - 1
+        segment = np.clip(segment, 0, len(self.times) - 1)
+        beats: np.ndarray = (
+            self._beats[segment]
+            + (seconds - self.times[segment]) * self.bpms[segment] / 60.0
+        )
+        return beats
+
+    def beats_to_seconds(self, beats: Any) -> np.ndarray:
+        """Time at which each beat position is reached."""
+        beats = np.asarray(beats, dtype=np.float64)
+        segment = np.searchsorted(self._beats, beats, side="right") - 1
+        segment = np.clip(segment, 0, len(self.times) - 1)
+        seconds: np.ndarray = (
+            self.times[segment]
+            + (beats - self._beats[segment]) * 60.0 / self.bpms[segment]
+        )
+        return seconds
+
+    def seconds_to_ticks(self, seconds: Any, ticks_per_beat: int) -> np.ndarray:
+        """Absolute ticks of each time, rounded to the nearest tick."""
+        ticks: np.ndarray = np.rint(
+            self.seconds_to_beats(seconds) * ticks_per_beat
+        ).astype(np.int64)
+        return ticks
+
+    def to_seconds(self, score_seconds: Any, base_bpm: float) -> np.ndarray:
+        """
+        Real time of positions laid out at a fixed base tempo.
+
+        The position's beat (score_seconds * base_bpm / 60) is reached
+        under this map at the returned time.
+        """
+        return self.beats_to_seconds(
+            np.asarray(score_seconds, dtype=np.float64) * base_bpm / 60.0
+        )
+
+    def tempo_events(self, ticks_per_beat: int) -> List[Tuple[int, float]]:
+        """(tick, bpm) of every tempo change, for a MIDI tempo track."""
+        ticks = np.rint(self._beats * ticks_per_beat).astype(np.int64)
+        return list(zip(ticks.tolist(), self.bpms.tolist()))
+
+
+def slice_tempo_map(
+    slice_durations: Any, bpm: float, beats_per_slice: float
+) -> TempoMap:
+    """
+    Tempo map in which slices of equal length in beats last the given
+    number of seconds.
+
+    Consecutive slices with the same tempo share one change.
+    """
+    durations = np.asarray(slice_durations, dtype=np.float64)
+    if len(durations) == 0 or np.any(durations <= 0):
+        raise ValueError("Slice durations must be positive")
+    bpms = beats_per_slice * 60.0 / durations
+    starts = np.concatenate([[0.0], np.cumsum(durations[:-1])])
+    # Tempo only changes where it differs from the previous slice
+    keep = np.concatenate([[True], ~np.isclose(bpms[1:], bpms[:-1])])
+    return TempoMap(starts[keep], bpms[keep])
+
+
+def brightness_tempo_map(
+    notes: List[Dict[str, Any]], duration: float, bpm: float, spread: float
+) -> TempoMap:
+    """
+    Tempo map that speeds up bright slices and slows down dark ones.
+
+    Args:
+        notes: Note slices (their "brightness" is used)
+        duration: Length of the piece in seconds, kept unchanged
+        bpm: Base tempo the arrangement was generated at
+        spread: Tempo swing: white slices play (1 + spread) times the
+            speed of mid-grey ones, black slices (1 - spread) times
+
+    Raises:
+        ValueError: If spread is outside [0, 1) or there are no notes
+    """
+    if not (0 <= spread < 1):
+        raise ValueError(f"Tempo spread must be in [0, 1), got {spread}")
+    if not notes:
+        raise ValueError("No notes provided")
+    brightness = np.array([n["brightness"] for n in notes], dtype=np.float64)
+    speed = 1.0 + spread * (2.0 * np.clip(brightness / 255.0, 0.0, 1.0) - 1.0)
+    step = duration / len(notes)
+    # Rescale so the slices still add up to the requested duration
+    real_steps = step / speed
+    real_steps *= duration / real_steps.sum()
+    return slice_tempo_map(real_steps, bpm, step * bpm / 60.0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-image album mode
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from album import build_album_rolls, extract_sections, stitch_sections
+
+
+def _section(root, count, brightness=128):
+    return [
+        {
+            "midi": root,
+            "chord": [root, root + 4, root + 7],
+            "position": i / count,
+            "brightness": brightness,
+        }
+        for i in range(count)
+    ]
+
+
+class TestAlbum(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_transitions_glide_between_sections(self):
+        """Test that transition slices interpolate from one section to the next."""
+        notes, durations = stitch_sections(
+            [_section(60, 4, 64), _section(72, 4, 192)], [8.0, 8.0], 3
+        )
+        self.assertEqual(len(notes), 11)
+        self.assertEqual([n["midi"] for n in notes[4:7]], [63, 66, 69])
+        self.assertEqual(notes[5]["chord"], [66, 70, 73])
+        self.assertAlmostEqual(notes[5]["brightness"], 128)
+        self.assertEqual([n["position"] for n in notes], [i / 11 for i in range(11)])
+        np.testing.assert_allclose(durations, [2.0] * 11)
+
+    def test_tempo_ramp_between_sections(self):
+        """Test that transition slices ramp between the section tempos."""
+        _, durations = stitch_sections(
+            [_section(60, 4), _section(60, 4)], [8.0, 4.0], 1
+        )
+        # 2s slices, then a 1.5s transition slice, then 1s slices
+        np.testing.assert_allclose(durations, [2, 2, 2, 2, 1.5, 1, 1, 1, 1])
+
+    def test_stitch_rejects_mismatched_durations(self):
+        """Test that every section needs a duration."""
+        with self.assertRaises(ValueError):
+            stitch_sections([_section(60, 4)], [8.0, 8.0])
+
+    def test_notes_follow_slice_durations(self):
+        """Test that notes start on the stitched slice boundaries."""
+        notes, durations = stitch_sections(
+            [_section(60, 4), _section(67, 4)], [8.0, 4.0], 2
+        )
+        (bass,) = build_album_rolls(notes, durations, 120, ["bass"], seed=1)
+        self.assertAlmostEqual(bass.end_time, float(durations.sum()))
+        np.testing.assert_allclose(bass.starts, np.cumsum(durations) - durations)
+
+    def test_extract_sections_names_bad_image(self):
+        """Test parallel extraction and the error naming an unreadable image."""
+        good = os.path.join(self.temp_dir, "good.png")
+        Image.new("L", (32, 16), 128).save(good)
+        sections = extract_sections([good, good], num_slices=4, max_workers=2)
+        self.assertEqual([len(section) for section in sections], [4, 4])
+
+        missing = os.path.join(self.temp_dir, "missing.png")
+        with self.assertRaisesRegex(ValueError, "missing.png"):
+            extract_sections([good, missing], num_slices=4, max_workers=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Tests for shared-memory handoff and batch export
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batch_export import (
+    CoalescingConverter,
+    batch_output_paths,
+    export_batch,
+    make_export_options,
+)
+from job_scheduler import BULK, PriorityScheduler
+from midi_exporter import notes_from_array, notes_from_pixels, notes_to_array
+from shared_arrays import (
+    SharedArrayRegistry,
+    publish_array,
+    unlink_shared_array,
+    with_shared_array,
+)
+
+
+class TestSharedArrays(unittest.TestCase):
+    def test_round_trip_and_release(self):
+        """Test that a shared array is readable by descriptor and then freed."""
+        pixels = np.arange(200, dtype=np.uint8).reshape(10, 20)
+        with SharedArrayRegistry() as registry:
+            ref = registry.put(pixels)
+            self.assertEqual(ref.nbytes, pixels.nbytes)
+            total = with_shared_array(ref, lambda view: int(view.sum()))
+            self.assertEqual(total, int(pixels.sum()))
+            self.assertEqual(len(registry), 1)
+        self.assertEqual(len(registry), 0)
+        with self.assertRaises(FileNotFoundError):
+            with_shared_array(ref, lambda view: None)
+
+    def test_view_is_read_only(self):
+        """Test that attached views cannot modify the shared block."""
+        ref = publish_array(np.zeros(4))
+        try:
+
+            def write(view):
+                view[0] = 1
+
+            with self.assertRaises(ValueError):
+                with_shared_array(ref, write)
+        finally:
+            unlink_shared_array(ref)
+
+    def test_note_array_round_trip(self):
+        """Test packing note slices into a structured shared array."""
+        pixels = np.tile(np.linspace(0, 255, 40, dtype=np.uint8), (12, 1))
+        notes = notes_from_pixels(pixels, num_slices=5)
+        with SharedArrayRegistry() as registry:
+            ref = registry.put(notes_to_array(notes))
+            restored = with_shared_array(ref, notes_from_array)
+        self.assertEqual(restored, notes)
+
+
+class TestBatchExport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_output_paths_are_unique(self):
+        """Test that images with the same name get distinct outputs."""
+        paths = batch_output_paths(["a/x.png", "b/x.jpg", "y.png"], "out")
+        self.assertEqual(
+            paths,
+            [os.path.join("out", n) for n in ("x.mid", "x_1.mid", "y.mid")],
+        )
+
+    def test_unknown_option(self):
+        """Test that misspelled export options are rejected."""
+        with self.assertRaises(ValueError):
+            make_export_options(bmp=120)
+
+    def test_batch_with_failures(self):
+        """Test a batch where one image is missing."""
+        image_path = os.path.join(self.temp_dir, "gradient.png")
+        Image.fromarray(np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (32, 1))).save(
+            image_path
+        )
+        output_dir = os.path.join(self.temp_dir, "midi")
+
+        results = export_batch(
+            [image_path, os.path.join(self.temp_dir, "missing.png")],
+            output_dir,
+            {"num_slices": 8, "tracks": ["melody", "bass"]},
+            decode_workers=1,
+            generate_workers=1,
+        )
+
+        self.assertTrue(results[0]["ok"])
+        self.assertTrue(os.path.exists(results[0]["output_path"]))
+        self.assertEqual(results[0]["tracks"], ["Melody", "Bass"])
+        self.assertFalse(results[1]["ok"])
+        self.assertIn("decode failed", results[1]["error"])
+
+    def _gradient(self, name):
+        image_path = os.path.join(self.temp_dir, name)
+        Image.fromarray(np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (32, 1))).save(
+            image_path
+        )
+        return image_path
+
+    def test_batch_converts_duplicates_once(self):
+        """Test that identical images in a batch share one conversion."""
+        first = self._gradient("first.png")
+        copy = self._gradient("copy.png")
+        results = export_batch(
+            [first, copy],
+            os.path.join(self.temp_dir, "midi"),
+            {"num_slices": 8, "tracks": ["bass"], "seed": 1},
+            decode_workers=1,
+            generate_workers=1,
+        )
+        self.assertTrue(all(result["ok"] for result in results))
+        self.assertNotIn("coalesced", results[0])
+        self.assertTrue(results[1]["coalesced"])
+        self.assertEqual(results[1]["image_path"], copy)
+        with open(results[0]["output_path"], "rb") as a, open(
+            results[1]["output_path"], "rb"
+        ) as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_unseeded_duplicates_convert_separately(self):
+        """Test that unseeded duplicates each get their own conversion."""
+        first = self._gradient("first.png")
+        copy = self._gradient("copy.png")
+        results = export_batch(
+            [first, copy],
+            os.path.join(self.temp_dir, "midi"),
+            {"num_slices": 8, "tracks": ["bass"]},
+            decode_workers=1,
+            generate_workers=1,
+        )
+        self.assertTrue(all(result["ok"] for result in results))
+        self.assertFalse(any(result.get("coalesced") for result in results))
+        self.assertTrue(all("generate_seconds" in result for result in results))
+
+        release = threading.Event()
+        with ThreadPoolExecutor(1) as pool:
+            converter = CoalescingConverter(PriorityScheduler(pool, 1))
+            pool.submit(release.wait, 5)
+            futures = [
+                converter.submit(
+                    first,
+                    os.path.join(self.temp_dir, "midi", f"watch{i}.mid"),
+                    {"num_slices": 8, "tracks": ["bass"]},
+                )
+                for i in range(2)
+            ]
+            release.set()
+            self.assertFalse(any(f.result(30).get("coalesced") for f in futures))
+        self.assertEqual(converter.flights.leaders, 0)
+
+    def test_batch_runs_as_bulk_work(self):
+        """Test that batch generation is queued as bulk work on a scheduler."""
+        image_path = self._gradient("gradient.png")
+        with ThreadPoolExecutor(2) as pool:
+            scheduler = PriorityScheduler(pool, 2)
+            results = export_batch(
+                [image_path, image_path],
+                os.path.join(self.temp_dir, "midi"),
+                {"num_slices": 8, "tracks": ["bass"]},
+                decode_workers=1,
+                scheduler=scheduler,
+            )
+        self.assertTrue(all(result["ok"] for result in results))
+        self.assertEqual(scheduler.stats()[BULK]["completed"], 2)
+
+    def test_coalescing_converter_shares_errors(self):
+        """Test that followers of a failed conversion see its error."""
+        bad = os.path.join(self.temp_dir, "bad.png")
+        with open(bad, "wb") as bad_file:
+            bad_file.write(b"not an image")
+        output_dir = os.path.join(self.temp_dir, "midi")
+        os.makedirs(output_dir)
+        release = threading.Event()
+        with ThreadPoolExecutor(1) as pool:
+            converter = CoalescingConverter(PriorityScheduler(pool, 1))
+            # Keep the worker busy so both requests are in flight together
+            pool.submit(release.wait, 5)
+            futures = [
+                converter.submit(bad, os.path.join(output_dir, f"{i}.mid"), {"seed": 1})
+                for i in range(2)
+            ]
+            release.set()
+            for future in futures:
+                with self.assertRaises(OSError):
+                    future.result()
+        self.assertEqual(converter.flights.followers, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming note-event API
+"""
+
+import io
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import midi_exporter
+from event_stream import iter_note_events, stream_json_lines
+
+
+def _notes(count):
+    notes = []
+    for i in range(count):
+        root = 48 + (i * 5) % 24
+        notes.append(
+            {
+                "midi": root,
+                "chord": [root, root + 4, root + 7],
+                "position": i / count,
+                "brightness": (i % 7) * 42,
+            }
+        )
+    return notes
+
+
+class TestEventStream(unittest.TestCase):
+    def test_events_are_in_start_order(self):
+        """Test that events of all tracks arrive in start order."""
+        events = list(iter_note_events(_notes(32), 16, seed=3))
+        self.assertTrue(events)
+        starts = [event.start for event in events]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual({event.track for event in events}, {0, 1, 2, 3})
+
+    def test_matches_chunked_generation(self):
+        """Test that streaming yields the notes of chunked generation."""
+        notes = _notes(24)
+        expected = sorted(
+            (track, pitch, velocity, start, end)
+            for _, _, rolls in midi_exporter.iter_track_chunks(
+                notes, 12, ["melody", "bass"], chunk_steps=1, seed=5
+            )
+            for track, roll in enumerate(rolls)
+            for start, end, pitch, velocity in zip(
+                *(column.tolist() for column in roll.columns())
+            )
+        )
+        streamed = sorted(
+            tuple(event)
+            for event in iter_note_events(notes, 12, ["melody", "bass"], seed=5)
+        )
+        self.assertEqual(streamed, expected)
+
+    def test_first_event_needs_only_the_first_step(self):
+        """Test that the first event is generated without the rest of the piece."""
+        with mock.patch.object(
+            midi_exporter, "generate_tracks", wraps=midi_exporter.generate_tracks
+        ) as generate:
+            events = iter_note_events(_notes(500), 3600, ["melody"], seed=1)
+            next(events)
+            self.assertEqual(generate.call_count, 1)
+
+    def test_json_lines(self):
+        """Test the header, note and end lines of the JSON stream."""
+        output = io.StringIO()
+        count = stream_json_lines(_notes(8), output, 90, 8, ["bass"], seed=2)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0]["type"], "header")
+        self.assertEqual(lines[0]["tracks"][0]["name"], "Bass")
+        self.assertEqual(lines[-1], {"type": "end", "notes": count})
+        self.assertEqual(len(lines), count + 2)
+        self.assertTrue(all(line["type"] == "note" for line in lines[1:-1]))
+
+    def test_invalid_settings(self):
+        """Test that empty notes and a zero step size raise ValueError."""
+        with self.assertRaises(ValueError):
+            next(iter_note_events([], 8))
+        with self.assertRaises(ValueError):
+            next(iter_note_events(_notes(4), 8, step_slices=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the drum groove banks
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from groove_bank import (
+    AI_GROOVES,
+    STANDARD_GROOVES,
+    DrumVoice,
+    GrooveBank,
+    load_groove_bank,
+    parse_pattern,
+)
+from midi_exporter import generate_ai_percussion, generate_percussion_track
+
+BANK_JSON = {
+    "thresholds": [100],
+    "steps_per_bar": 2,
+    "subdivisions": 2,
+    "voices": {
+        "kick": {"pitch": 36, "velocity": 100},
+        "clap": {"pitch": 39, "velocity": 90, "length": 0.05},
+    },
+    "grooves": {
+        "dark": {"kick": "x. .."},
+        "bright": {"kick": "x. x.", "clap": ".o .X"},
+    },
+}
+
+
+def _mock_notes(brightness):
+    return [
+        {"midi": 60, "chord": [60, 64, 67], "position": 0.0, "brightness": value}
+        for value in brightness
+    ]
+
+
+class TestGrooveBank(unittest.TestCase):
+    def test_parse_pattern(self):
+        """Test accents, separators and malformed patterns."""
+        np.testing.assert_allclose(parse_pattern("x.o|X", 4), [1.0, 0.0, 0.6, 1.2])
+        with self.assertRaises(ValueError):
+            parse_pattern("x..?", 4)
+        with self.assertRaises(ValueError):
+            parse_pattern("x...", 8)
+
+    def test_groove_selected_per_bar(self):
+        """Test that each bar uses the groove of its mean brightness band."""
+        brightness = np.array([0, 60, 90, 200, 250, 250], dtype=float)
+        np.testing.assert_array_equal(
+            STANDARD_GROOVES.select(brightness), [0, 0, 0, 0, 2, 2]
+        )
+        # A chunk starting mid-bar keeps the piece's bar grid
+        np.testing.assert_array_equal(
+            STANDARD_GROOVES.select(brightness[3:5], step_offset=3), [1, 2]
+        )
+
+    def test_custom_bank_expansion(self):
+        """Test hit times, pitches and accented velocities from a JSON bank."""
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(BANK_JSON, f)
+        try:
+            bank = load_groove_bank(f.name)
+        finally:
+            os.unlink(f.name)
+
+        starts, ends, pitches, velocities = bank.expand(
+            np.array([0, 50, 255, 255], dtype=float), 1.0
+        )
+        self.assertEqual(
+            list(zip(starts.tolist(), pitches.tolist(), velocities.tolist())),
+            [
+                (0.0, 36, 100),
+                (2.0, 36, 100),
+                (2.5, 39, 54),
+                (3.0, 36, 100),
+                (3.5, 39, 108),
+            ],
+        )
+        self.assertAlmostEqual(ends[2], 2.55)
+
+    def test_invalid_banks(self):
+        """Test that inconsistent banks raise ValueError."""
+        voices = {"kick": DrumVoice(36)}
+        with self.assertRaises(ValueError):
+            GrooveBank(voices, {"a": {"kick": "x" * 16}}, thresholds=[128])
+        with self.assertRaises(ValueError):
+            GrooveBank(voices, {"a": {"snare": "x" * 16}}, thresholds=[])
+        with self.assertRaises(ValueError):
+            GrooveBank({"kick": DrumVoice(36, curve="missing")}, {"a": {}}, [])
+
+
+class TestGroovePercussion(unittest.TestCase):
+    def test_standard_percussion(self):
+        """Test kick and snare placement and hats only in bright bars."""
+        notes = _mock_notes([0] * 4 + [255] * 4)
+        track = generate_percussion_track(notes, 8.0)
+        kicks = [n.start for n in track.notes if n.pitch == 36]
+        snares = [n.start for n in track.notes if n.pitch == 38]
+        hats = [n.start for n in track.notes if n.pitch in (42, 46)]
+        self.assertEqual((kicks, snares), ([0.0, 4.0], [2.0, 6.0]))
+        self.assertTrue(hats and min(hats) >= 4.0)
+
+    def test_ai_percussion_is_seeded_and_humanized(self):
+        """Test that AI grooves follow the rng and densify with brightness."""
+        notes = _mock_notes([0] * 4 + [255] * 4)
+        first = generate_ai_percussion(notes, 8.0, rng=random.Random(1))
+        second = generate_ai_percussion(notes, 8.0, rng=random.Random(1))
+        self.assertEqual(
+            [(n.pitch, n.start) for n in first.notes],
+            [(n.pitch, n.start) for n in second.notes],
+        )
+        dark = [n for n in first.notes if n.start < 3.9]
+        self.assertEqual({n.pitch for n in dark}, {36})
+        self.assertEqual(len(first.notes), 4 + 4 * 4)
+        self.assertTrue(any(n.start % 0.25 for n in first.notes))
+        self.assertEqual(AI_GROOVES.groove_names[-1], "sixteenths")
+
+    def test_unseeded_humanization_leaves_global_random_alone(self):
+        """Test that unseeded grooves draw from the default generator."""
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        AI_GROOVES.expand(np.full(8, 255.0), 0.5)
+        self.assertEqual(random.random(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared harmonic analysis and the arrangement task graph
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harmony_analysis import analyze_harmony, voicing_pitches
+from midi_exporter import build_midi, generate_tracks
+from task_graph import TaskGraph
+
+
+def _mock_notes(count):
+    return [
+        {
+            "midi": 40 + (i * 5) % 48,
+            "chord": [40 + (i * 5) % 48, 44 + (i * 5) % 48, 47 + (i * 5) % 48],
+            "position": i / count,
+            "brightness": (i * 53) % 256,
+        }
+        for i in range(count)
+    ]
+
+
+class TestHarmonyAnalysis(unittest.TestCase):
+    def test_progression_fields(self):
+        """Test root, quality, voicing and bass for each step."""
+        notes = _mock_notes(6)
+        progression = analyze_harmony(notes)
+        self.assertEqual(len(progression), 6)
+        np.testing.assert_array_equal(progression["root"], [n["midi"] for n in notes])
+        self.assertEqual(progression["triad"][1].tolist(), notes[1]["chord"])
+        self.assertTrue(
+            np.all((progression["bass"] >= 24) & (progression["bass"] <= 48))
+        )
+
+        # Brightness 0 → major pattern [0, 2, 4] on the root
+        self.assertEqual(progression["quality"][0], 0)
+        self.assertEqual(voicing_pitches(progression[0]), [40, 42, 44])
+
+    def test_voicing_clamped_to_range(self):
+        """Test that voicings stay in the harmony range."""
+        notes = [{"midi": 96, "chord": [96, 100, 103], "brightness": 255}]
+        self.assertEqual(set(voicing_pitches(analyze_harmony(notes)[0])), {84})
+
+
+class TestTaskGraph(unittest.TestCase):
+    def test_shared_dependency_runs_once(self):
+        """Test that a shared intermediate is computed once for all consumers."""
+        calls = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def analysis():
+            calls.append("analysis")
+            return 10
+
+        def consumer(offset):
+            def run(value):
+                barrier.wait()  # Both consumers must be running at once
+                return value + offset
+
+            return run
+
+        graph = TaskGraph()
+        graph.add("analysis", analysis)
+        graph.add("a", consumer(1), ["analysis"])
+        graph.add("b", consumer(2), ["analysis"])
+        self.assertEqual(graph.run(), {"analysis": 10, "a": 11, "b": 12})
+        self.assertEqual(calls, ["analysis"])
+
+    def test_unknown_dependency(self):
+        """Test that dependencies must be registered first."""
+        graph = TaskGraph()
+        with self.assertRaises(ValueError):
+            graph.add("a", lambda value: value, ["missing"])
+
+    def test_failure_propagates(self):
+        """Test that a failing task raises from run()."""
+        graph = TaskGraph()
+        graph.add("boom", lambda: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            graph.run()
+
+
+class TestSeededArrangement(unittest.TestCase):
+    def test_seed_is_reproducible(self):
+        """Test that concurrent generation with a seed gives identical output."""
+        notes = _mock_notes(16)
+
+        def render(seed):
+            midi = build_midi(notes, 100, 8, ["melody", "bass"], True, seed=seed)
+            return [
+                [(n.pitch, n.velocity, n.start) for n in inst.notes]
+                for inst in midi.instruments
+            ]
+
+        self.assertEqual(render(7), render(7))
+        self.assertNotEqual(render(7), render(8))
+
+    def test_tracks_keep_requested_order(self):
+        """Test that generated rolls follow the requested track order."""
+        tracks = generate_tracks(_mock_notes(4), 4.0, ["bass", "melody", "harmony"])
+        self.assertEqual([t.name for t in tracks], ["Bass", "Melody", "Harmony"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for per-slice colour and texture features
+"""
+
+import colorsys
+import os
+import sys
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from image_features import (
+    FEATURE_NAMES,
+    program_for_hue,
+    rgb_to_luma,
+    slice_features,
+)
+from midi_exporter import (
+    generate_melody_track,
+    generate_percussion_track,
+    notes_from_array,
+    notes_from_pixels,
+    notes_to_array,
+)
+
+
+def _column(name):
+    return FEATURE_NAMES.index(name)
+
+
+class TestSliceFeatures(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.rgb = rng.integers(0, 256, (24, 40, 3), dtype=np.uint8)
+
+    def test_luma_matches_pil(self):
+        """Test that luma uses the same rounding as PIL's convert("L")."""
+        expected = np.array(Image.fromarray(self.rgb).convert("L"))
+        np.testing.assert_array_equal(rgb_to_luma(self.rgb), expected)
+
+    def test_matches_direct_computation(self):
+        """Test one slice's features against straightforward per-slice code."""
+        features = slice_features(self.rgb, num_slices=4)
+        self.assertEqual(features.shape, (4, len(FEATURE_NAMES)))
+
+        region = self.rgb[:, 10:20].astype(float)
+        gray = rgb_to_luma(self.rgb).astype(float)
+        row = features[1]
+        np.testing.assert_allclose(row[:3], region.reshape(-1, 3).mean(axis=0))
+        self.assertAlmostEqual(row[_column("brightness")], gray[:, 10:20].mean())
+        self.assertAlmostEqual(row[_column("contrast")], gray[:, 10:20].std())
+        saturation = np.mean(
+            [colorsys.rgb_to_hsv(*(p / 255))[1] for p in region.reshape(-1, 3)]
+        )
+        self.assertAlmostEqual(row[_column("saturation")], saturation, places=5)
+        hist = row[_column("hist_0") :]
+        self.assertAlmostEqual(hist.sum(), 1.0)
+
+    def test_hue_of_solid_colours(self):
+        """Test the hue of pure red, green and blue slices."""
+        rgb = np.zeros((10, 30, 3), dtype=np.uint8)
+        rgb[:, :10, 0] = rgb[:, 10:20, 1] = rgb[:, 20:, 2] = 200
+        hues = slice_features(rgb, num_slices=3)[:, _column("hue")]
+        np.testing.assert_allclose(hues, [0, 120, 240], atol=1e-6)
+        self.assertEqual(program_for_hue(240, 1.0), 52)
+        self.assertEqual(program_for_hue(240, 0.05), 0)
+
+    def test_more_slices_than_columns(self):
+        """Test that narrow images still give one feature row per slice."""
+        self.assertEqual(slice_features(self.rgb[:, :5], 8).shape[0], 8)
+
+
+class TestFeatureDrivenTracks(unittest.TestCase):
+    def setUp(self):
+        # Smooth blue left half, noisy grey right half
+        rng = np.random.default_rng(3)
+        self.rgb = np.zeros((32, 64, 3), dtype=np.uint8)
+        self.rgb[:, :32] = (30, 60, 220)
+        self.rgb[:, 32:] = rng.integers(0, 256, (32, 32, 1), dtype=np.uint8)
+        self.notes = notes_from_pixels(self.rgb, num_slices=4)
+
+    def test_notes_carry_features(self):
+        """Test that RGB input adds features and keeps brightness behaviour."""
+        gray_notes = notes_from_pixels(rgb_to_luma(self.rgb), num_slices=4)
+        for note, gray_note in zip(self.notes, gray_notes):
+            self.assertEqual(note["midi"], gray_note["midi"])
+            self.assertEqual(set(note["features"]), set(FEATURE_NAMES))
+        self.assertEqual(notes_from_array(notes_to_array(self.notes)), self.notes)
+
+    def test_hue_and_edges_drive_tracks(self):
+        """Test that blue picks choir and busy slices get more hi-hats."""
+        self.assertEqual(generate_melody_track(self.notes, 4.0).program, 52)
+
+        hats = [
+            n.start
+            for n in generate_percussion_track(self.notes, 4.0).notes
+            if n.pitch in (42, 46)
+        ]
+        self.assertEqual(sum(1 for start in hats if start < 2.0), 0)
+        self.assertGreater(sum(1 for start in hats if start >= 2.0), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
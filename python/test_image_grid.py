@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for summed-area grid sonification
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from image_grid import grid_edges, grid_means, integral_image
+from midi_exporter import (
+    generate_grid_track,
+    notes_from_array,
+    notes_from_pixels,
+    notes_to_array,
+)
+
+
+class TestImageGrid(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.pixels = rng.integers(0, 256, (37, 53), dtype=np.uint8)
+
+    def test_integral_image(self):
+        """Test that table[y, x] is the sum of the pixels above and left."""
+        table = integral_image(self.pixels)
+        self.assertEqual(table.shape, (38, 54))
+        self.assertEqual(table[0].sum(), 0)
+        self.assertEqual(table[20, 31], self.pixels[:20, :31].sum(dtype=np.int64))
+
+    def test_grid_matches_direct_means(self):
+        """Test region means against slicing each cell directly."""
+        means = grid_means(self.pixels, num_slices=7, num_bands=5)
+        rows, cols = grid_edges(37, 5), grid_edges(53, 7)
+        for r in range(5):
+            for c in range(7):
+                cell = self.pixels[rows[r] : rows[r + 1], cols[c] : cols[c + 1]]
+                self.assertAlmostEqual(means[r, c], cell.mean())
+
+    def test_per_channel_grid(self):
+        """Test that colour images get one mean per channel."""
+        rgb = np.stack([self.pixels, 255 - self.pixels, self.pixels // 2], axis=2)
+        means = grid_means(rgb, num_slices=4, num_bands=3)
+        self.assertEqual(means.shape, (3, 4, 3))
+        np.testing.assert_allclose(means[..., 1], 255 - means[..., 0])
+
+    def test_too_many_cells(self):
+        """Test that a grid finer than the image is rejected."""
+        with self.assertRaises(ValueError):
+            grid_edges(10, 11)
+
+
+class TestGridTrack(unittest.TestCase):
+    def test_top_band_plays_high(self):
+        """Test that a bright top band sounds above a bright bottom band."""
+        pixels = np.zeros((40, 40), dtype=np.uint8)
+        pixels[:10, :20] = 255  # Top band, first half
+        pixels[30:, 20:] = 255  # Bottom band, second half
+        notes = notes_from_pixels(pixels, num_slices=4, num_bands=4)
+        self.assertEqual(len(notes[0]["bands"]), 4)
+
+        track = generate_grid_track(notes, 4.0)
+        first = [n.pitch for n in track.notes if n.start < 1.0]
+        last = [n.pitch for n in track.notes if n.start >= 3.0]
+        self.assertGreater(max(first), 72)
+        self.assertLess(max(last), 48)
+
+    def test_bands_survive_array_round_trip(self):
+        """Test that band values are kept when packing note slices."""
+        pixels = np.tile(np.arange(30, dtype=np.uint8)[:, None] * 8, (1, 30))
+        notes = notes_from_pixels(pixels, num_slices=3, num_bands=3)
+        self.assertEqual(notes_from_array(notes_to_array(notes)), notes)
+
+    def test_missing_bands(self):
+        """Test that the grid track requires band data."""
+        notes = notes_from_pixels(np.zeros((20, 20), dtype=np.uint8), num_slices=2)
+        with self.assertRaises(ValueError):
+            generate_grid_track(notes, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for header-only image preflight and budgeted decoding
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from image_preflight import DecodeBudget, decode_pixels, preflight_image
+from midi_exporter import decode_image_pixels
+
+
+class TestImagePreflight(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.rgb = rng.integers(0, 256, (120, 300, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save(self, name, array=None):
+        path = os.path.join(self.temp_dir, name)
+        Image.fromarray(self.rgb if array is None else array).save(path)
+        return path
+
+    def test_small_image_full_decode(self):
+        """Test that an image within budget is decoded normally."""
+        path = self._save("small.png")
+        plan = preflight_image(path, max_width=1000)
+        self.assertEqual(plan.strategy, "full")
+        self.assertEqual((plan.width, plan.height, plan.format), (300, 120, "PNG"))
+        self.assertEqual(decode_pixels(path, plan, 1000, "L").shape, (120, 300))
+
+    def test_tiled_bmp_matches_pil(self):
+        """Test that streamed BMP rows match PIL's grayscale conversion."""
+        path = self._save("large.bmp")
+        budget = DecodeBudget(max_pixels=1000, max_memory_bytes=1000)
+        plan = preflight_image(path, max_width=100, budget=budget)
+        self.assertEqual((plan.strategy, plan.scale), ("tiled", 3))
+
+        expected = np.array(Image.open(path).convert("L"))[::3, ::3]
+        np.testing.assert_array_equal(decode_pixels(path, plan, 100, "L"), expected)
+
+    def test_jpeg_uses_draft(self):
+        """Test that oversized JPEGs are decoded at reduced DCT scale."""
+        path = self._save("photo.jpg")
+        budget = DecodeBudget(max_pixels=1000, max_memory_bytes=1000)
+        plan = preflight_image(path, max_width=75, budget=budget)
+        self.assertEqual((plan.strategy, plan.scale), ("draft", 4))
+        self.assertEqual(decode_pixels(path, plan, 75, "L").shape, (30, 75))
+
+    def test_reject_over_pixel_limit(self):
+        """Test that images above the hard pixel limit are never decoded."""
+        path = self._save("huge.png")
+        budget = DecodeBudget(reject_pixels=10_000)
+        plan = preflight_image(path, budget=budget)
+        self.assertEqual(plan.strategy, "reject")
+        with self.assertRaises(ValueError):
+            decode_image_pixels(path, budget=budget)
+
+
+if __name__ == "__main__":
+    unittest.main()
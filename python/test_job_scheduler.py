@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the priority-aware export job scheduler
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batch_export import CoalescingConverter
+from job_scheduler import BULK, INTERACTIVE, PriorityClass, PriorityScheduler
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.order = []
+        self.lock = threading.Lock()
+
+    def _job(self, label):
+        """Wait for the release, then record the label."""
+        self.release.wait(5)
+        with self.lock:
+            self.order.append(label)
+        return label
+
+    def _blocked_scheduler(self, pool, clock, **kwargs):
+        """A one-worker scheduler whose worker is busy until released."""
+        scheduler = PriorityScheduler(pool, 1, clock=clock, **kwargs)
+        self.gate = threading.Event()
+        scheduler.submit(INTERACTIVE, self.gate.wait, 5)
+        return scheduler
+
+    def test_interactive_jumps_the_bulk_queue(self):
+        """Test that a later interactive job runs before queued bulk jobs."""
+        clock = FakeClock()
+        self.release.set()
+        with ThreadPoolExecutor(1) as pool:
+            scheduler = self._blocked_scheduler(pool, clock)
+            for i in range(3):
+                scheduler.submit(BULK, self._job, f"bulk{i}")
+            scheduler.submit(INTERACTIVE, self._job, "ui")
+            self.assertEqual(scheduler.stats()[BULK]["queued"], 3)
+            self.gate.set()
+            self.assertTrue(scheduler.join(5))
+        self.assertEqual(self.order, ["ui", "bulk0", "bulk1", "bulk2"])
+
+    def test_aging_prevents_starvation(self):
+        """Test that a long-waiting bulk job outranks fresh interactive work."""
+        clock = FakeClock()
+        self.release.set()
+        with ThreadPoolExecutor(1) as pool:
+            scheduler = self._blocked_scheduler(pool, clock, aging_seconds=1.0)
+            scheduler.submit(BULK, self._job, "old bulk")
+            clock.now = 11.0  # Waited past the 10-level priority gap
+            scheduler.submit(INTERACTIVE, self._job, "ui")
+            self.gate.set()
+            self.assertTrue(scheduler.join(5))
+        self.assertEqual(self.order, ["old bulk", "ui"])
+
+    def test_class_limits(self):
+        """Test that bulk jobs leave a worker free for interactive ones."""
+        classes = {INTERACTIVE: PriorityClass(10, 3), BULK: PriorityClass(0, 2)}
+        with ThreadPoolExecutor(3) as pool:
+            scheduler = PriorityScheduler(pool, 3, classes)
+            futures = [scheduler.submit(BULK, self._job, i) for i in range(4)]
+            stats = scheduler.stats()[BULK]
+            self.assertEqual((stats["running"], stats["queued"]), (2, 2))
+            # The worker kept free serves interactive exports at once
+            ui = scheduler.submit(INTERACTIVE, lambda: "ui")
+            self.assertEqual(ui.result(5), "ui")
+            self.release.set()
+            self.assertEqual([f.result(5) for f in futures], [0, 1, 2, 3])
+        self.assertEqual(scheduler.stats()[BULK]["completed"], 4)
+
+    def test_errors_and_cancellation(self):
+        """Test job exceptions, cancelled queued jobs and unknown classes."""
+        self.release.set()
+        with ThreadPoolExecutor(1) as pool:
+            scheduler = self._blocked_scheduler(pool, FakeClock())
+            failing = scheduler.submit(BULK, int, "not a number")
+            dropped = scheduler.submit(BULK, self._job, "dropped")
+            self.assertTrue(dropped.cancel())
+            self.gate.set()
+            with self.assertRaises(ValueError):
+                failing.result(5)
+            self.assertTrue(scheduler.join(5))
+        self.assertEqual(self.order, [])
+        with self.assertRaises(ValueError):
+            scheduler.submit("nightly", self._job, "x")
+
+    def test_exports_on_a_process_pool(self):
+        """Test scheduling real exports on a process pool."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            image_path = os.path.join(temp_dir, "gradient.png")
+            Image.fromarray(
+                np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (32, 1))
+            ).save(image_path)
+            with ProcessPoolExecutor(2) as pool:
+                scheduler = PriorityScheduler(pool, 2)
+                converter = CoalescingConverter(scheduler)
+                futures = [
+                    converter.submit(
+                        image_path,
+                        os.path.join(temp_dir, f"{i}.mid"),
+                        {"num_slices": 8, "tracks": ["bass"]},
+                        job_class,
+                    )
+                    for i, job_class in enumerate([BULK, BULK, INTERACTIVE])
+                ]
+                results = [future.result(60) for future in futures]
+            self.assertTrue(all(os.path.exists(r["output_path"]) for r in results))
+            self.assertEqual(scheduler.stats()[BULK]["completed"], 2)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the load-testing harness
+"""
+
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from job_scheduler import BULK, INTERACTIVE
+from load_test import (
+    arrival_offsets,
+    cli_arguments,
+    job_classes,
+    run_load,
+    summarize,
+    synthesize_images,
+)
+
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_synthetic_images(self):
+        """Test that the synthetic images are readable and varied."""
+        paths = synthesize_images(self.temp_dir, 3, seed=1)
+        sizes = set()
+        for path in paths:
+            with Image.open(path) as img:
+                sizes.add(img.size)
+                self.assertEqual(img.mode, "RGB")
+        self.assertEqual(len(sizes), 3)
+
+    def test_cli_arguments(self):
+        """Test mapping export options to exporter flags."""
+        self.assertEqual(
+            cli_arguments({"bpm": 90, "tracks": ["melody"], "ai_mode": True}),
+            ["-b", "90", "-t", "melody", "--ai-mode"],
+        )
+        with self.assertRaises(ValueError):
+            cli_arguments({"curves": {}})
+
+    def test_arrivals_and_summary(self):
+        """Test Poisson arrival offsets and the percentile summary."""
+        self.assertTrue(np.all(arrival_offsets(3, None) == 0))
+        offsets = arrival_offsets(1000, 50.0, seed=2)
+        self.assertEqual(offsets[0], 0)
+        self.assertTrue(np.all(np.diff(offsets) >= 0))
+        self.assertAlmostEqual(offsets[-1] / 999, 1 / 50, delta=0.004)
+        with self.assertRaises(ValueError):
+            arrival_offsets(3, 0)
+
+        report = summarize("cli", [0.1 * i for i in range(1, 101)], 2, 5.0, 1.5, 2**20)
+        self.assertEqual((report.requests, report.failures), (102, 2))
+        self.assertAlmostEqual(report.throughput, 20.0)
+        self.assertAlmostEqual(report.p50, 5.05)
+        self.assertEqual(report.peak_rss_mb, 1.0)
+        self.assertTrue(math.isnan(summarize("cli", [], 1, 1.0, None, None).p99))
+        self.assertTrue(math.isnan(report.interactive_p95))
+
+    def test_job_classes(self):
+        """Test that interactive requests are spread evenly through a run."""
+        self.assertEqual(job_classes(8, 0.25), [BULK, BULK, BULK, INTERACTIVE] * 2)
+        self.assertEqual(job_classes(3, 0.0), [BULK] * 3)
+        with self.assertRaises(ValueError):
+            job_classes(3, 1.5)
+
+    def test_resident_run(self):
+        """Test a small run against the resident process pool."""
+        images = synthesize_images(self.temp_dir, 2, max_width=96)
+        report = run_load(
+            "resident",
+            images,
+            os.path.join(self.temp_dir, "out"),
+            requests=3,
+            concurrency=1,
+            parameter_mix=[{"duration": 2}],
+        )
+        self.assertEqual((report.requests, report.failures), (3, 0))
+        self.assertLessEqual(report.p50, report.p99)
+        self.assertEqual(len(os.listdir(os.path.join(self.temp_dir, "out"))), 3)
+
+    def test_scheduled_run(self):
+        """Test a small run through the priority scheduler."""
+        images = synthesize_images(self.temp_dir, 2, max_width=96)
+        report = run_load(
+            "scheduled",
+            images,
+            os.path.join(self.temp_dir, "out"),
+            requests=4,
+            concurrency=2,
+            parameter_mix=[{"duration": 2}],
+            interactive_share=0.5,
+        )
+        self.assertEqual((report.requests, report.failures), (4, 0))
+        self.assertFalse(math.isnan(report.interactive_p95))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for brightness mapping curves
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mapping_curves import (
+    linear_curve,
+    parse_curve_assignment,
+    parse_curve_spec,
+    piecewise_curve,
+    table_curve,
+)
+from midi_exporter import generate_percussion_track
+
+
+class TestMappingCurves(unittest.TestCase):
+    def test_linear_matches_interp(self):
+        """Test that the linear table matches np.interp at integer brightness."""
+        curve = linear_curve(48, 84)
+        expected = [int(np.interp(b, [0, 255], [48, 84])) for b in range(256)]
+        self.assertEqual(curve.table.tolist(), expected)
+
+    def test_apply_to_array(self):
+        """Test that whole brightness arrays are mapped by indexing."""
+        curve = linear_curve(0, 255)
+        result = curve(np.array([0.0, 127.6, 300.0, -5.0]))
+        self.assertEqual(result.tolist(), [0, 128, 255, 0])
+
+    def test_curve_kinds(self):
+        """Test that every spec kind compiles to a monotonic table."""
+        for spec in ["linear", "exp:3", "exp:-2", "gamma:2.2", "piecewise:0:48,255:84"]:
+            curve = parse_curve_spec(spec, 48, 84)
+            self.assertEqual(curve.table.shape, (256,))
+            self.assertEqual(int(curve.table[0]), 48)
+            self.assertEqual(int(curve.table[255]), 84)
+            self.assertTrue(np.all(np.diff(curve.table.astype(int)) >= 0))
+
+    def test_piecewise_and_table(self):
+        """Test piecewise control points and resampled user tables."""
+        curve = piecewise_curve([(0, 10), (128, 100), (255, 20)])
+        self.assertEqual(int(curve.table[128]), 100)
+        self.assertEqual(table_curve([0, 100]).table[255], 100)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as handle:
+            handle.write(",".join(str(v) for v in range(256)))
+            table_path = handle.name
+        try:
+            name, curve = parse_curve_assignment(f"pitch=table:{table_path}")
+            self.assertEqual(name, "pitch")
+            # Pitches above 127 are clipped to the MIDI range
+            self.assertEqual(curve.table.tolist(), [min(v, 127) for v in range(256)])
+        finally:
+            os.unlink(table_path)
+
+    def test_invalid_specs(self):
+        """Test that malformed specs raise ValueError."""
+        for spec in ["cubic", "gamma:-1", "gamma:abc", "piecewise:0:1"]:
+            with self.assertRaises(ValueError):
+                parse_curve_spec(spec, 0, 127)
+        with self.assertRaises(ValueError):
+            parse_curve_assignment("unknown=linear")
+
+    def test_midi_curves_are_clipped(self):
+        """Test that pitch and velocity curves never leave the MIDI range."""
+        _, pitch = parse_curve_assignment("pitch=piecewise:0:0,255:200")
+        self.assertEqual(int(pitch.table.max()), 127)
+        _, velocity = parse_curve_assignment("kick_velocity=linear")
+        self.assertLessEqual(int(velocity.table.max()), 127)
+        # Other mappings keep the full table range
+        self.assertEqual(int(piecewise_curve([(0, 0), (255, 200)]).table[255]), 200)
+        with self.assertRaises(ValueError):
+            linear_curve(0, 127).limited(100, 300)
+
+    def test_custom_curve_in_generator(self):
+        """Test that generators use supplied curves for velocities."""
+        mock_notes = [
+            {"midi": 60, "chord": [60, 64, 67], "position": 0.0, "brightness": 0}
+        ]
+        curves = {"kick_velocity": piecewise_curve([(0, 127), (255, 127)])}
+        track = generate_percussion_track(mock_notes, duration=1.0, curves=curves)
+        self.assertEqual(track.notes[0].pitch, 36)
+        self.assertEqual(track.notes[0].velocity, 127)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ Basic tests for Hyper Vibe MIDI Exporter
 """
 
 import os
+import random
 import sys
 import tempfile
 import unittest
@@ -11,7 +12,15 @@ import unittest
 # Add the current directory to the path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from midi_exporter import extract_notes_from_image, generate_melody_track
+from midi_exporter import (
+    PREVIEW_SLICES,
+    extract_notes_from_image,
+    extract_preview_notes,
+    generate_harmony_track,
+    generate_melody_track,
+    harmony_roll,
+    preview_output_path,
+)
 
 
 class TestMIDIExporter(unittest.TestCase):
@@ -57,6 +66,29 @@ class TestMIDIExporter(unittest.TestCase):
         self.assertEqual(track.program, 0)  # Piano
         self.assertEqual(track.name, "Melody")
 
+    def test_generators_emit_rolls(self):
+        """Test that roll generators match their instruments and the seed."""
+        mock_notes = [
+            {
+                "midi": 60 + i,
+                "chord": [60 + i, 64 + i, 67 + i],
+                "position": i / 8,
+                "brightness": 30 * i,
+            }
+            for i in range(8)
+        ]
+
+        roll = harmony_roll(mock_notes, 4.0, rng=random.Random(7))
+        track = generate_harmony_track(mock_notes, 4.0, rng=random.Random(7))
+        self.assertEqual(
+            [(n.start, n.end, n.pitch, n.velocity) for n in track.notes],
+            list(zip(*(column.tolist() for column in roll.columns()))),
+        )
+        # Every step plays its triad, with or without a seventh
+        steps = (roll.starts / 0.5 + 1e-9).astype(int).tolist()
+        self.assertTrue(all(3 <= steps.count(step) <= 4 for step in range(8)))
+        self.assertTrue(all(55 <= v <= 65 for v in roll.velocities.tolist()))
+
     def test_midi_file_generation(self):
         """Test that MIDI files can be generated and saved."""
         if os.path.exists(self.test_image_path):
@@ -115,6 +147,29 @@ class TestMIDIExporter(unittest.TestCase):
             finally:
                 os.unlink(tmp_path)
 
+    def test_progressive_preview_notes(self):
+        """Test the coarse first pass of a progressive export."""
+        from PIL import Image
+
+        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp_file:
+            Image.linear_gradient("L").rotate(90).resize((1024, 64)).save(
+                tmp_file.name, "JPEG"
+            )
+            tmp_path = tmp_file.name
+
+        try:
+            preview = extract_preview_notes(tmp_path, num_slices=32)
+            full = extract_notes_from_image(tmp_path, num_slices=32)
+            self.assertEqual(len(preview), PREVIEW_SLICES)
+            self.assertEqual(len(extract_preview_notes(tmp_path, num_slices=4)), 4)
+            # Same overall shape as the full render: dark to bright
+            self.assertLess(preview[0]["midi"], preview[-1]["midi"])
+            self.assertEqual(preview[-1]["midi"], full[-1]["midi"])
+        finally:
+            os.unlink(tmp_path)
+
+        self.assertEqual(preview_output_path("out/song.mid"), "out/song_preview.mid")
+
     def test_midi_parameter_validation(self):
         """Test that MIDI parameters are within valid ranges."""
         if os.path.exists(self.test_image_path):
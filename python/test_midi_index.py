@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite MIDI index
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import pretty_midi
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_index import SCHEMA_VERSION, MidiIndex, TrackInfo, file_sha256
+
+
+def _write_midi(path, note_count=4):
+    midi = pretty_midi.PrettyMIDI(initial_tempo=120)
+    piano = pretty_midi.Instrument(program=0, name="Piano")
+    for i in range(note_count):
+        piano.notes.append(pretty_midi.Note(100, 60 + i, i * 0.5, i * 0.5 + 0.5))
+    midi.instruments.append(piano)
+    midi.write(path)
+
+
+class TestMidiIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.library = os.path.join(self.temp_dir, "library")
+        os.makedirs(self.library)
+        self.index = MidiIndex(os.path.join(self.temp_dir, "index.db"))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_record_and_search(self):
+        """Test recording an export and finding it by track and image."""
+        midi_path = os.path.join(self.library, "song.mid")
+        image_path = os.path.join(self.temp_dir, "image.png")
+        _write_midi(midi_path)
+        with open(image_path, "wb") as f:
+            f.write(b"not really a png")
+
+        tracks = [
+            TrackInfo("Piano", 0, False, 4),
+            TrackInfo("Drums", 0, True, 8),
+        ]
+        self.index.record_export(
+            midi_path, tracks, 2.0, image_path, {"bpm": 120}, 7, {"total": 0.1}
+        )
+
+        (entry,) = self.index.search(track="drums")
+        self.assertEqual(entry["path"], os.path.abspath(midi_path))
+        self.assertEqual((entry["track_count"], entry["note_count"]), (2, 12))
+        self.assertEqual((entry["params"], entry["seed"]), ({"bpm": 120}, 7))
+        self.assertEqual(entry["tracks"][1]["name"], "Drums")
+        self.assertTrue(entry["tracks"][1]["is_drum"])
+
+        found = self.index.search(image_hash=file_sha256(image_path))
+        self.assertEqual(len(found), 1)
+        self.assertEqual(self.index.search(track="Bass"), [])
+
+    def test_incremental_scan(self):
+        """Test that scans only parse new or changed files."""
+        first = os.path.join(self.library, "a.mid")
+        second = os.path.join(self.library, "b.mid")
+        _write_midi(first)
+        _write_midi(second)
+        with open(os.path.join(self.library, "notes.txt"), "w") as f:
+            f.write("ignored")
+
+        self.assertEqual(tuple(self.index.scan(self.library)), (2, 0, 0, 0))
+        self.assertEqual(tuple(self.index.scan(self.library)), (0, 0, 0, 2))
+
+        _write_midi(first, note_count=6)
+        os.remove(second)
+        self.assertEqual(tuple(self.index.scan(self.library)), (0, 1, 1, 0))
+
+        (entry,) = self.index.search(directory=self.library)
+        self.assertEqual((entry["note_count"], entry["source"]), (6, "scan"))
+
+    def test_scan_keeps_export_metadata(self):
+        """Test that rescanning a recorded export keeps its parameters."""
+        midi_path = os.path.join(self.library, "song.mid")
+        _write_midi(midi_path)
+        self.index.record_export(midi_path, [], 2.0, params={"bpm": 90}, seed=3)
+
+        _write_midi(midi_path, note_count=2)
+        self.assertEqual(self.index.scan(self.library).updated, 1)
+        (entry,) = self.index.search()
+        self.assertEqual((entry["params"], entry["seed"]), ({"bpm": 90}, 3))
+        self.assertEqual((entry["note_count"], entry["source"]), (2, "export"))
+
+    def test_invalid_index(self):
+        """Test that newer schemas and missing directories raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.index.scan(os.path.join(self.temp_dir, "missing"))
+
+        path = os.path.join(self.temp_dir, "newer.db")
+        connection = sqlite3.connect(path)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        connection.close()
+        with self.assertRaises(ValueError):
+            MidiIndex(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
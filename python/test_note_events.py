@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the binary note-event interchange format
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import build_multi_track_rolls
+from note_events import (
+    EVENT_DTYPE,
+    HEADER_DTYPE,
+    SLICE_DTYPE,
+    TRACK_DTYPE,
+    decode_note_events,
+    encode_note_events,
+)
+from piano_roll import PianoRoll
+
+
+def _mock_notes(count):
+    return [
+        {
+            "midi": 48 + i,
+            "chord": [48 + i, 52 + i, 55 + i],
+            "position": i / count,
+            "brightness": 32 * i,
+        }
+        for i in range(count)
+    ]
+
+
+class TestNoteEvents(unittest.TestCase):
+    def test_record_sizes(self):
+        """Test the fixed record widths the JavaScript reader relies on."""
+        self.assertEqual(
+            [HEADER_DTYPE.itemsize, TRACK_DTYPE.itemsize],
+            [32, 40],
+        )
+        self.assertEqual([SLICE_DTYPE.itemsize, EVENT_DTYPE.itemsize], [16, 12])
+
+    def test_round_trip(self):
+        """Test that slices and generated notes survive encoding."""
+        notes = _mock_notes(8)
+        rolls = build_multi_track_rolls(notes, 120, 4)
+        data = encode_note_events(notes, rolls, 120, 4)
+
+        decoded = decode_note_events(data)
+        self.assertEqual((decoded.bpm, decoded.duration), (120.0, 4.0))
+        self.assertEqual(decoded.track_names(), [roll.name for roll in rolls])
+        self.assertEqual(decoded.slices["chord"][2].tolist(), notes[2]["chord"])
+        self.assertEqual(len(decoded.events), sum(len(roll) for roll in rolls))
+        self.assertTrue(np.all(np.diff(decoded.events["start"]) >= 0))
+
+        drums = decoded.events[decoded.events["track"] == 2]
+        self.assertTrue(decoded.tracks["is_drum"][2])
+        self.assertEqual(sorted(drums["pitch"]), sorted(rolls[2].pitches))
+
+    def test_long_names_are_cut_on_character_boundaries(self):
+        """Test that track names are truncated to valid UTF-8."""
+        roll = PianoRoll(np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0), "é" * 20)
+        decoded = decode_note_events(encode_note_events([], [roll], 60, 1))
+        self.assertEqual(decoded.track_names(), ["é" * 16])
+
+    def test_invalid_data(self):
+        """Test that bad magic, versions and truncation raise ValueError."""
+        data = bytearray(encode_note_events(_mock_notes(2), [], 60, 2))
+        for broken in (
+            b"MThd" + data[4:],
+            data[:4] + b"\x09\x00" + data[6:],
+            data[:-1],
+            data[:10],
+        ):
+            with self.assertRaises(ValueError):
+                decode_note_events(bytes(broken))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for note merging and density reduction
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import bass_roll
+from note_reduction import (
+    NoteReduction,
+    limit_note_density,
+    merge_repeated_notes,
+    reduce_roll,
+)
+from piano_roll import PianoRoll
+
+
+class TestMergeRepeatedNotes(unittest.TestCase):
+    def test_contiguous_and_overlapping_runs(self):
+        """Test that touching or overlapping same-pitch notes become one."""
+        starts = np.array([0.0, 0.5, 1.0, 0.0, 2.0, 2.2, 2.6])
+        ends = np.array([0.5, 1.0, 1.5, 1.0, 3.0, 2.4, 3.5])
+        pitches = np.array([40, 40, 40, 52, 40, 40, 40])
+        velocities = np.array([90, 80, 70, 60, 100, 50, 40])
+
+        merged = merge_repeated_notes(starts, ends, pitches, velocities)
+        notes = sorted(zip(*(column.tolist() for column in merged)))
+        self.assertEqual(
+            notes,
+            [(0.0, 1.0, 52, 60), (0.0, 1.5, 40, 90), (2.0, 3.5, 40, 100)],
+        )
+
+    def test_gap_keeps_notes_apart(self):
+        """Test that a silence between repeats is preserved."""
+        merged = merge_repeated_notes(
+            np.array([0.0, 0.6]),
+            np.array([0.5, 1.0]),
+            np.array([60, 60]),
+            np.array([90, 90]),
+        )
+        self.assertEqual(len(merged[0]), 2)
+
+
+class TestLimitNoteDensity(unittest.TestCase):
+    def test_keeps_loudest_per_window(self):
+        """Test the per-second cap keeps the loudest notes in each window."""
+        starts = np.array([0.0, 0.25, 0.5, 0.75, 1.0, 1.5])
+        velocities = np.array([10, 90, 50, 80, 20, 30])
+        kept = limit_note_density(
+            starts, starts + 0.1, np.full(6, 60), velocities, max_notes_per_second=2
+        )
+        self.assertEqual(kept[0].tolist(), [0.25, 0.75, 1.0, 1.5])
+
+    def test_invalid_density(self):
+        """Test that a non-positive density is rejected."""
+        with self.assertRaises(ValueError):
+            limit_note_density(*(np.zeros(1),) * 4, max_notes_per_second=0)
+
+
+class TestReduceRoll(unittest.TestCase):
+    def test_bass_track_is_legato(self):
+        """Test that a held bass pitch collapses into one sustained note."""
+        notes = [
+            {"midi": 60, "chord": [60, 64, 67], "position": i / 8, "brightness": 128}
+            for i in range(8)
+        ]
+        reduced = reduce_roll(bass_roll(notes, 8.0), NoteReduction())
+        self.assertEqual(len(reduced), 1)
+        self.assertEqual((reduced.starts[0], reduced.ends[0]), (0.0, 8.0))
+
+    def test_drums_are_not_merged(self):
+        """Test that repeated drum hits stay separate."""
+        drums = PianoRoll(
+            np.array([0.0, 0.5]),
+            np.array([0.5, 1.0]),
+            np.array([36, 36]),
+            np.array([100, 100]),
+            is_drum=True,
+        )
+        self.assertEqual(len(reduce_roll(drums, NoteReduction())), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
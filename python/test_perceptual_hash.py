@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for perceptual hashing and near-duplicate extraction reuse
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from perceptual_hash import (
+    ExtractionCache,
+    dhash_image,
+    dhash_pixels,
+    hamming_distance,
+    tone_profile,
+)
+
+
+def _blocks(seed, width=400, height=240):
+    """Random 8x8-pixel-block texture, so resizing keeps its structure."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    return np.repeat(np.repeat(small, 8, axis=0), 8, axis=1)
+
+
+class TestPerceptualHash(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_hash_survives_resize_and_reencode(self):
+        """Test that copies hash close together and other images do not."""
+        original = os.path.join(self.temp_dir, "original.png")
+        copy = os.path.join(self.temp_dir, "copy.jpg")
+        Image.fromarray(_blocks(1)).save(original)
+        Image.fromarray(_blocks(1)).resize((300, 180)).save(copy, quality=70)
+
+        distance = hamming_distance(dhash_image(original), dhash_image(copy))
+        self.assertLessEqual(distance, 4)
+        self.assertGreater(
+            hamming_distance(dhash_pixels(_blocks(1)), dhash_pixels(_blocks(2))), 16
+        )
+
+    def test_band_lookup_matches_brute_force(self):
+        """Test that the band index finds the closest stored hash."""
+        rng = random.Random(3)
+        keys = [rng.getrandbits(64) for _ in range(300)]
+        tone = np.full(9, 128, dtype=np.uint8)
+        path = os.path.join(self.temp_dir, "extractions.sqlite")
+        with ExtractionCache(path) as cache:
+            for index, key in enumerate(keys):
+                cache.store(key, tone, "opts", [{"index": index}])
+
+            for key in keys[:40]:
+                query = key
+                for bit in rng.sample(range(64), rng.randint(0, 7)):
+                    query ^= 1 << bit
+                found = cache.find(query, tone, "opts", max_distance=7)
+                closest = min(hamming_distance(query, k) for k in keys)
+                self.assertIsNotNone(found)
+                self.assertEqual(
+                    hamming_distance(query, keys[found[0]["index"]]), closest
+                )
+            with self.assertRaises(ValueError):
+                cache.find(0, tone, "opts", max_distance=8)
+
+    def test_tone_blocks_reuse_across_brightness(self):
+        """Test that a brighter copy with the same dHash is not reused."""
+        dark = _blocks(1) // 4
+        bright = dark + 192
+        self.assertEqual(dhash_pixels(dark), dhash_pixels(bright))
+
+        path = os.path.join(self.temp_dir, "extractions.sqlite")
+        notes = [{"midi": 56, "chord": [56, 60, 63], "brightness": 40.0}]
+        with ExtractionCache(path) as cache:
+            cache.store(dhash_pixels(dark), tone_profile(dark), "opts", notes)
+            self.assertEqual(
+                cache.find(dhash_pixels(dark), tone_profile(dark), "opts"), notes
+            )
+            self.assertIsNone(
+                cache.find(dhash_pixels(bright), tone_profile(bright), "opts")
+            )
+
+    def test_extraction_cache(self):
+        """Test near-duplicate lookup, option isolation and eviction."""
+        path = os.path.join(self.temp_dir, "extractions.sqlite")
+        notes = [{"midi": 60, "chord": [60, 64, 67], "brightness": 12.5}]
+        tone = np.zeros(9, dtype=np.uint8)
+        with ExtractionCache(path, max_entries=2) as cache:
+            cache.store(0b1011, tone, "opts", notes)
+            self.assertEqual(cache.find(0b1001, tone, "opts", max_distance=1), notes)
+            self.assertIsNone(cache.find(0b0101, tone, "opts", max_distance=1))
+            self.assertIsNone(cache.find(0b1011, tone, "other"))
+
+            cache.store(1 << 40, tone, "opts", [])
+            cache.store(1 << 50, tone, "opts", [])
+            self.assertIsNone(cache.find(0b1011, tone, "opts", max_distance=0))
+
+        with ExtractionCache(path) as reopened:
+            self.assertEqual(reopened.find(1 << 50, tone, "opts", max_distance=0), [])
+        with self.assertRaises(ValueError):
+            ExtractionCache(path, max_entries=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the piano-roll track representation
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pretty_midi  # type: ignore
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import build_multi_track_rolls
+from piano_roll import (
+    PianoRoll,
+    midi_from_rolls,
+    render_piano_roll_png,
+    rolls_from_midi,
+    write_rolls_smf,
+)
+
+
+def _roll():
+    return PianoRoll(
+        np.array([0.0, 0.5, 1.0]),
+        np.array([0.5, 1.5, 1.25]),
+        np.array([60, 64, 67]),
+        np.array([100, 80, 60]),
+        "Lead",
+        81,
+    )
+
+
+class TestPianoRoll(unittest.TestCase):
+    def test_instrument_round_trip(self):
+        """Test conversion to and from a pretty_midi instrument."""
+        instrument = _roll().to_instrument()
+        self.assertEqual((instrument.name, instrument.program), ("Lead", 81))
+        roll = PianoRoll.from_instrument(instrument)
+        np.testing.assert_array_equal(roll.pitches, [60, 64, 67])
+        np.testing.assert_allclose(roll.ends, [0.5, 1.5, 1.25])
+
+        midi = midi_from_rolls([_roll(), _roll().shift(2.0)], 90)
+        self.assertEqual(len(midi.instruments), 2)
+        rolls = rolls_from_midi(midi)
+        np.testing.assert_allclose(rolls[1].starts, [2.0, 2.5, 3.0])
+
+    def test_matrix_round_trip(self):
+        """Test the dense pitch x step matrix and decoding it back."""
+        matrix = _roll().to_matrix(0.25)
+        self.assertEqual(matrix.shape, (128, 6))
+        self.assertEqual(matrix.dtype, np.uint8)
+        self.assertEqual(matrix[64].tolist(), [0, 0, 80, 80, 80, 80])
+
+        roll = PianoRoll.from_matrix(matrix, 0.25).sorted()
+        np.testing.assert_allclose(roll.starts, [0.0, 0.5, 1.0])
+        np.testing.assert_allclose(roll.ends, [0.5, 1.5, 1.25])
+        np.testing.assert_array_equal(roll.velocities, [100, 80, 60])
+
+    def test_transformations(self):
+        """Test transpose, quantize, mute and merge as array operations."""
+        roll = _roll()
+        self.assertEqual(roll.transpose(63).pitches.tolist(), [123, 127])
+        self.assertEqual(roll.quantize(1.0).starts.tolist(), [0.0, 0.0, 1.0])
+        muted = roll.mute(pitch_range=(62, 70), time_range=(0.75, 2.0))
+        self.assertEqual(muted.pitches.tolist(), [60, 64])
+        merged = roll.merge(roll.transpose(12))
+        self.assertEqual(len(merged), 6)
+        self.assertEqual(merged.pitches[:2].tolist(), [60, 72])
+
+    def test_smf_and_png_output(self):
+        """Test writing generated tracks as MIDI and as a piano-roll image."""
+        notes = [
+            {
+                "midi": 48 + i,
+                "chord": [48 + i, 52 + i, 55 + i],
+                "position": i / 8,
+                "brightness": 32 * i,
+            }
+            for i in range(8)
+        ]
+        rolls = build_multi_track_rolls(notes, 120, 4)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            midi_path = os.path.join(temp_dir, "roll.mid")
+            count = write_rolls_smf(rolls, midi_path, 120)
+            self.assertEqual(count, sum(len(roll) for roll in rolls))
+            midi = pretty_midi.PrettyMIDI(midi_path)
+            self.assertEqual(
+                [inst.name for inst in midi.instruments],
+                ["Melody", "Harmony", "Percussion", "Bass"],
+            )
+
+            png_path = os.path.join(temp_dir, "roll.png")
+            width, height = render_piano_roll_png(rolls, png_path, 0.1, 2)
+            self.assertEqual(width, 80)
+            with Image.open(png_path) as img:
+                self.assertEqual(img.size, (width, height))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
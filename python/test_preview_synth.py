@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline audio preview renderer
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import wave
+
+import pretty_midi  # type: ignore
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import (
+    generate_bass_track,
+    generate_harmony_track,
+    generate_melody_track,
+    generate_percussion_track,
+)
+from preview_synth import render_midi_to_array, render_preview_wav
+
+
+class TestPreviewSynth(unittest.TestCase):
+    def setUp(self):
+        """Build an 8-second four-track arrangement."""
+        mock_notes = [
+            {
+                "midi": 48 + (i * 5) % 36,
+                "chord": [48 + (i * 5) % 36, 52 + (i * 5) % 36, 55 + (i * 5) % 36],
+                "position": i / 16,
+                "brightness": (i * 16) % 256,
+            }
+            for i in range(16)
+        ]
+        self.midi = pretty_midi.PrettyMIDI(initial_tempo=60)
+        for generator in (
+            generate_melody_track,
+            generate_harmony_track,
+            generate_percussion_track,
+            generate_bass_track,
+        ):
+            self.midi.instruments.append(generator(mock_notes, 8.0))
+
+    def test_render_array(self):
+        """Test that rendering covers the arrangement and is normalized."""
+        samples = render_midi_to_array(self.midi, sample_rate=8000)
+        self.assertGreaterEqual(len(samples), 8 * 8000)
+        self.assertLessEqual(float(abs(samples).max()), 0.9 + 1e-6)
+        self.assertGreater(float(abs(samples).max()), 0.0)
+
+    def test_render_wav(self):
+        """Test that a preview WAV is written as 16-bit mono."""
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+            output_path = tmp_file.name
+
+        try:
+            seconds = render_preview_wav(self.midi, output_path)
+
+            self.assertGreaterEqual(seconds, 8.0)
+            with wave.open(output_path, "rb") as wav_file:
+                self.assertEqual(wav_file.getnchannels(), 1)
+                self.assertEqual(wav_file.getsampwidth(), 2)
+                self.assertGreater(wav_file.getnframes(), 0)
+        finally:
+            os.unlink(output_path)
+
+    def test_empty_midi(self):
+        """Test that a MIDI without notes renders silence."""
+        samples = render_midi_to_array(pretty_midi.PrettyMIDI(), sample_rate=8000)
+        self.assertEqual(float(abs(samples).max()), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the export result cache
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from groove_bank import AI_GROOVES, STANDARD_GROOVES
+from mapping_curves import linear_curve
+from result_cache import ResultCache, request_fingerprint
+
+
+class TestRequestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.image_path = os.path.join(self.temp_dir, "image.png")
+        with open(self.image_path, "wb") as f:
+            f.write(b"pixels")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_fingerprint_covers_the_request(self):
+        """Test that image content, options and version change the key."""
+        params = {"bpm": 60, "seed": 1, "curves": {"pitch": linear_curve(48, 84)}}
+        key = request_fingerprint(self.image_path, params, 1)
+
+        copy_path = os.path.join(self.temp_dir, "copy.png")
+        shutil.copy(self.image_path, copy_path)
+        self.assertEqual(request_fingerprint(copy_path, dict(params), 1), key)
+
+        for changed, version in (
+            ({**params, "seed": 2}, 1),
+            ({**params, "curves": {"pitch": linear_curve(48, 85)}}, 1),
+            (params, 2),
+        ):
+            self.assertNotEqual(
+                request_fingerprint(self.image_path, changed, version), key
+            )
+
+        grooves = request_fingerprint(self.image_path, {"grooves": AI_GROOVES}, 1)
+        self.assertNotEqual(
+            request_fingerprint(self.image_path, {"grooves": STANDARD_GROOVES}, 1),
+            grooves,
+        )
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.key = "a" * 64
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_disk_and_memory_tiers(self):
+        """Test that artifacts persist on disk and are served from memory."""
+        cache = ResultCache(self.temp_dir)
+        self.assertIsNone(cache.get(self.key, "mid"))
+        cache.put(self.key, "mid", b"MThd")
+
+        self.assertEqual(ResultCache(self.temp_dir).get(self.key, "mid"), b"MThd")
+
+        os.remove(os.path.join(self.temp_dir, f"{self.key}.mid"))
+        self.assertEqual(cache.get(self.key, "mid"), b"MThd")
+        self.assertIsNone(ResultCache(self.temp_dir).get(self.key, "mid"))
+
+    def test_least_recently_used_eviction(self):
+        """Test that the size limit evicts the coldest artifacts first."""
+        cache = ResultCache(self.temp_dir, max_bytes=250, memory_bytes=0)
+        # Other files in the directory are neither counted nor evicted
+        foreign = os.path.join(self.temp_dir, "extractions.sqlite")
+        with open(foreign, "wb") as f:
+            f.write(b"x" * 1000)
+        first, second, third = "1" * 64, "2" * 64, "3" * 64
+        cache.put(first, "mid", b"x" * 100)
+        cache.put(second, "mid", b"x" * 100)
+        # Touch the first entry so the second is the coldest
+        os.utime(os.path.join(self.temp_dir, f"{second}.mid"), ns=(1, 1))
+        self.assertIsNotNone(cache.get(first, "mid"))
+        cache.put(third, "mid", b"x" * 100)
+
+        self.assertIsNone(cache.get(second, "mid"))
+        self.assertIsNotNone(cache.get(first, "mid"))
+        self.assertIsNotNone(cache.get(third, "mid"))
+        self.assertTrue(os.path.exists(foreign))
+
+    def test_invalid_keys(self):
+        """Test that keys cannot escape the cache directory."""
+        cache = ResultCache(self.temp_dir)
+        with self.assertRaises(ValueError):
+            cache.get("../" + self.key, "mid")
+        with self.assertRaises(ValueError):
+            cache.put(self.key, "mid/../x", b"")
+        with self.assertRaises(ValueError):
+            ResultCache(self.temp_dir, max_bytes=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the sequential generator kernels
+"""
+
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import ai_bass_roll, ai_melody_roll
+from sequential_kernels import (
+    HAVE_NUMBA,
+    available_backends,
+    get_backend,
+    melody_walk,
+    set_backend,
+)
+
+
+def _reference_walk(continues, steps, fresh, start, low, high):
+    """Straightforward walk to check the kernels against."""
+    pitches = []
+    for cont, step, jump in zip(continues, steps, fresh):
+        previous = pitches[-1] if pitches else start
+        pitch = previous + step if cont and previous is not None else jump
+        pitches.append(min(high, max(low, pitch)))
+    return pitches
+
+
+def _walk_inputs(count, seed):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.random(count) < 0.7,
+        rng.integers(-12, 13, count),
+        rng.integers(30, 110, count),
+    )
+
+
+def _mock_notes(count):
+    return [
+        {
+            "midi": 48 + i % 24,
+            "chord": [48 + i % 24, 52 + i % 24, 55 + i % 24],
+            "position": i / count,
+            "brightness": float(i * 37 % 256),
+        }
+        for i in range(count)
+    ]
+
+
+class TestSequentialKernels(unittest.TestCase):
+    def tearDown(self):
+        set_backend(None)
+
+    def test_melody_walk(self):
+        """Test stepping, jumping, clamping and the carried start pitch."""
+        continues = np.array([True, True, False, True, True])
+        steps = np.array([5, 30, 0, -2, -60])
+        fresh = np.array([60, 0, 70, 0, 0])
+        self.assertEqual(
+            melody_walk(continues, steps, fresh).tolist(), [60, 90, 70, 68, 48]
+        )
+        self.assertEqual(
+            melody_walk(continues, steps, fresh, start=94).tolist(),
+            [96, 96, 70, 68, 48],
+        )
+        self.assertEqual(len(melody_walk(continues[:0], steps[:0], fresh[:0])), 0)
+
+    def test_python_backend_matches_reference(self):
+        """Test the python kernel against a direct reference walk."""
+        set_backend("python")
+        self.assertEqual(get_backend(), "python")
+        self.assertIn("python", available_backends())
+        for seed, start in [(0, None), (1, 60), (2, 95)]:
+            continues, steps, fresh = _walk_inputs(500, seed)
+            self.assertEqual(
+                melody_walk(continues, steps, fresh, start).tolist(),
+                _reference_walk(continues, steps, fresh, start, 48, 96),
+            )
+
+        with self.assertRaises(ValueError):
+            set_backend("fortran")
+
+    @unittest.skipUnless(HAVE_NUMBA, "numba is not installed")
+    def test_backends_agree(self):
+        """Test identical seeded output on the python and numba backends."""
+        continues, steps, fresh = _walk_inputs(500, 3)
+        notes = _mock_notes(200)
+        outputs = []
+        for backend in ("python", "numba"):
+            set_backend(backend)
+            roll = ai_melody_roll(notes, 50.0, rng=random.Random(4))
+            outputs.append(
+                (
+                    melody_walk(continues, steps, fresh, 60).tolist(),
+                    roll.pitches.tolist(),
+                    roll.starts.tolist(),
+                )
+            )
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_chunks_continue_the_walk(self):
+        """Test that the state carries the walk and beat across chunks."""
+        notes = _mock_notes(64)
+        whole = ai_bass_roll(notes, 16.0, state={}, rng=random.Random(1))
+        self.assertTrue(np.all((whole.pitches >= 24) & (whole.pitches <= 48)))
+
+        state = {}
+        ai_melody_roll(notes[:32], 8.0, state, rng=random.Random(2))
+        last_note = state["last_note"]
+        second = ai_melody_roll(notes[32:], 8.0, state, rng=random.Random(2))
+        self.assertTrue(48 <= last_note <= 96)
+        self.assertTrue(np.all((second.pitches >= 48) & (second.pitches <= 96)))
+
+        bass_state = {}
+        ai_bass_roll(notes[:3], 3.0, bass_state, rng=random.Random(3))
+        self.assertEqual(bass_state["step"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight request coalescing
+"""
+
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _work(self, value):
+        self.calls += 1
+        self.release.wait(5)
+        if value < 0:
+            raise ValueError("negative")
+        return value * 2
+
+    def test_followers_share_the_leader(self):
+        """Test that requests with the same key share one computation."""
+        flights = SingleFlight()
+        with ThreadPoolExecutor(4) as pool:
+            leader, is_leader = flights.submit("a", partial(pool.submit, self._work, 2))
+            follower, is_follower_leader = flights.submit(
+                "a", partial(pool.submit, self._work, 2)
+            )
+            other, _ = flights.submit("b", partial(pool.submit, self._work, 3))
+            self.assertTrue(is_leader)
+            self.assertFalse(is_follower_leader)
+            self.assertIs(follower, leader)
+            self.assertEqual(len(flights), 2)
+            self.release.set()
+            self.assertEqual(follower.result(), 4)
+            self.assertEqual(other.result(), 6)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual((flights.leaders, flights.followers), (2, 1))
+
+    def test_errors_reach_every_follower(self):
+        """Test that a failing leader raises in every follower."""
+        flights = SingleFlight()
+        with ThreadPoolExecutor(2) as pool:
+            futures = [
+                flights.submit("bad", partial(pool.submit, self._work, -1))[0]
+                for _ in range(3)
+            ]
+            self.release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+        self.assertEqual(self.calls, 1)
+
+    def test_finished_keys_run_again(self):
+        """Test that a key is computed afresh once its flight has landed."""
+        flights = SingleFlight()
+        self.release.set()
+        with ThreadPoolExecutor(1) as pool:
+            first, _ = flights.submit("a", partial(pool.submit, self._work, 1))
+            first.result()
+            second, is_leader = flights.submit("a", partial(pool.submit, self._work, 1))
+            second.result()
+        self.assertTrue(is_leader)
+        self.assertEqual(len(flights), 0)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming MIDI writer and chunked rendering
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pretty_midi  # type: ignore
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import (
+    create_chunked_multi_track_midi,
+    generate_ai_bass,
+    generate_percussion_track,
+)
+from smf_writer import StreamingMidiWriter, encode_varlen
+
+
+def _mock_notes(count):
+    return [
+        {
+            "midi": 48 + (i * 7) % 36,
+            "chord": [48 + (i * 7) % 36, 52 + (i * 7) % 36, 55 + (i * 7) % 36],
+            "position": i / count,
+            "brightness": (i * 37) % 256,
+        }
+        for i in range(count)
+    ]
+
+
+class TestStreamingMidiWriter(unittest.TestCase):
+    def setUp(self):
+        with tempfile.NamedTemporaryFile(suffix=".mid", delete=False) as tmp_file:
+            self.output_path = tmp_file.name
+
+    def tearDown(self):
+        if os.path.exists(self.output_path):
+            os.unlink(self.output_path)
+
+    def test_encode_varlen(self):
+        """Test MIDI variable-length quantity encoding."""
+        self.assertEqual(encode_varlen(0), b"\x00")
+        self.assertEqual(encode_varlen(0x7F), b"\x7f")
+        self.assertEqual(encode_varlen(0x80), b"\x81\x00")
+        self.assertEqual(encode_varlen(0x0FFFFFFF), b"\xff\xff\xff\x7f")
+
+    def test_notes_span_windows(self):
+        """Test that notes ringing past a window boundary are written intact."""
+        with StreamingMidiWriter(
+            self.output_path, 120, [("Lead", 81, False), ("Drums", 0, True)]
+        ) as writer:
+            writer.add_notes(
+                0,
+                np.array([0.0, 0.5]),
+                np.array([0.5, 1.5]),
+                np.array([60, 62]),
+                np.array([100, 90]),
+            )
+            writer.add_notes(
+                1, np.array([0.0]), np.array([0.1]), np.array([36]), np.array([110])
+            )
+            writer.flush(1.0)
+            writer.add_notes(
+                0, np.array([1.0]), np.array([2.0]), np.array([64]), np.array([80])
+            )
+            writer.flush(2.0)
+
+        midi = pretty_midi.PrettyMIDI(self.output_path)
+        lead, drums = midi.instruments
+        self.assertEqual((lead.name, lead.program, lead.is_drum), ("Lead", 81, False))
+        self.assertTrue(drums.is_drum)
+
+        spans = [(n.pitch, round(n.start, 3), round(n.end, 3)) for n in lead.notes]
+        self.assertEqual(spans, [(60, 0.0, 0.5), (62, 0.5, 1.5), (64, 1.0, 2.0)])
+        self.assertAlmostEqual(midi.get_tempo_changes()[1][0], 120.0)
+
+
+class TestChunkedRendering(unittest.TestCase):
+    def test_state_continues_beat_position(self):
+        """Test that chunked generators match a single pass."""
+        notes = _mock_notes(10)
+        whole = generate_percussion_track(notes, 10.0)
+
+        state = {}
+        first = generate_percussion_track(notes[:3], 3.0, state=state)
+        second = generate_percussion_track(notes[3:], 7.0, state=state)
+        self.assertEqual(state["step"], 10)
+
+        def kicks(track, offset=0.0):
+            return [round(n.start + offset, 6) for n in track.notes if n.pitch == 36]
+
+        self.assertEqual(kicks(whole), kicks(first) + kicks(second, 3.0))
+
+    def test_ai_bass_pattern_position(self):
+        """Test that the walking bass keeps its root/fifth positions per chunk."""
+        notes = _mock_notes(6)
+        state = {}
+        generate_ai_bass(notes[:3], 3.0, state=state)
+        track = generate_ai_bass(notes[3:], 3.0, state=state)
+        # Step 4 is a downbeat: the root an octave below the slice note
+        self.assertEqual(track.notes[1].pitch, max(24, min(48, notes[4]["midi"] - 12)))
+
+    def test_chunked_file_matches_duration(self):
+        """Test a chunked render longer than the single-pass duration limit."""
+        notes = _mock_notes(600)
+        with tempfile.NamedTemporaryFile(suffix=".mid", delete=False) as tmp_file:
+            output_path = tmp_file.name
+
+        try:
+            summary = create_chunked_multi_track_midi(
+                notes,
+                output_path,
+                bpm=90,
+                duration=1200,
+                ai_mode=True,
+                chunk_steps=32,
+                seed=0,
+            )
+            self.assertEqual(summary["chunks"], 19)
+
+            midi = pretty_midi.PrettyMIDI(output_path)
+            self.assertEqual(len(midi.instruments), 4)
+            self.assertEqual(
+                sum(len(inst.notes) for inst in midi.instruments),
+                summary["total_notes"],
+            )
+            self.assertAlmostEqual(midi.get_end_time(), 1200.0, places=1)
+        finally:
+            os.unlink(output_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
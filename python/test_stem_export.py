@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for per-track stem export
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pretty_midi  # type: ignore
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from midi_exporter import create_multi_track_midi_from_notes
+from stem_export import stem_bundle_path, stem_paths, write_stems
+
+
+def _mock_notes(count):
+    return [
+        {
+            "midi": 48 + i,
+            "chord": [48 + i, 52 + i, 55 + i],
+            "position": i / count,
+            "brightness": 32 * i,
+        }
+        for i in range(count)
+    ]
+
+
+class TestStemExport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.temp_dir, "song.mid")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_stem_paths(self):
+        """Test slugged, de-duplicated stem names next to the output."""
+        self.assertEqual(
+            stem_paths("out/song.mid", ["AI Bass", "AI Bass", "!!"]),
+            ["out/song_ai_bass.mid", "out/song_ai_bass_2.mid", "out/song_track2.mid"],
+        )
+        self.assertEqual(stem_bundle_path("out/song.mid"), "out/song_stems.zip")
+
+    def test_stems_match_combined_tracks(self):
+        """Test that each stem holds exactly one track of the combined file."""
+        with redirect_stdout(StringIO()):
+            midi = create_multi_track_midi_from_notes(
+                _mock_notes(8), self.output_path, 120, 4, stems=True, stems_zip=True
+            )
+
+        paths = stem_paths(self.output_path, [inst.name for inst in midi.instruments])
+        for inst, path in zip(midi.instruments, paths):
+            stem = pretty_midi.PrettyMIDI(path)
+            self.assertEqual(len(stem.instruments), 1)
+            self.assertEqual(stem.instruments[0].name, inst.name)
+            self.assertEqual(stem.instruments[0].is_drum, inst.is_drum)
+            self.assertEqual(len(stem.instruments[0].notes), len(inst.notes))
+
+        with zipfile.ZipFile(stem_bundle_path(self.output_path)) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                sorted(os.path.basename(p) for p in [self.output_path] + paths),
+            )
+
+    def test_empty_arrangement(self):
+        """Test that an arrangement without tracks writes no stems."""
+        self.assertEqual(write_stems([], self.output_path, 120), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for tempo maps and tempo-mapped MIDI writing
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pretty_midi
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from piano_roll import PianoRoll, write_rolls_smf
+from tempo_map import TempoMap, brightness_tempo_map, slice_tempo_map
+
+
+class TestTempoMap(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_piecewise_integration(self):
+        """Test conversions across a tempo change."""
+        # 2s at 60 BPM (2 beats), then 120 BPM
+        tempo_map = TempoMap([0.0, 2.0], [60, 120])
+        np.testing.assert_allclose(
+            tempo_map.seconds_to_beats([0.0, 1.0, 2.0, 3.0]), [0, 1, 2, 4]
+        )
+        np.testing.assert_array_equal(
+            tempo_map.seconds_to_ticks([1.0, 3.0], 480), [480, 1920]
+        )
+        np.testing.assert_allclose(tempo_map.beats_to_seconds([1, 2, 4]), [1, 2, 3])
+        self.assertEqual(tempo_map.tempo_events(480), [(0, 60.0), (960, 120.0)])
+
+    def test_invalid_maps(self):
+        """Test that malformed maps and spreads raise ValueError."""
+        with self.assertRaises(ValueError):
+            TempoMap([1.0], [60])
+        with self.assertRaises(ValueError):
+            TempoMap([0.0, 0.0], [60, 90])
+        with self.assertRaises(ValueError):
+            TempoMap([0.0], [0])
+        with self.assertRaises(ValueError):
+            brightness_tempo_map([{"brightness": 10}], 8, 60, 1.0)
+
+    def test_brightness_map_keeps_duration(self):
+        """Test that bright slices speed up and the piece keeps its length."""
+        notes = [{"brightness": value} for value in (0, 0, 255, 255, 128)]
+        tempo_map = brightness_tempo_map(notes, 10, 60, 0.5)
+        # Equal neighbours share one tempo change
+        self.assertEqual(len(tempo_map), 3)
+        self.assertGreater(tempo_map.bpms[1], tempo_map.bpms[0])
+        # All 10 beats of the piece still fit in 10 seconds
+        self.assertAlmostEqual(float(tempo_map.beats_to_seconds(10)), 10.0)
+
+    def test_slice_map_uses_section_tempos(self):
+        """Test that equal neighbouring tempos share one change."""
+        tempo_map = slice_tempo_map([1.0, 1.0, 0.5, 0.5], 60, 1.0)
+        np.testing.assert_allclose(tempo_map.times, [0, 2])
+        np.testing.assert_allclose(tempo_map.bpms, [60, 120])
+
+    def test_written_file_keeps_the_beat_grid(self):
+        """Test that a tempo-mapped file puts notes back on the beat grid."""
+        tempo_map = TempoMap([0.0, 2.0], [60, 120])
+        # Four quarter notes laid out at 60 BPM
+        roll = PianoRoll(
+            [0.0, 1.0, 2.0, 3.0], [0.5, 1.5, 2.5, 3.5], [60] * 4, [100] * 4
+        ).retime(tempo_map, 60)
+        np.testing.assert_allclose(roll.starts, [0.0, 1.0, 2.0, 2.5])
+
+        path = os.path.join(self.temp_dir, "tempo.mid")
+        write_rolls_smf([roll], path, 60, tempo_map)
+        midi = pretty_midi.PrettyMIDI(path)
+        times, bpms = midi.get_tempo_changes()
+        np.testing.assert_allclose(times, [0, 2])
+        np.testing.assert_allclose(bpms, [60, 120])
+        starts = [note.start for note in midi.instruments[0].notes]
+        np.testing.assert_allclose(starts, [0.0, 1.0, 2.0, 2.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the watch-folder mode
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Add the current directory to the path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from watch_folder import FolderWatcher, WatchState, scan_images
+
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.spool = os.path.join(self.temp_dir, "spool")
+        self.output_dir = os.path.join(self.temp_dir, "out")
+        os.makedirs(self.spool)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _image(self, name):
+        path = os.path.join(self.spool, name)
+        pixels = np.tile(np.arange(0, 256, 8, dtype=np.uint8), (16, 1))
+        Image.fromarray(pixels, "L").save(path, format="PNG")
+        return path
+
+    def test_scan_only_images(self):
+        """Test that scanning skips non-image files and directories."""
+        self._image("a.png")
+        open(os.path.join(self.spool, "notes.txt"), "w").close()
+        os.makedirs(os.path.join(self.spool, "sub.png"))
+        self.assertEqual(list(scan_images(self.spool)), ["a.png"])
+
+    def test_files_settle_before_dispatch(self):
+        """Test debouncing of files that are still being written."""
+        watcher = FolderWatcher(self.spool, self.output_dir, settle_seconds=2.0)
+        path = self._image("a.png")
+
+        self.assertEqual(watcher.poll(now=0.0), [])
+        self.assertEqual(watcher.poll(now=1.0), [])
+
+        # Still growing: the settle timer restarts
+        with open(path, "ab") as f:
+            f.write(b"\0")
+        self.assertEqual(watcher.poll(now=2.5), [])
+        self.assertEqual(watcher.poll(now=4.0), [])
+        ready = watcher.poll(now=4.5)
+        self.assertEqual([name for name, _ in ready], ["a.png"])
+
+    def test_state_survives_restart(self):
+        """Test conversion, the state file and no rework after a restart."""
+        self._image("a.png")
+        self._image("a.jpg")
+        results = []
+        watcher = FolderWatcher(
+            self.spool, self.output_dir, {"duration": 2}, workers=1, settle_seconds=0
+        )
+        converted = watcher.run(0.01, max_polls=2, on_result=results.append)
+
+        self.assertEqual(converted, 2)
+        outputs = sorted(os.path.basename(r["output_path"]) for r in results)
+        self.assertEqual(outputs, ["a.mid", "a_1.mid"])
+        for result in results:
+            self.assertTrue(os.path.exists(result["output_path"]))
+
+        restarted = FolderWatcher(self.spool, self.output_dir, settle_seconds=0)
+        self.assertEqual(restarted.poll(now=0.0), [])
+        self.assertEqual(restarted.poll(now=1.0), [])
+        self.assertEqual(
+            set(WatchState(restarted.state.path).files), {"a.png", "a.jpg"}
+        )
+
+    def test_invalid_settings(self):
+        """Test that a missing directory or corrupt state raises ValueError."""
+        with self.assertRaises(ValueError):
+            FolderWatcher(os.path.join(self.temp_dir, "missing"), self.output_dir)
+
+        state_path = os.path.join(self.temp_dir, "state.json")
+        with open(state_path, "w") as f:
+            f.write("{not json")
+        with self.assertRaises(ValueError):
+            FolderWatcher(self.spool, self.output_dir, state_path=state_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
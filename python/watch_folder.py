@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Watch-folder mode for the Hyper Vibe MIDI Exporter.
+
+One resident process polls a spool directory (plain os.scandir stats, no
+extra dependencies) and converts new or modified images on a worker pool.
+A file is only picked up once its size and modification time have stayed
+the same for `settle_seconds`, so partially written uploads are skipped.
+Finished files are recorded in a small JSON state file, so a restart does
+not convert them again.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from batch_export import CoalescingConverter, make_export_options
+from job_scheduler import PriorityScheduler
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+STATE_FILE_NAME = ".watch_state.json"
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# (mtime_ns, size) of a file as last seen
+Signature = Tuple[int, int]
+
+
+def scan_images(directory: str) -> Dict[str, Signature]:
+    """
+    Stat every image file directly inside a directory.
+
+    Returns:
+        Mapping of file name to (mtime_ns, size)
+    """
+    found: Dict[str, Signature] = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed between listing and stat
+            found[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class WatchState:
+    """Converted files by name, persisted as JSON."""
+
+    def __init__(self, path: str):
+        """
+        Load the state file if it exists.
+
+        Raises:
+            ValueError: If the state file is not valid JSON state
+        """
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as state_file:
+                    files = json.load(state_file)["files"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise ValueError(f"Invalid watch state file {path}: {e}") from e
+            if not isinstance(files, dict):
+                raise ValueError(f"Invalid watch state file {path}")
+            self.files = files
+
+    def is_current(self, name: str, signature: Signature) -> bool:
+        """Whether this version of the file was already handled."""
+        entry = self.files.get(name)
+        return entry is not None and tuple(entry["signature"]) == signature
+
+    def output_for(self, name: str) -> Optional[str]:
+        """Output path recorded for a file, if any."""
+        entry = self.files.get(name)
+        return entry.get("output_path") if entry is not None else None
+
+    def record(
+        self,
+        name: str,
+        signature: Signature,
+        output_path: str,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record a handled file.
+
+        Failures are recorded too, so a broken image is not retried until
+        it changes.
+        """
+        self.files[name] = {
+            "signature": list(signature),
+            "output_path": output_path,
+            "error": error,
+        }
+
+    def save(self) -> None:
+        """Write the state atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump({"files": self.files}, state_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class FolderWatcher:
+    """Poll a directory and convert settled images on a process pool."""
+
+    def __init__(
+        self,
+        directory: str,
+        output_dir: str,
+        options: Optional[Dict[str, Any]] = None,
+        workers: Optional[int] = None,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        state_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            directory: Spool directory to watch (not recursive)
+            output_dir: Directory for the generated .mid files
+            options: Export options (see batch_export.make_export_options)
+            workers: Conversion processes (default: CPU count)
+            settle_seconds: How long size and mtime must stay unchanged
+                before a file is converted
+            state_path: State file (default: .watch_state.json in output_dir)
+
+        Raises:
+            ValueError: If the directory does not exist, the settings or
+                options are invalid, or the state file is corrupt
+        """
+        if not os.path.isdir(directory):
+            raise ValueError(f"Watch directory does not exist: {directory}")
+        if settle_seconds < 0:
+            raise ValueError(f"Settle time cannot be negative, got {settle_seconds}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.directory = directory
+        self.output_dir = output_dir
+        self.options = make_export_options(**(options or {}))
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.state = WatchState(state_path or os.path.join(output_dir, STATE_FILE_NAME))
+
+        # name -> (signature, monotonic time it was first seen with it)
+        self._pending: Dict[str, Tuple[Signature, float]] = {}
+        self._running: Dict[Future, Tuple[str, Signature, str]] = {}
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[str, Signature]]:
+        """
+        Scan the directory once.
+
+        Returns:
+            Files that have settled and need converting, oldest first
+        """
+        if now is None:
+            now = time.monotonic()
+
+        in_flight = {name for name, _, _ in self._running.values()}
+        ready: List[Tuple[float, str, Signature]] = []
+        found = scan_images(self.directory)
+        for name, signature in found.items():
+            if name in in_flight or self.state.is_current(name, signature):
+                self._pending.pop(name, None)
+                continue
+            seen = self._pending.get(name)
+            if seen is None or seen[0] != signature:
+                self._pending[name] = (signature, now)  # New or still changing
+            elif signature[1] > 0 and now - seen[1] >= self.settle_seconds:
+                ready.append((seen[1], name, signature))
+
+        for name in set(self._pending) - set(found):
+            del self._pending[name]  # Deleted before it settled
+
+        ready.sort()
+        for _, name, _ in ready:
+            del self._pending[name]
+        return [(name, signature) for _, name, signature in ready]
+
+    def _output_path(self, name: str) -> str:
+        """Output .mid path for an image, unique across the watched files."""
+        recorded = self.state.output_for(name)
+        if recorded is not None:
+            return recorded
+
+        taken: Set[str] = {
+            entry["output_path"] for entry in self.state.files.values()
+        } | {output_path for _, _, output_path in self._running.values()}
+        stem = os.path.splitext(name)[0]
+        candidate = os.path.join(self.output_dir, f"{stem}.mid")
+        count = 1
+        while candidate in taken:
+            candidate = os.path.join(self.output_dir, f"{stem}_{count}.mid")
+            count += 1
+        return candidate
+
+    def _collect(self, block: bool = False) -> List[Dict[str, Any]]:
+        """Record finished conversions in the state file."""
+        results = []
+        for future in list(self._running):
+            if not (block or future.done()):
+                continue
+            name, signature, output_path = self._running.pop(future)
+            if future.cancelled():
+                continue  # Never started; converted on the next run
+            result: Dict[str, Any] = {"image_path": name, "output_path": output_path}
+            try:
+                result.update(future.result(), ok=True)
+                self.state.record(name, signature, output_path)
+            except Exception as e:
+                result.update(ok=False, error=str(e))
+                self.state.record(name, signature, output_path, str(e))
+            results.append(result)
+        if results:
+            self.state.save()
+        return results
+
+    def run(
+        self,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_polls: Optional[int] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> int:
+        """
+        Watch until interrupted (or for `max_polls` scans).
+
+        Args:
+            poll_interval: Seconds between directory scans
+            max_polls: Stop after this many scans and wait for running
+                conversions (default: run forever)
+            on_result: Called with each conversion's result dict
+
+        Returns:
+            Number of files converted successfully
+        """
+        converted = 0
+        polls = 0
+
+        def report(results: List[Dict[str, Any]]) -> None:
+            nonlocal converted
+            for result in results:
+                converted += bool(result["ok"])
+                if on_result is not None:
+                    on_result(result)
+
+        workers = self.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            # Watched files are interactive work; identical seeded images
+            # dropped together are converted once
+            converter = CoalescingConverter(PriorityScheduler(pool, workers))
+            try:
+                while max_polls is None or polls < max_polls:
+                    for name, signature in self.poll():
+                        output_path = self._output_path(name)
+                        future = converter.submit(
+                            os.path.join(self.directory, name),
+                            output_path,
+                            self.options,
+                        )
+                        self._running[future] = (name, signature, output_path)
+                    report(self._collect())
+                    polls += 1
+                    if max_polls is None or polls < max_polls:
+                        time.sleep(poll_interval)
+            except BaseException:
+                for future in self._running:
+                    future.cancel()
+                raise
+            finally:
+                report(self._collect(block=True))
+
+        return converted
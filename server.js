@@ -60,7 +60,8 @@ app.get("/api/docs", (req, res) => {
           tracks: "array (optional) - Track types ['melody', 'harmony', 'percussion', 'bass']",
           bpm: "number (optional) - Tempo in BPM (default: 60)",
           duration: "number (optional) - Duration in seconds (default: 8)",
-          aiMode: "boolean (optional) - Enable AI enhancement (default: false)"
+          aiMode: "boolean (optional) - Enable AI enhancement (default: false)",
+          seed: "integer (optional) - Reproducible arrangement; seeded results are cached"
         }
       }
     }
@@ -102,17 +103,24 @@ app.post("/api/analyze-image", (req, res) => {
     bpm = 60,
     duration = 8,
     aiMode = false,
+    seed,
   } = req.body;
 
   if (!imagePath) {
     return res.status(400).json({ error: "Image path is required" });
   }
+  if (seed !== undefined && !Number.isInteger(seed)) {
+    return res.status(400).json({ error: "Seed must be an integer" });
+  }
 
   // Build Python command for multi-track MIDI export
   const aiFlag = aiMode ? "--ai-mode" : "";
-  const pythonCmd = `python python/midi_exporter.py "${imagePath}" -o "output.mid" -b ${bpm} -d ${duration} -t ${tracks.join(
+  // Only seeded exports are reproducible, so only they are cached
+  const seedFlags =
+    seed !== undefined ? `--seed ${seed} --cache ".midi-cache"` : "";
+  const pythonCmd = `python python/midi_exporter.py "${imagePath}" -o "output.mid" --events "output.events" -b ${bpm} -d ${duration} -t ${tracks.join(
     " "
-  )} ${aiFlag}`;
+  )} ${aiFlag} ${seedFlags}`;
 
   console.log("🎼 Executing MIDI export command:", pythonCmd);
 
@@ -137,9 +145,11 @@ app.post("/api/analyze-image", (req, res) => {
         : "Multi-track MIDI exported successfully",
       tracks: tracks,
       outputFile: "output.mid",
+      eventsFile: "output.events",
       bpm: bpm,
       duration: duration,
       aiMode: aiMode,
+      seed: seed,
     });
   });
 });